@@ -21,11 +21,12 @@ echo "🚀 Available commands:"
 echo "  python run_app.py                    # Start the full application"
 echo "  python utils/train_nic_classifier.py # Train NIC classifier"
 echo "  python utils/generate_scheme_embeddings.py # Generate embeddings"
+echo "  python utils/generate_nic_scheme_map.py # Precompute schemes per NIC code"
 echo "  python test_api.py                   # Test the API"
 echo ""
 echo "🔧 Manual startup:"
 echo "  cd backend && uvicorn main:app --reload"
-echo "  cd frontend && streamlit run app.py"
+echo "  cd frontend && PYTHONPATH=.. streamlit run app.py"
 echo ""
 echo "🌐 Access points:"
 echo "  Frontend: http://localhost:8501"
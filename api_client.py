@@ -0,0 +1,206 @@
+"""
+Shared HTTP client for the GovBizConnect API
+
+Used by the Streamlit frontend, run_app.py and test_api.py instead of
+one-off requests.get/post calls, so that:
+
+  - connections are pooled and kept alive between calls
+  - connection failures and 502/503 responses are retried with jittered
+    exponential backoff (503 responses wait at least their Retry-After)
+  - the health status is cached for a few seconds, so a page that checks
+    it on every render does not add a round trip each time
+
+APIClient is synchronous (requests.Session); AsyncAPIClient has the same
+methods as coroutines, over httpx.AsyncClient. The inference endpoints are
+pure functions of the request body, so their POSTs are safe to retry. Admin
+actions such as POST /admin/reload are not, and are sent once unless the
+caller passes retries.
+"""
+
+import asyncio
+import os
+import random
+import time
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+API_BASE_URL = os.environ.get("GOVBIZ_API_URL", "http://localhost:8000")
+RETRIES = int(os.environ.get("GOVBIZ_API_RETRIES", "2"))
+HEALTH_TTL = float(os.environ.get("GOVBIZ_HEALTH_TTL", "5"))
+POOL_SIZE = 10
+TIMEOUT = 10
+HEALTH_TIMEOUT = 2
+# Backoff before retry n (from 0) is uniform in [0, BACKOFF_BASE * 2**n]
+BACKOFF_BASE = 0.2
+# 504 means the backend gave up on the inference, so it is not retried
+RETRY_STATUSES = (502, 503)
+# Non-GET requests under these paths change server state, so are not retried by default
+NO_RETRY_PREFIXES = ("/admin/",)
+
+
+def default_retries(method, path, retries):
+    """The client's retries, or none for a request that is not safe to repeat"""
+    if method.upper() != "GET" and path.startswith(NO_RETRY_PREFIXES):
+        return 0
+    return retries
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Seconds to wait before retrying, with full jitter"""
+    delay = random.uniform(0, BACKOFF_BASE * 2 ** attempt)
+    try:
+        return delay + float(retry_after) if retry_after else delay
+    except ValueError:
+        return delay
+
+
+class HealthStatus:
+    """The result of the last health check, reused for ttl seconds"""
+
+    def __init__(self, ttl=HEALTH_TTL):
+        self.ttl = ttl
+        self.healthy = False
+        self.checked_at = None
+
+    def cached(self, max_age=None):
+        """The cached result, or None if there is none younger than max_age"""
+        max_age = self.ttl if max_age is None else max_age
+        if self.checked_at is None or time.monotonic() - self.checked_at > max_age:
+            return None
+        return self.healthy
+
+    def update(self, healthy):
+        self.healthy = healthy
+        self.checked_at = time.monotonic()
+        return healthy
+
+
+def is_healthy(status_code, body):
+    """Whether a /health response says the models are loaded"""
+    return status_code == 200 and body.get("status") == "healthy"
+
+
+class APIClient:
+    """Pooled, keep-alive client for the API"""
+
+    def __init__(self, base_url=API_BASE_URL, timeout=TIMEOUT, retries=RETRIES,
+                 pool_size=POOL_SIZE, health_ttl=HEALTH_TTL):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.health = HealthStatus(health_ttl)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(self, method, path, retries=None, **kwargs):
+        """
+        Send a request, retrying connection failures and 502/503 responses.
+        Admin actions are sent once unless retries is given. Returns the last
+        response; raises the last connection error.
+        """
+        retries = default_retries(method, path, self.retries) if retries is None else retries
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(retries + 1):
+            retry_after = None
+            try:
+                response = self.session.request(method, self.base_url + path, **kwargs)
+                if response.status_code not in RETRY_STATUSES or attempt == retries:
+                    return response
+                retry_after = response.headers.get("Retry-After")
+            except requests.exceptions.ConnectionError:
+                if attempt == retries:
+                    raise
+            time.sleep(backoff_delay(attempt, retry_after))
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, json=None, **kwargs):
+        return self.request("POST", path, json=json, **kwargs)
+
+    def healthy(self, max_age=None):
+        """
+        Whether the backend is up with its models loaded. A result younger
+        than max_age seconds (default: the health TTL) is reused; pass 0 to
+        always check.
+        """
+        cached = self.health.cached(max_age)
+        if cached is not None:
+            return cached
+        try:
+            response = self.get("/health", retries=0, timeout=HEALTH_TIMEOUT)
+            return self.health.update(is_healthy(response.status_code, response.json()))
+        except (requests.exceptions.RequestException, ValueError):
+            return self.health.update(False)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class AsyncAPIClient:
+    """Pooled, keep-alive asyncio client for the API, over httpx"""
+
+    def __init__(self, base_url=API_BASE_URL, timeout=TIMEOUT, retries=RETRIES,
+                 pool_size=POOL_SIZE, health_ttl=HEALTH_TTL):
+        self.retries = retries
+        self.health = HealthStatus(health_ttl)
+        self.client = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    async def request(self, method, path, retries=None, **kwargs):
+        """
+        Send a request, retrying connection failures and 502/503 responses.
+        Admin actions are sent once unless retries is given. Returns the last
+        response; raises the last connection error.
+        """
+        retries = default_retries(method, path, self.retries) if retries is None else retries
+        for attempt in range(retries + 1):
+            retry_after = None
+            try:
+                response = await self.client.request(method, path, **kwargs)
+                if response.status_code not in RETRY_STATUSES or attempt == retries:
+                    return response
+                retry_after = response.headers.get("Retry-After")
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError):
+                if attempt == retries:
+                    raise
+            await asyncio.sleep(backoff_delay(attempt, retry_after))
+
+    async def get(self, path, **kwargs):
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path, json=None, **kwargs):
+        return await self.request("POST", path, json=json, **kwargs)
+
+    async def healthy(self, max_age=None):
+        """Like APIClient.healthy"""
+        cached = self.health.cached(max_age)
+        if cached is not None:
+            return cached
+        try:
+            response = await self.get("/health", retries=0, timeout=HEALTH_TIMEOUT)
+            return self.health.update(is_healthy(response.status_code, response.json()))
+        except (httpx.HTTPError, ValueError):
+            return self.health.update(False)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
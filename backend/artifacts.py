@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+from vector_index import normalize_rows, quantize_rows
+
+SCHEME_VECTORS_FILE = "scheme_vectors.npy"
+SCHEME_CODES_FILE = "scheme_vectors_int8.npy"
+SCHEME_METADATA_FILE = "scheme_metadata.json"
+SCHEME_DELTA_FILE = "scheme_delta.json"
+FORMAT_VERSION = 1
+VECTOR_DTYPES = ("float32", "float16")
+
+
+def _replace_atomically(path, write):
+    """Write to a temporary file then rename it over path"""
+    tmp_path = f"{path}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def has_scheme_artifacts(models_dir):
+    return all(
+        os.path.exists(os.path.join(models_dir, name))
+        for name in (SCHEME_VECTORS_FILE, SCHEME_METADATA_FILE)
+    )
+
+
+def scheme_content_hash(description, encoder):
+    """Hash of what determines a scheme's embedding: its text and the encoder"""
+    return hashlib.sha1(f"{encoder}\0{description}".encode("utf-8")).hexdigest()[:16]
+
+
+def catalogue_digest(scheme_names, content_hashes, attributes=None):
+    """
+    Version of a whole catalogue: every name and content hash, in row
+    order, and the eligibility attribute columns if there are any
+    """
+    digest = hashlib.sha1()
+    for name, content_hash in zip(scheme_names, content_hashes):
+        digest.update(f"{name}\0{content_hash};".encode("utf-8"))
+    for column in sorted(attributes or {}):
+        digest.update(f"{column}\0{json.dumps(attributes[column])};".encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+def save_scheme_artifacts(models_dir, embeddings, scheme_names, descriptions,
+                          dtype="float32", content_hashes=None, encoder=None,
+                          normalized=False, attributes=None, quantize=False):
+    """
+    Write scheme embeddings and metadata in the pickle-free format.
+
+    Embeddings are normalized to unit length and stored as a raw .npy matrix
+    that can be memory-mapped. Metadata is stored column by column in JSON.
+    With content_hashes, the metadata also records each row's hash and a
+    digest of the whole catalogue, which incremental regeneration uses to
+    reuse unchanged vectors. Pass normalized=True for rows that are already
+    unit length, so reused vectors are stored bit for bit. attributes maps
+    eligibility column names to one string per scheme. With quantize=True,
+    int8 codes of the vectors are also written to scheme_vectors_int8.npy,
+    with the per-dimension scales in the metadata, for QuantizedIndex.
+    """
+    if dtype not in VECTOR_DTYPES:
+        raise ValueError(f"Unsupported vector dtype: {dtype}")
+    if not (len(embeddings) == len(scheme_names) == len(descriptions)):
+        raise ValueError("Embeddings and metadata have different lengths")
+    if content_hashes is not None and len(content_hashes) != len(scheme_names):
+        raise ValueError("Content hashes and metadata have different lengths")
+    for column, values in (attributes or {}).items():
+        if len(values) != len(scheme_names):
+            raise ValueError(f"Attribute column {column} and metadata have different lengths")
+
+    os.makedirs(models_dir, exist_ok=True)
+    vectors = np.asarray(embeddings) if normalized else normalize_rows(embeddings)
+    vectors = vectors.astype(dtype, copy=False)
+    metadata = {
+        "format_version": FORMAT_VERSION,
+        "count": int(vectors.shape[0]),
+        "dim": int(vectors.shape[1]),
+        "dtype": dtype,
+        "normalized": True,
+        "columns": {
+            "scheme_name": list(scheme_names),
+            "description": list(descriptions),
+        },
+    }
+    if attributes:
+        metadata["attribute_columns"] = sorted(attributes)
+        metadata["columns"].update({column: list(values) for column, values in attributes.items()})
+    if content_hashes is not None:
+        metadata["encoder"] = encoder
+        metadata["digest"] = catalogue_digest(scheme_names, content_hashes, attributes)
+        metadata["columns"]["content_hash"] = list(content_hashes)
+    codes = None
+    if quantize:
+        codes, scales = quantize_rows(vectors)
+        metadata["quantization"] = {"dtype": "int8", "scales": scales.tolist()}
+
+    def write_vectors(path):
+        with open(path, "wb") as f:
+            np.save(f, vectors)
+
+    def write_codes(path):
+        with open(path, "wb") as f:
+            np.save(f, codes)
+
+    def write_metadata(path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(metadata, f, ensure_ascii=False, separators=(",", ":"))
+
+    codes_path = os.path.join(models_dir, SCHEME_CODES_FILE)
+    _replace_atomically(os.path.join(models_dir, SCHEME_VECTORS_FILE), write_vectors)
+    if codes is not None:
+        _replace_atomically(codes_path, write_codes)
+    _replace_atomically(os.path.join(models_dir, SCHEME_METADATA_FILE), write_metadata)
+    if codes is None and os.path.exists(codes_path):
+        # Codes of an older catalogue; the metadata no longer describes them
+        os.remove(codes_path)
+    return vectors
+
+
+def load_scheme_artifacts(models_dir, mmap=True):
+    """
+    Load normalized scheme vectors and metadata.
+
+    With mmap=True the vectors are a read-only memory map, so every process
+    serving the same file shares its pages through the OS page cache.
+
+    Returns (vectors, metadata) where metadata has the same 'scheme_names'
+    and 'descriptions' lists as the legacy pickle, plus 'content_hashes',
+    'encoder' and 'digest' (None for artifacts written without hashes) and
+    'attributes', the eligibility columns by name (empty if there are none),
+    and 'quantization' (None unless int8 codes were written).
+    """
+    with open(os.path.join(models_dir, SCHEME_METADATA_FILE), encoding="utf-8") as f:
+        metadata = json.load(f)
+    if metadata.get("format_version") != FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported scheme metadata format: {metadata.get('format_version')}"
+        )
+
+    vectors = np.load(
+        os.path.join(models_dir, SCHEME_VECTORS_FILE),
+        mmap_mode="r" if mmap else None,
+        allow_pickle=False,
+    )
+    if vectors.shape != (metadata["count"], metadata["dim"]):
+        raise ValueError(
+            f"Scheme vectors have shape {vectors.shape}, metadata expects "
+            f"({metadata['count']}, {metadata['dim']})"
+        )
+
+    columns = metadata["columns"]
+    return vectors, {
+        "scheme_names": columns["scheme_name"],
+        "descriptions": columns["description"],
+        "content_hashes": columns.get("content_hash"),
+        "encoder": metadata.get("encoder"),
+        "digest": metadata.get("digest"),
+        "attributes": {column: columns[column] for column in metadata.get("attribute_columns", [])},
+        "quantization": metadata.get("quantization"),
+    }
+
+
+def load_scheme_codes(models_dir, metadata, mmap=True):
+    """
+    The int8 codes and per-dimension scales written alongside the vectors,
+    or None if the artifacts have none
+    """
+    quantization = metadata.get("quantization")
+    path = os.path.join(models_dir, SCHEME_CODES_FILE)
+    if quantization is None or not os.path.exists(path):
+        return None
+    codes = np.load(path, mmap_mode="r" if mmap else None, allow_pickle=False)
+    scales = np.asarray(quantization["scales"], dtype=np.float32)
+    if codes.dtype != np.int8 or codes.shape[1] != scales.shape[0]:
+        raise ValueError(f"Scheme codes have shape {codes.shape} and dtype {codes.dtype}, "
+                         f"metadata has {scales.shape[0]} scales")
+    return codes, scales
+
+
+def save_scheme_delta(models_dir, base_digest, digest, added, updated, removed, **details):
+    """
+    Write the manifest of the last incremental update: the catalogue digest
+    it started from and the one it produced, and the scheme names that were
+    added, re-embedded or removed in between.
+    """
+    manifest = {
+        "base_digest": base_digest,
+        "digest": digest,
+        "added": list(added),
+        "updated": list(updated),
+        "removed": list(removed),
+        "created_at": time.time(),
+        **details,
+    }
+
+    def write_manifest(path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    _replace_atomically(os.path.join(models_dir, SCHEME_DELTA_FILE), write_manifest)
+    return manifest
+
+
+def load_scheme_delta(models_dir):
+    """The last incremental update manifest, or None if there is none"""
+    path = os.path.join(models_dir, SCHEME_DELTA_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
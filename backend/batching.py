@@ -0,0 +1,123 @@
+import asyncio
+import time
+
+from executor import ExecutorOverloaded
+from metrics import Histogram
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+QUEUE_WAIT_BUCKETS = [0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25, 0.5, 1.0]
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-item calls into batched calls.
+
+    Each submit() queues one item. The first item of a batch opens a window
+    of max_wait_ms; the batch is flushed when the window closes or when
+    max_batch_size items are waiting, whichever comes first. The batch is
+    passed to batch_fn through run_fn (normally the inference executor) and
+    each caller receives its own row of the result.
+
+    At most max_pending items may wait at once; beyond that submit() raises
+    ExecutorOverloaded.
+    """
+
+    def __init__(self, name, batch_fn, run_fn, max_batch_size=32, max_wait_ms=5.0,
+                 max_pending=1024):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.run_fn = run_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_pending = max_pending
+        self.batch_size = Histogram(
+            f"{name}_batch_size", "Items per flushed batch", BATCH_SIZE_BUCKETS
+        )
+        self.queue_wait = Histogram(
+            f"{name}_queue_wait_seconds", "Time items wait before their batch is flushed",
+            QUEUE_WAIT_BUCKETS
+        )
+        self._pending = []
+        self._wakeup = None
+        self._worker = None
+        self._flushes = set()
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    async def submit(self, item):
+        """Queue one item and wait for its result"""
+        if len(self._pending) >= self.max_pending:
+            raise ExecutorOverloaded(
+                f"{self.name} batch queue full ({len(self._pending)}/{self.max_pending})"
+            )
+
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done():
+            self._wakeup = asyncio.Event()
+            self._worker = loop.create_task(self._collect())
+
+        future = loop.create_future()
+        self._pending.append((item, future, time.perf_counter()))
+        self._wakeup.set()
+        return await future
+
+    async def _collect(self):
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+
+            # The window starts when the oldest waiting item arrived
+            deadline = self._pending[0][2] + self.max_wait
+            while len(self._pending) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+
+            # Flushes run concurrently; the executor bounds how many encode at once
+            task = asyncio.get_running_loop().create_task(self._flush(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch):
+        # Callers that already gave up (timeout, disconnect) are dropped
+        batch = [entry for entry in batch if not entry[1].done()]
+        if not batch:
+            return
+
+        now = time.perf_counter()
+        for _, _, enqueued in batch:
+            self.queue_wait.observe(now - enqueued)
+        self.batch_size.observe(len(batch))
+
+        try:
+            results = await self.run_fn(self.batch_fn, [item for item, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self):
+        """Batch configuration, queue depth and histograms"""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "pending": self.pending,
+            "batch_size": self.batch_size.snapshot(),
+            "queue_wait_seconds": self.queue_wait.snapshot(),
+        }
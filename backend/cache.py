@@ -0,0 +1,153 @@
+import re
+import sys
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+from pydantic import BaseModel
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_description(text):
+    """
+    Canonical form of a description used as a cache key.
+
+    Both models are case-insensitive and ignore runs of whitespace, so
+    descriptions that differ only in those respects get the same key.
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def estimate_size(value):
+    """Approximate memory held by a cached value, in bytes"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes + 112
+    if isinstance(value, BaseModel):
+        return sys.getsizeof(value) + sum(
+            estimate_size(v) for v in value.__dict__.values()
+        )
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_size(k) + estimate_size(v) for k, v in value.items()
+        )
+    return sys.getsizeof(value)
+
+
+class TTLCache:
+    """
+    A thread-safe LRU cache with per-entry expiry and a memory cap.
+
+    Entries are evicted least-recently-used first when either max_entries or
+    max_bytes would be exceeded, and are dropped on access once older than
+    ttl_seconds.
+
+    clear() starts a new generation. A value computed from models that were
+    current before the clear is stale, so set() ignores it when called with
+    the generation read before the computation started.
+    """
+
+    def __init__(self, name, max_entries=10000, ttl_seconds=3600.0, max_bytes=64 * 2**20):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.max_bytes = max_bytes
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at, size = entry
+            if expires_at < time.monotonic():
+                self._remove(key, size)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key):
+        """Return the cached value for key without counting a lookup or refreshing it"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                return None
+            return entry[0]
+
+    def set(self, key, value, generation=None):
+        """Store value under key unless it was computed for an older generation"""
+        size = estimate_size(value)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            if size > self.max_bytes:
+                return
+            if key in self._entries:
+                self._remove(key, self._entries[key][2])
+            self._entries[key] = (value, time.monotonic() + self.ttl, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest_key, (_, _, oldest_size) = next(iter(self._entries.items()))
+                self._remove(oldest_key, oldest_size)
+                self.evictions += 1
+
+    def _remove(self, key, size):
+        del self._entries[key]
+        self._bytes -= size
+
+    def clear(self):
+        """Drop every entry and start a new generation"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.generation += 1
+
+    def refresh(self, update):
+        """
+        Start a new generation, keeping only the entries that are still valid.
+
+        update(key, value) returns the value to keep under key, or None to
+        drop the entry. Expiry times are unchanged.
+        """
+        with self._lock:
+            self.generation += 1
+            for key, (value, expires_at, size) in list(self._entries.items()):
+                new_value = update(key, value)
+                if new_value is None:
+                    self._remove(key, size)
+                else:
+                    self._entries[key] = (new_value, expires_at, size)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "generation": self.generation,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
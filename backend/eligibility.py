@@ -0,0 +1,119 @@
+import numpy as np
+
+from nic_hierarchy import nic_section
+
+# Scheme eligibility columns of govt_schemes.csv. Each cell is a
+# ';'-separated list of values, or empty / "all" when the scheme is open to
+# every value:
+#   states            state or union territory names
+#   sectors           NIC 2008 section letters (e.g. "A") or 2-digit divisions
+#   enterprise_sizes  micro, small, medium
+#   categories        the groups a scheme is reserved for (any one suffices)
+ELIGIBILITY_COLUMNS = ("states", "sectors", "enterprise_sizes", "categories")
+ENTERPRISE_SIZES = ("micro", "small", "medium")
+CATEGORIES = ("sc_st", "women", "rural", "farmer", "exporter", "startup")
+ANY_VALUE = "all"
+
+
+def parse_values(cell):
+    """Normalized values of an eligibility cell; () when it is unrestricted"""
+    if cell is None or (isinstance(cell, float) and np.isnan(cell)):
+        return ()
+    values = tuple(sorted({v.strip().casefold() for v in str(cell).split(";") if v.strip()}))
+    return () if ANY_VALUE in values else values
+
+
+def normalize_attributes(columns):
+    """Eligibility columns as ';'-joined normalized values, for scheme metadata"""
+    return {name: [";".join(parse_values(cell)) for cell in columns[name]]
+            for name in ELIGIBILITY_COLUMNS if name in columns}
+
+
+def filters_key(state=None, nic_code=None, enterprise_size=None, categories=()):
+    """
+    Hashable form of a set of eligibility filters, None when there are none.
+    Only the division of nic_code matters.
+    """
+    key = (
+        state.strip().casefold() if state else None,
+        nic_code[:2] if nic_code else None,
+        enterprise_size,
+        tuple(sorted(set(categories or ()))),
+    )
+    return None if key == (None, None, None, ()) else key
+
+
+class EligibilityIndex:
+    """
+    Boolean masks over the scheme catalogue, one per attribute value.
+
+    For every value of every eligibility column, the mask of schemes that
+    are open to it (the scheme lists the value, or is unrestricted in that
+    column) is computed once at load time. Filtering is then a few
+    vectorized ANDs and ORs, done before any scoring.
+    """
+
+    def __init__(self, count, unrestricted, listed):
+        self.count = count
+        # column -> mask of schemes that accept every value
+        self.unrestricted = unrestricted
+        # column -> value -> mask of schemes open to that value
+        self.listed = listed
+
+    @classmethod
+    def build(cls, attributes, count):
+        """From metadata columns of ';'-joined values; missing columns accept everything"""
+        unrestricted, listed = {}, {}
+        for column in ELIGIBILITY_COLUMNS:
+            cells = attributes.get(column) if attributes else None
+            if cells is None:
+                continue
+            values = [parse_values(cell) for cell in cells]
+            unrestricted[column] = np.array([not v for v in values], dtype=bool)
+            masks = {}
+            for row, row_values in enumerate(values):
+                for value in row_values:
+                    masks.setdefault(value, np.zeros(count, dtype=bool))[row] = True
+            listed[column] = {value: mask | unrestricted[column] for value, mask in masks.items()}
+        return cls(count, unrestricted, listed)
+
+    def _open_to(self, column, values):
+        """Mask of schemes open to any of values in column, None if the column is not indexed"""
+        if column not in self.unrestricted:
+            return None
+        mask = self.unrestricted[column]
+        for value in values:
+            if value in self.listed[column]:
+                mask = mask | self.listed[column][value]
+        return mask
+
+    def mask(self, key):
+        """
+        Mask of the schemes eligible under a filters_key(), or None when
+        every scheme is
+        """
+        if key is None:
+            return None
+        state, division, enterprise_size, categories = key
+        conditions = []
+        if state:
+            conditions.append(("states", [state]))
+        if division:
+            sectors = [division]
+            section = nic_section(division)
+            if section:
+                sectors.append(section.casefold())
+            conditions.append(("sectors", sectors))
+        if enterprise_size:
+            conditions.append(("enterprise_sizes", [enterprise_size]))
+        if categories:
+            conditions.append(("categories", categories))
+
+        mask = None
+        for column, values in conditions:
+            column_mask = self._open_to(column, values)
+            if column_mask is not None:
+                mask = column_mask if mask is None else mask & column_mask
+        if mask is None or mask.all():
+            return None
+        return mask
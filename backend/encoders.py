@@ -0,0 +1,145 @@
+import json
+import os
+from contextlib import nullcontext
+
+import numpy as np
+
+SENTENCE_MODEL_NAME = "all-MiniLM-L6-v2"
+ONNX_MODEL_DIR = "models/encoder_onnx"
+ONNX_MODEL_FILE = "model_int8.onnx"
+ONNX_CONFIG_FILE = "encoder_config.json"
+ENCODER_BACKENDS = ("torch", "onnx")
+
+
+class Encoder:
+    """Base class; timer is an optional metrics.StageTimer"""
+
+    name = None
+
+    def __init__(self, timer=None):
+        self.timer = timer
+
+    def stage(self, name):
+        return self.timer.time(name) if self.timer is not None else nullcontext()
+
+
+class TorchEncoder(Encoder):
+    """
+    The sentence-transformers model running on PyTorch.
+
+    SentenceTransformer.encode tokenizes internally, so tokenization is
+    timed as part of the encode stage.
+    """
+
+    name = "torch"
+
+    def __init__(self, model_name=SENTENCE_MODEL_NAME, timer=None):
+        from sentence_transformers import SentenceTransformer
+        super().__init__(timer)
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, texts, batch_size=32):
+        with self.stage("schemes.encode"):
+            return self.model.encode(texts, batch_size=batch_size)
+
+
+class OnnxEncoder(Encoder):
+    """
+    The same encoder exported to ONNX by utils/export_onnx_encoder.py.
+
+    Reproduces the sentence-transformers pipeline (tokenize, transformer,
+    mean pooling over the attention mask, optional L2 normalization) with
+    the fast tokenizer and ONNX Runtime, without importing torch. The model
+    file is usually the int8 dynamically quantized export.
+    """
+
+    name = "onnx"
+
+    def __init__(self, model_dir=ONNX_MODEL_DIR, model_file=None, timer=None):
+        import onnxruntime
+        from tokenizers import Tokenizer
+        super().__init__(timer)
+
+        with open(os.path.join(model_dir, ONNX_CONFIG_FILE)) as f:
+            self.config = json.load(f)
+        self.model_path = os.path.join(model_dir, model_file or self.config["model_file"])
+        if not os.path.exists(self.model_path):
+            raise FileNotFoundError(self.model_path)
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.config["max_seq_length"])
+        self.tokenizer.enable_padding(
+            pad_id=self.config["pad_token_id"], pad_token=self.config["pad_token"]
+        )
+        self._onnxruntime = onnxruntime
+        self._session = None
+        self._session_pid = None
+
+    @property
+    def session(self):
+        # ONNX Runtime thread pools do not survive fork(), so each process
+        # (for example each pre-fork worker) creates its own session
+        if self._session is None or self._session_pid != os.getpid():
+            options = self._onnxruntime.SessionOptions()
+            threads = int(os.getenv("OMP_NUM_THREADS", "0"))
+            if threads > 0:
+                options.intra_op_num_threads = threads
+            self._session = self._onnxruntime.InferenceSession(
+                self.model_path, options, providers=["CPUExecutionProvider"]
+            )
+            self._input_names = {i.name for i in self._session.get_inputs()}
+            self._session_pid = os.getpid()
+        return self._session
+
+    def _encode_batch(self, texts):
+        with self.stage("schemes.tokenize"):
+            encodings = self.tokenizer.encode_batch(texts)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            inputs = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": attention_mask,
+                "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+            }
+
+        with self.stage("schemes.encode"):
+            session = self.session
+            inputs = {k: v for k, v in inputs.items() if k in self._input_names}
+            token_embeddings = session.run(None, inputs)[0]
+
+            mask = attention_mask[:, :, None].astype(np.float32)
+            embeddings = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if self.config.get("normalize", True):
+                norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+                embeddings = embeddings / np.clip(norms, 1e-12, None)
+            return embeddings.astype(np.float32)
+
+    def encode(self, texts, batch_size=32):
+        if isinstance(texts, str):
+            return self._encode_batch([texts])[0]
+        # Sort by length so each batch is padded as little as possible
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        embeddings = np.empty((len(texts), self.config["dimension"]), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            batch = order[start:start + batch_size]
+            embeddings[batch] = self._encode_batch([texts[i] for i in batch])
+        return embeddings
+
+
+def load_encoder(backend=None, timer=None):
+    """
+    Create the query encoder selected by GOVBIZ_ENCODER_BACKEND.
+
+    The ONNX backend falls back to the PyTorch model if onnxruntime is not
+    installed or the exported model is missing.
+    """
+    backend = backend or os.getenv("GOVBIZ_ENCODER_BACKEND", "torch")
+    if backend not in ENCODER_BACKENDS:
+        raise ValueError(f"Unknown encoder backend {backend!r}; expected one of {ENCODER_BACKENDS}")
+
+    if backend == "onnx":
+        try:
+            return OnnxEncoder(timer=timer)
+        except (ImportError, OSError) as e:
+            print(f"ONNX encoder unavailable ({e}); falling back to PyTorch. "
+                  f"Export it with utils/export_onnx_encoder.py")
+    return TorchEncoder(timer=timer)
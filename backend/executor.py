@@ -0,0 +1,120 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class ExecutorOverloaded(Exception):
+    """Raised when the inference queue is full and a call is rejected"""
+
+
+class InferenceTimeout(Exception):
+    """Raised when an inference call does not finish within its timeout"""
+
+
+class InferenceExecutor:
+    """
+    Runs blocking model inference off the asyncio event loop.
+
+    Work is submitted to a thread pool (default) or a process pool. At most
+    max_workers calls run at once and at most max_queue more may wait; any
+    call beyond that is rejected immediately with ExecutorOverloaded so that
+    callers can shed load instead of piling up latency.
+
+    A call that exceeds its timeout raises InferenceTimeout. The underlying
+    work cannot be interrupted, so it keeps its slot until it really
+    finishes; this keeps the queue bound honest under slow inference.
+    """
+
+    def __init__(self, kind="thread", max_workers=4, max_queue=32, timeout=10.0,
+                 initializer=None):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.initializer = initializer
+        self.pending = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._pool = None
+
+    @property
+    def capacity(self):
+        """Maximum number of calls that may be running or queued"""
+        return self.max_workers + self.max_queue
+
+    @property
+    def queued(self):
+        """Number of accepted calls still waiting for a worker"""
+        return max(0, self.pending - self.max_workers)
+
+    def _get_pool(self):
+        # Created lazily so that pools are never inherited across fork()
+        if self._pool is None:
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers, initializer=self.initializer
+                )
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="inference"
+                )
+        return self._pool
+
+    def _release(self, _future):
+        self.pending -= 1
+
+    async def run(self, fn, *args, timeout=None):
+        """Run fn(*args) in the pool and return its result"""
+        if self.pending >= self.capacity:
+            self.rejected += 1
+            raise ExecutorOverloaded(
+                f"Inference queue full ({self.pending}/{self.capacity})"
+            )
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._get_pool(), functools.partial(fn, *args))
+        self.pending += 1
+        future.add_done_callback(self._release)
+
+        try:
+            # shield() keeps a timed-out call counted until the worker is done
+            return await asyncio.wait_for(
+                asyncio.shield(future), timeout or self.timeout
+            )
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise InferenceTimeout(
+                f"Inference did not finish within {timeout or self.timeout:.1f}s"
+            )
+
+    def stats(self):
+        """Current queue state and rejection counters"""
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "pending": self.pending,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+def executor_from_env(initializer=None):
+    """Build an InferenceExecutor configured from GOVBIZ_* environment variables"""
+    kind = os.getenv("GOVBIZ_EXECUTOR", "thread")
+    return InferenceExecutor(
+        kind=kind,
+        max_workers=int(os.getenv("GOVBIZ_EXECUTOR_WORKERS", "4")),
+        max_queue=int(os.getenv("GOVBIZ_EXECUTOR_QUEUE", "32")),
+        timeout=float(os.getenv("GOVBIZ_INFERENCE_TIMEOUT", "10")),
+        initializer=initializer if kind == "process" else None,
+    )
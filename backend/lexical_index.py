@@ -0,0 +1,247 @@
+import math
+import re
+from functools import lru_cache
+
+import numpy as np
+
+from vector_index import normalize_rows, top_k
+
+SCHEME_BM25_FILE = "scheme_bm25.npz"
+
+# Reciprocal rank fusion constant: 60 is the value from the original paper,
+# and damps the difference between the very first ranks
+RRF_K = 60
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+# Plurals the suffix rules below do not cover
+_IRREGULAR = {"women": "woman", "men": "man"}
+
+
+@lru_cache(maxsize=1)
+def stop_words():
+    # Imported on first use: sklearn takes over a second to import, which
+    # would otherwise delay the API's start
+    from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+    return ENGLISH_STOP_WORDS
+
+
+def tokenize(text):
+    """
+    Lowercase alphanumeric terms of a text, without English stop words and
+    with plural endings removed, so "SC/ST" gives "sc", "st" and "loans"
+    matches "loan"
+    """
+    terms = []
+    excluded = stop_words()
+    for term in _TOKEN.findall(text.lower()):
+        if term in excluded:
+            continue
+        term = _IRREGULAR.get(term, term)
+        if len(term) > 4 and term.endswith("ies"):
+            term = term[:-3] + "y"
+        elif term.endswith("sses"):
+            term = term[:-2]
+        elif len(term) > 3 and term.endswith("s") and not term.endswith(("ss", "us", "is")):
+            term = term[:-1]
+        terms.append(term)
+    return terms
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed set of documents, as an inverted index.
+
+    Each term's posting list stores the documents that contain it with the
+    term's full BM25 weight in that document, so scoring a query only sums
+    the postings of its terms: documents without any query term are never
+    touched.
+    """
+
+    kind = "bm25"
+
+    def __init__(self, terms, term_offsets, doc_ids, weights, count):
+        self.terms = terms
+        self.term_offsets = term_offsets
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.count = count
+        self.term_ids = {term: i for i, term in enumerate(terms.tolist())}
+
+    def __len__(self):
+        return self.count
+
+    @classmethod
+    def build(cls, documents, k1=1.2, b=0.75):
+        """Index a list of texts; document ids are their positions"""
+        postings = {}
+        lengths = np.zeros(len(documents), dtype=np.float64)
+        for doc_id, text in enumerate(documents):
+            terms = tokenize(text)
+            lengths[doc_id] = len(terms)
+            for term in terms:
+                counts = postings.setdefault(term, {})
+                counts[doc_id] = counts.get(doc_id, 0) + 1
+
+        average_length = lengths.mean() if len(documents) and lengths.mean() > 0 else 1.0
+        terms = sorted(postings)
+        term_offsets = [0]
+        doc_ids, weights = [], []
+        for term in terms:
+            counts = postings[term]
+            idf = math.log(1 + (len(documents) - len(counts) + 0.5) / (len(counts) + 0.5))
+            for doc_id in sorted(counts):
+                tf = counts[doc_id]
+                norm = k1 * (1 - b + b * lengths[doc_id] / average_length)
+                doc_ids.append(doc_id)
+                weights.append(idf * tf * (k1 + 1) / (tf + norm))
+            term_offsets.append(len(doc_ids))
+
+        return cls(
+            np.array(terms, dtype=str),
+            np.array(term_offsets, dtype=np.int64),
+            np.array(doc_ids, dtype=np.int64),
+            np.array(weights, dtype=np.float32),
+            len(documents),
+        )
+
+    def search(self, query_texts, k, mask=None):
+        """
+        Return (scores, ids) arrays of shape (n_queries, k), best first.
+        Only documents that share a term with the query, and are selected
+        by the boolean mask if there is one, are returned; the remaining
+        slots have id -1.
+        """
+        all_scores = np.full((len(query_texts), k), -np.inf, dtype=np.float32)
+        all_ids = np.full((len(query_texts), k), -1, dtype=np.int64)
+        for row, text in enumerate(query_texts):
+            term_ids = {self.term_ids[t] for t in tokenize(text) if t in self.term_ids}
+            if not term_ids:
+                continue
+            spans = [slice(self.term_offsets[t], self.term_offsets[t + 1]) for t in sorted(term_ids)]
+            doc_ids = np.concatenate([self.doc_ids[span] for span in spans])
+            weights = np.concatenate([self.weights[span] for span in spans])
+            if len(doc_ids) * 8 > self.count:
+                # Long posting lists: accumulating into one slot per document
+                # is cheaper than sorting the postings
+                candidates = np.arange(self.count)
+                scores = np.bincount(doc_ids, weights=weights, minlength=self.count)
+            else:
+                candidates, positions = np.unique(doc_ids, return_inverse=True)
+                scores = np.bincount(positions, weights=weights)
+            if mask is not None:
+                scores[~mask[candidates]] = 0
+            found_scores, found = top_k(scores.astype(np.float32)[None, :], k)
+            matched = found_scores[0] > 0
+            found_scores, found = found_scores[0][matched], found[0][matched]
+            all_scores[row, :found.size] = found_scores
+            all_ids[row, :found.size] = candidates[found]
+        return all_scores, all_ids
+
+    def save(self, path, digest=None):
+        """Persist the index to an .npz file, with the catalogue digest it was built from"""
+        np.savez(
+            path,
+            kind=np.array(self.kind),
+            terms=self.terms,
+            term_offsets=self.term_offsets,
+            doc_ids=self.doc_ids,
+            weights=self.weights,
+            count=np.array(self.count),
+            digest=np.array(digest or ""),
+        )
+
+    @classmethod
+    def load(cls, path, count, digest=None):
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["count"]) != count:
+                raise ValueError(
+                    f"BM25 index covers {int(data['count'])} documents, catalogue has {count}"
+                )
+            if digest and str(data["digest"]) and str(data["digest"]) != digest:
+                raise ValueError(
+                    f"BM25 index was built for catalogue {data['digest']}, not {digest}"
+                )
+            return cls(data["terms"], data["term_offsets"], data["doc_ids"],
+                       data["weights"], count)
+
+
+def reciprocal_rank_fusion(rankings, rrf_k=RRF_K):
+    """
+    (ids, fused scores) of every id in a list of rankings (best first, -1
+    for an empty slot), best first. An id's score is the sum of
+    1 / (rrf_k + rank) over the rankings it is in; ties go to the lower id.
+    """
+    ids = np.concatenate([np.asarray(ranking, dtype=np.int64) for ranking in rankings])
+    ranks = np.concatenate([np.arange(1, len(ranking) + 1) for ranking in rankings])
+    found = ids >= 0
+    unique, inverse = np.unique(ids[found], return_inverse=True)
+    scores = np.bincount(inverse, weights=1.0 / (rrf_k + ranks[found]), minlength=len(unique))
+    order = np.lexsort((unique, -scores))
+    return unique[order], scores[order]
+
+
+class HybridIndex:
+    """
+    Dense and BM25 retrieval fused with reciprocal rank fusion.
+
+    Each retriever returns its best `candidates` schemes (k if it is more),
+    and the union is ranked by fused score, so a scheme that matches a
+    query's exact terms ("SC/ST", "MUDRA") is found even when its embedding
+    is not among the closest. The dense candidates come from `ann`, an
+    approximate index such as IVFIndex, if there is one, so the query is not
+    scored against the whole catalogue; otherwise from the dense index.
+
+    Searches for up to `candidates` schemes fuse the same candidates, so
+    each returns a prefix of one ranking. Deeper searches fuse more
+    candidates, and their ranking may differ from the shallow one.
+    """
+
+    kind = "hybrid"
+
+    def __init__(self, dense, lexical, candidates=50, rrf_k=RRF_K, ann=None):
+        self.dense = dense
+        self.lexical = lexical
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+        self.ann = ann
+
+    def __len__(self):
+        return len(self.dense)
+
+    @property
+    def vectors(self):
+        return self.dense.vectors
+
+    def search(self, queries, k, query_texts=None, mask=None):
+        """
+        Return (fused scores, ids) arrays of shape (n_queries, k), best
+        first, among the rows selected by mask if there is one. Without
+        query_texts this is a plain dense search, scored by similarity.
+        """
+        if query_texts is None:
+            return self.dense.search(queries, k, mask=mask)
+        retriever = self.ann if self.ann is not None else self.dense
+        candidates = max(self.candidates, k)
+        _, dense_ids = retriever.search(queries, candidates, mask=mask)
+        _, lexical_ids = self.lexical.search(query_texts, candidates, mask=mask)
+
+        all_scores = np.full((len(dense_ids), k), -np.inf, dtype=np.float32)
+        all_ids = np.full((len(dense_ids), k), -1, dtype=np.int64)
+        for row in range(len(dense_ids)):
+            # Ties go to the lower row, like the dense index
+            ids, scores = reciprocal_rank_fusion([dense_ids[row], lexical_ids[row]], self.rrf_k)
+            all_ids[row, :len(ids[:k])] = ids[:k]
+            all_scores[row, :len(ids[:k])] = scores[:k]
+        return all_scores, all_ids
+
+    def similarities(self, queries, ids):
+        """
+        Cosine similarity of each query to the schemes in its row of ids
+        (-1 for an empty slot), computed for those rows alone
+        """
+        queries = normalize_rows(queries)
+        similarities = np.full(ids.shape, -np.inf, dtype=np.float32)
+        for row, query in enumerate(queries):
+            found = ids[row] >= 0
+            similarities[row, found] = np.asarray(self.vectors[ids[row, found]], dtype=np.float32) @ query
+        return similarities
@@ -1,10 +1,40 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-import pickle
+import time
+# Import time of the API and its dependencies, reported by /health
+IMPORT_STARTED = time.perf_counter()
+from fastapi import FastAPI, Header, HTTPException, Path
+from fastapi.responses import (JSONResponse, ORJSONResponse, PlainTextResponse, Response,
+                               StreamingResponse)
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
+import asyncio
+import csv
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+import orjson
+import pickle
 import os
+import threading
+from contextlib import contextmanager
+from functools import partial
+from executor import ExecutorOverloaded, InferenceTimeout, executor_from_env
+from batching import MicroBatcher
+from cache import TTLCache, normalize_description
+from vector_index import ExactIndex, IVFIndex, QuantizedIndex, INDEX_TYPES, normalize_rows
+from artifacts import (has_scheme_artifacts, load_scheme_artifacts, load_scheme_codes,
+                       load_scheme_delta)
+from lexical_index import SCHEME_BM25_FILE, BM25Index, HybridIndex
+from eligibility import CATEGORIES, ENTERPRISE_SIZES, EligibilityIndex, filters_key
+from registry import ModelBundle, ModelRegistry
+from encoders import load_encoder
+from nic_inference import NICScorer, load_calibration
+from nic_hierarchy import NIC_HIERARCHY_FILE, code_path, marginal_probabilities
+from nic_scheme_map import (NIC_SCHEME_MAP_FILE, NICSchemeMap, rank_schemes_for_codes,
+                            scheme_catalogue_version)
+from metrics import MetricsMiddleware, PrometheusText, RequestMetrics, StageTimer, process_rss_bytes
+from profiler import profiler_from_env
+from startup import StagedLoader
+from singleflight import SingleFlight
+
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED
 
 app = FastAPI(
     title="GovBizConnect API",
@@ -12,57 +42,790 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Schemes returned by default, and the deepest page /get_schemes serves
+TOP_K_SCHEMES = 5
+MAX_SCHEMES = int(os.getenv("GOVBIZ_MAX_SCHEMES", "1000"))
+# NDJSON lines sent per chunk when /get_schemes streams
+STREAM_CHUNK_LINES = 64
+
 # Pydantic models for request/response
 class BusinessDescription(BaseModel):
     description: str
 
+class SchemeFilters(BaseModel):
+    """Eligibility filters; a scheme is returned only if it is open to every one given"""
+    state: Optional[str] = None
+    # NIC division, or any longer NIC code whose division is used
+    nic_code: Optional[str] = Field(None, pattern=r"^\d{2,5}$")
+    enterprise_size: Optional[Literal[ENTERPRISE_SIZES]] = None
+    # Groups the business belongs to; schemes reserved for other groups are excluded
+    categories: list[Literal[CATEGORIES]] = []
+
+    def key(self):
+        return filters_key(self.state, self.nic_code, self.enterprise_size, self.categories)
+
+class SchemeRequest(BusinessDescription):
+    filters: Optional[SchemeFilters] = None
+
+class SchemePageRequest(SchemeRequest):
+    # Schemes per page, and how many of the best to skip
+    k: int = Field(TOP_K_SCHEMES, ge=1)
+    offset: int = Field(0, ge=0)
+
+class NICCandidate(BaseModel):
+    nic_code: str
+    probability: float
+
 class NICResponse(BaseModel):
     nic_code: str
     confidence: float
+    candidates: list[NICCandidate]
+    # False if the probabilities are a softmax at temperature 1.0
+    calibrated: bool
+    model_version: str
+
+class NICLevel(BaseModel):
+    level: str
+    code: Optional[str]
+    confidence: float
+
+class NICPathResponse(BaseModel):
+    nic_code: str
+    confidence: float
+    path: list[NICLevel]
+    candidates: list[NICCandidate]
+    model: str
+    calibrated: bool
+    model_version: str
 
 class SchemeResponse(BaseModel):
     name: str
     description: str
     similarity: float
+    # Schemes are listed by descending score: the similarity with dense
+    # retrieval, the reciprocal rank fusion score with hybrid retrieval
+    score: float
 
 class SchemesResponse(BaseModel):
     schemes: list[SchemeResponse]
+    offset: int = 0
+    # Offset of the next page, or None if this page is the last
+    next_offset: Optional[int] = None
+    model_version: str
 
-# Global variables for loaded models
-nic_classifier = None
-scheme_embeddings = None
-scheme_metadata = None
-sentence_model = None
+class NICSchemesResponse(BaseModel):
+    nic_code: str
+    schemes: list[SchemeResponse]
+    model_version: str
 
-def load_models():
-    """Load all trained models and data"""
-    global nic_classifier, scheme_embeddings, scheme_metadata, sentence_model
-    
-    try:
-        # Load NIC classifier
-        with open("models/nic_classifier.pkl", "rb") as f:
-            nic_classifier = pickle.load(f)
-        
-        # Load scheme embeddings and metadata
+class AnalyzeResponse(BaseModel):
+    nic_code: str
+    confidence: float
+    nic_candidates: list[NICCandidate]
+    calibrated: bool
+    schemes: list[SchemeResponse]
+    model_version: str
+
+class BusinessDescriptionBatch(BaseModel):
+    descriptions: list[str]
+
+class SchemesBatchRequest(BusinessDescriptionBatch):
+    filters: Optional[SchemeFilters] = None
+
+class NICBatchItem(BaseModel):
+    nic_code: Optional[str] = None
+    confidence: Optional[float] = None
+    candidates: Optional[list[NICCandidate]] = None
+    error: Optional[str] = None
+
+class NICBatchResponse(BaseModel):
+    results: list[NICBatchItem]
+    calibrated: bool
+    model_version: str
+
+class SchemesBatchItem(BaseModel):
+    schemes: list[SchemeResponse] = []
+    error: Optional[str] = None
+
+class SchemesBatchResponse(BaseModel):
+    results: list[SchemesBatchItem]
+    model_version: str
+
+# Batch limits
+MAX_BATCH_SIZE = int(os.getenv("GOVBIZ_MAX_BATCH_SIZE", "1000"))
+BATCH_TIMEOUT = float(os.getenv("GOVBIZ_BATCH_TIMEOUT", "120"))
+
+# Micro-batching of single-query encodes
+ENCODE_BATCH_WINDOW_MS = float(os.getenv("GOVBIZ_ENCODE_BATCH_WINDOW_MS", "5"))
+ENCODE_BATCH_MAX_SIZE = int(os.getenv("GOVBIZ_ENCODE_BATCH_MAX_SIZE", "32"))
+ENCODE_BATCH_MAX_PENDING = int(os.getenv("GOVBIZ_ENCODE_BATCH_MAX_PENDING", "1024"))
+
+# NIC codes returned per description, with probabilities calibrated if
+# models/nic_calibration.json exists, otherwise a softmax at temperature 1.0
+NIC_TOP_K = int(os.getenv("GOVBIZ_NIC_TOP_K", "5"))
+
+# NIC model behind /get_nic: "flat" or "hierarchical" (built by train_nic_hierarchy.py)
+NIC_MODEL = os.getenv("GOVBIZ_NIC_MODEL", "flat")
+
+# Scheme retrieval index: "exact", "ivf" (approximate, built by generate_scheme_embeddings.py)
+# or "int8" (exact search over int8 codes, written by generate_scheme_embeddings.py
+# --quantize, with the top GOVBIZ_RERANK_CANDIDATES re-scored in full precision)
+VECTOR_INDEX = os.getenv("GOVBIZ_VECTOR_INDEX", "exact")
+IVF_N_PROBE = int(os.getenv("GOVBIZ_IVF_N_PROBE", "8"))
+# At least this many are re-ranked; deeper searches re-rank as many as they return
+RERANK_CANDIDATES = int(os.getenv("GOVBIZ_RERANK_CANDIDATES", "50"))
+SCHEME_IVF_INDEX_PATH = "models/scheme_index_ivf.npz"
+
+# Scheme ranking: "hybrid" fuses the vector index with a BM25 keyword index
+# (built by generate_scheme_embeddings.py), "dense" uses the vector index alone
+SCHEME_RETRIEVAL = os.getenv("GOVBIZ_SCHEME_RETRIEVAL", "hybrid")
+HYBRID_CANDIDATES = int(os.getenv("GOVBIZ_HYBRID_CANDIDATES", "50"))
+# Searches run at their depth rounded up to a multiple of this, and the
+# hybrid and int8 candidates grow with it: every page within one bucket is
+# cut from the same ranking, and shallow searches stay at the configured counts
+SCHEME_DEPTH_BUCKET = int(os.getenv("GOVBIZ_SCHEME_DEPTH_BUCKET", "50"))
+
+# Hot reload: poll models/ every N seconds (0 disables), and protect /admin
+MODELS_DIR = "models"
+NIC_ARTIFACTS = ["nic_classifier.pkl", "nic_calibration.json", NIC_HIERARCHY_FILE]
+# Load models in the background at startup, so the API is live at once and
+# each endpoint serves as soon as the models it needs are ready
+LAZY_LOAD = os.getenv("GOVBIZ_LAZY_LOAD", "1") == "1"
+MODEL_WATCH_SECONDS = float(os.getenv("GOVBIZ_MODEL_WATCH_SECONDS", "0"))
+ADMIN_TOKEN = os.getenv("GOVBIZ_ADMIN_TOKEN")
+WARMUP_DESCRIPTIONS = [
+    "Software development and mobile app creation",
+    "Small food processing unit seeking a micro enterprise loan",
+]
+
+# Query and result caches, keyed on normalized description text
+CACHE_MAX_ENTRIES = int(os.getenv("GOVBIZ_CACHE_MAX_ENTRIES", "10000"))
+CACHE_TTL_SECONDS = float(os.getenv("GOVBIZ_CACHE_TTL_SECONDS", "3600"))
+CACHE_MAX_MB = float(os.getenv("GOVBIZ_CACHE_MAX_MB", "64"))
+
+def make_cache(name):
+    return TTLCache(
+        name,
+        max_entries=CACHE_MAX_ENTRIES,
+        ttl_seconds=CACHE_TTL_SECONDS,
+        max_bytes=int(CACHE_MAX_MB * 2**20),
+    )
+
+embedding_cache = make_cache("embedding")
+nic_cache = make_cache("nic")
+schemes_cache = make_cache("schemes")
+caches = [embedding_cache, nic_cache, schemes_cache]
+
+# Concurrent requests for the same normalized description (and model
+# version and filters) share one in-progress encode, classification or
+# scheme search instead of each running its own
+SINGLE_FLIGHT = os.getenv("GOVBIZ_SINGLE_FLIGHT", "1") == "1"
+encode_flights = SingleFlight("encode", enabled=SINGLE_FLIGHT)
+nic_flights = SingleFlight("nic", enabled=SINGLE_FLIGHT)
+schemes_flights = SingleFlight("schemes", enabled=SINGLE_FLIGHT)
+flights = [encode_flights, nic_flights, schemes_flights]
+
+# Time spent in each stage of /get_nic and /get_schemes (thread executor only;
+# stages that run in process pool workers are recorded in those processes)
+stage_timer = StageTimer()
+
+# Per-route request metrics, and a profiler for slow requests if
+# GOVBIZ_PROFILE_SLOW_MS is set
+request_metrics = RequestMetrics()
+slow_request_profiler = profiler_from_env()
+app.add_middleware(MetricsMiddleware, request_metrics=request_metrics,
+                   profiler=slow_request_profiler)
+
+def load_ivf_index(vectors):
+    """The IVF index over the scheme vectors, or None if it was not built"""
+    if not os.path.exists(SCHEME_IVF_INDEX_PATH):
+        return None
+    return IVFIndex.load(SCHEME_IVF_INDEX_PATH, vectors, n_probe=IVF_N_PROBE)
+
+def load_vector_index(vectors, scheme_metadata):
+    """Build the configured vector index over normalized scheme vectors"""
+    if VECTOR_INDEX not in INDEX_TYPES:
+        raise ValueError(f"Unknown GOVBIZ_VECTOR_INDEX: {VECTOR_INDEX}")
+    if VECTOR_INDEX == IVFIndex.kind:
+        ivf_index = load_ivf_index(vectors)
+        if ivf_index is not None:
+            return ivf_index
+        print(f"{SCHEME_IVF_INDEX_PATH} not found, falling back to exact search")
+    if VECTOR_INDEX == QuantizedIndex.kind:
+        quantized = load_scheme_codes(MODELS_DIR, scheme_metadata)
+        if quantized is not None:
+            return QuantizedIndex(vectors, *quantized, rerank=RERANK_CANDIDATES)
+        # The search is as fast, but the codes are not shared between workers
+        print("int8 scheme vectors not found, quantizing in memory")
+        return QuantizedIndex.build(vectors, rerank=RERANK_CANDIDATES)
+    return ExactIndex(vectors, normalized=True)
+
+def load_scheme_index(vectors, scheme_metadata):
+    """
+    The vector index, fused with the BM25 index if hybrid retrieval is
+    configured. Hybrid retrieval takes its dense candidates from the IVF
+    index if it was built, whatever GOVBIZ_VECTOR_INDEX is.
+    """
+    if SCHEME_RETRIEVAL not in ("hybrid", "dense"):
+        raise ValueError(f"Unknown GOVBIZ_SCHEME_RETRIEVAL: {SCHEME_RETRIEVAL}")
+    vector_index = load_vector_index(vectors, scheme_metadata)
+    if SCHEME_RETRIEVAL == "dense":
+        return vector_index
+    bm25_path = os.path.join(MODELS_DIR, SCHEME_BM25_FILE)
+    if not os.path.exists(bm25_path):
+        print(f"{bm25_path} not found, falling back to dense retrieval")
+        return vector_index
+    lexical_index = BM25Index.load(bm25_path, len(vector_index), scheme_metadata.get('digest'))
+    ann = vector_index if isinstance(vector_index, IVFIndex) else load_ivf_index(vectors)
+    if ann is None:
+        print(f"{SCHEME_IVF_INDEX_PATH} not found, hybrid retrieval scores every scheme")
+    return HybridIndex(vector_index, lexical_index, candidates=HYBRID_CANDIDATES, ann=ann)
+
+def scheme_delta_since(previous, scheme_metadata):
+    """
+    The catalogue changes between the previous bundle and new scheme
+    metadata, if the delta manifest describes exactly that step
+    """
+    base_digest = previous.scheme_metadata.get('digest')
+    digest = scheme_metadata.get('digest')
+    if base_digest is None or digest is None:
+        return None
+    if digest == base_digest:
+        return {"base_digest": base_digest, "digest": digest,
+                "added": [], "updated": [], "removed": []}
+    delta = load_scheme_delta(MODELS_DIR)
+    if delta is None or (delta["base_digest"], delta["digest"]) != (base_digest, digest):
+        return None
+    return delta
+
+def load_nic_scheme_map(scheme_metadata):
+    """
+    Precomputed top schemes per NIC code (code -> [(scheme_row, similarity)]),
+    or None if the map is missing or was built for another scheme catalogue
+    """
+    path = os.path.join(MODELS_DIR, NIC_SCHEME_MAP_FILE)
+    if not os.path.exists(path):
+        return None
+    nic_scheme_map = NICSchemeMap.load(path)
+    if nic_scheme_map.scheme_digest != scheme_catalogue_version(scheme_metadata):
+        print(f"{path} was built for another scheme catalogue; run "
+              f"utils/generate_nic_scheme_map.py to update it")
+        return None
+    return nic_scheme_map.rankings()
+
+def load_nic_code_descriptions():
+    """NIC code -> its descriptions in data/nic_codes.csv, or None if the file is missing"""
+    path = "data/nic_codes.csv"
+    if not os.path.exists(path):
+        return None
+    descriptions = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            descriptions.setdefault(row["nic_code"], []).append(row["description"])
+    return descriptions
+
+def nic_scheme_responses(rankings, scheme_metadata, version):
+    """/schemes_by_nic response bodies by NIC code, serialized once per bundle"""
+    return {
+        code: NICSchemesResponse(
+            nic_code=code,
+            schemes=[
+                SchemeResponse(
+                    name=scheme_metadata['scheme_names'][row],
+                    description=scheme_metadata['descriptions'][row],
+                    similarity=similarity,
+                    score=similarity
+                )
+                for row, similarity in ranking
+            ],
+            model_version=version
+        ).model_dump_json().encode()
+        for code, ranking in rankings.items()
+    }
+
+def load_nic_hierarchy():
+    """The hierarchical NIC classifier, or None if it has not been trained"""
+    path = os.path.join(MODELS_DIR, NIC_HIERARCHY_FILE)
+    if not os.path.exists(path):
+        if NIC_MODEL == "hierarchical":
+            print(f"{path} not found, /get_nic falls back to the flat classifier")
+        return None
+    with open(path, "rb") as f:
+        nic_hierarchy = pickle.load(f)
+    nic_hierarchy.timer = stage_timer
+    return nic_hierarchy
+
+def load_nic_models():
+    """The flat NIC classifier and its scorer, and the hierarchical classifier if trained"""
+    with open("models/nic_classifier.pkl", "rb") as f:
+        nic_classifier = pickle.load(f)
+    nic_scorer = NICScorer(nic_classifier, load_calibration(MODELS_DIR), timer=stage_timer)
+    return nic_classifier, nic_scorer, load_nic_hierarchy()
+
+def load_scheme_models(previous):
+    """Scheme vectors and metadata, the search and eligibility indexes, and the catalogue delta"""
+    if has_scheme_artifacts("models"):
+        # Pre-normalized, memory-mapped and shared between worker processes
+        scheme_embeddings, scheme_metadata = load_scheme_artifacts("models")
+    else:
+        # Legacy pickles; convert with utils/convert_scheme_artifacts.py
         with open("models/scheme_embeddings.pkl", "rb") as f:
-            scheme_embeddings = pickle.load(f)
+            # Normalized once here instead of on every request
+            scheme_embeddings = ExactIndex(pickle.load(f)).vectors
         
         with open("models/scheme_metadata.pkl", "rb") as f:
             scheme_metadata = pickle.load(f)
-        
-        # Load sentence transformer model
-        sentence_model = SentenceTransformer('all-MiniLM-L6-v2')
-        
-        print("All models loaded successfully!")
-        
+        # The metadata pickle repeats the embeddings matrix; keep one copy
+        scheme_metadata.pop('embeddings', None)
+    
+    scheme_index = load_scheme_index(scheme_embeddings, scheme_metadata)
+    eligibility = EligibilityIndex.build(scheme_metadata.get('attributes'), len(scheme_index))
+    # Written by utils/generate_nic_scheme_map.py; without it, codes are ranked on request
+    nic_scheme_rankings = load_nic_scheme_map(scheme_metadata)
+    nic_code_descriptions = load_nic_code_descriptions() if nic_scheme_rankings is None else None
+    
+    # Written by the incremental embedding generator; lets reloads keep the
+    # cached results the catalogue changes cannot affect
+    scheme_delta = scheme_delta_since(previous, scheme_metadata) if previous is not None else None
+    if scheme_delta is not None:
+        print(f"Scheme catalogue {scheme_delta['base_digest']} -> {scheme_delta['digest']}: "
+              f"{len(scheme_delta['added'])} added, {len(scheme_delta['updated'])} changed, "
+              f"{len(scheme_delta['removed'])} removed")
+    return (scheme_index, scheme_metadata, eligibility, scheme_delta, nic_scheme_rankings,
+            nic_code_descriptions)
+
+def build_bundle(version, previous=None):
+    """
+    Load all trained models and data into a new ModelBundle. The NIC
+    models, the scheme indexes and the encoder are loaded on parallel
+    threads; NIC-only endpoints use the NIC models as soon as they are ready.
+    """
+    global model_loader
+    # Reuse the NIC classifier if its files are unchanged since the last load
+    nic_stamp = model_registry.fingerprint(NIC_ARTIFACTS)
+    if previous is not None and previous.nic_stamp == nic_stamp:
+        load_nic = lambda: (previous.nic_classifier, previous.nic_scorer, previous.nic_hierarchy)
+    else:
+        load_nic = load_nic_models
+    
+    # The sentence transformer is not a file in models/, so reloads reuse it
+    if previous is not None:
+        load_sentence_model = lambda: previous.sentence_model
+    else:
+        # PyTorch or ONNX Runtime, per GOVBIZ_ENCODER_BACKEND
+        load_sentence_model = partial(load_encoder, timer=stage_timer)
+    
+    model_loader = StagedLoader({
+        "nic": load_nic,
+        "schemes": partial(load_scheme_models, previous),
+        "encoder": load_sentence_model,
+    }, version=version)
+    components = model_loader.results()
+    print("Model components loaded in " + ", ".join(
+        f"{name} {seconds:.2f}s" for name, seconds in model_loader.seconds.items()))
+    
+    nic_classifier, nic_scorer, nic_hierarchy = components["nic"]
+    (scheme_index, scheme_metadata, eligibility, scheme_delta, nic_scheme_rankings,
+     nic_code_descriptions) = components["schemes"]
+    if nic_scheme_rankings is not None:
+        nic_schemes = nic_scheme_responses(nic_scheme_rankings, scheme_metadata, version)
+    else:
+        nic_schemes = None
+    return ModelBundle(
+        version=version,
+        nic_classifier=nic_classifier,
+        nic_scorer=nic_scorer,
+        nic_hierarchy=nic_hierarchy,
+        scheme_index=scheme_index,
+        scheme_metadata=scheme_metadata,
+        sentence_model=components["encoder"],
+        nic_stamp=nic_stamp,
+        scheme_delta=scheme_delta,
+        eligibility=eligibility,
+        nic_schemes=nic_schemes,
+        nic_code_descriptions=nic_code_descriptions
+    )
+
+def warm_up(bundle):
+    """Run a few inferences so the first real requests on a new bundle are not slow"""
+    predict_nic_codes(bundle, WARMUP_DESCRIPTIONS)
+    recommend_schemes(bundle, WARMUP_DESCRIPTIONS)
+
+def scheme_results_refresher(bundle):
+    """
+    A schemes_cache.refresh() function for a catalogue delta.
+
+    A cached top-k result is still exact if none of its schemes was changed
+    or removed, and no added or re-embedded scheme scores at least as high
+    as its last entry for the cached query embedding. Schemes whose
+    eligibility changed count as both removed and added, since they may
+    have left or joined the results of a filtered query.
+    """
+    delta = bundle.scheme_delta
+    if isinstance(bundle.scheme_index, HybridIndex) and (
+            delta["added"] or delta["updated"] or delta["removed"]):
+        # BM25 weights depend on every document, so any change can reorder results
+        return lambda key, response: None
+    reattributed = set(delta.get("reattributed", []))
+    dropped = set(delta["updated"]) | set(delta["removed"]) | reattributed
+    new_names = set(delta["added"]) | set(delta["updated"]) | reattributed
+    new_rows = [i for i, name in enumerate(bundle.scheme_metadata['scheme_names']) if name in new_names]
+    new_vectors = np.asarray(bundle.scheme_embeddings[new_rows], dtype=np.float32)
+    
+    def refresh(key, response):
+        schemes = response["schemes"]
+        if any(scheme["name"] in dropped for scheme in schemes):
+            return None
+        if new_rows:
+            # Filtered or deeper results are cached under (description, filters, depth)
+            description, depth = (key[0], key[2]) if isinstance(key, tuple) else (key, TOP_K_SCHEMES)
+            query_embedding = embedding_cache.peek(description)
+            if query_embedding is None or len(schemes) < depth:
+                return None
+            best = float(np.max(new_vectors @ normalize_rows(query_embedding.reshape(1, -1))[0]))
+            if best >= schemes[-1]["similarity"]:
+                return None
+        return {**response, "model_version": bundle.version}
+    
+    return refresh
+
+def clear_caches(previous, bundle):
+    """
+    Drop the cached embeddings and results the new bundle could answer
+    differently. Query embeddings depend only on the encoder and NIC results
+    only on the classifier; scheme results are checked against the catalogue
+    delta when there is one. Kept entries get the new model version.
+    """
+    def same_results(key, response):
+        return response.model_copy(update={"model_version": bundle.version})
+    
+    if previous is None or bundle.sentence_model is not previous.sentence_model:
+        embedding_cache.clear()
+    if previous is None or bundle.nic_stamp != previous.nic_stamp:
+        nic_cache.clear()
+    else:
+        nic_cache.refresh(same_results)
+    if previous is None or bundle.scheme_delta is None:
+        schemes_cache.clear()
+    else:
+        schemes_cache.refresh(scheme_results_refresher(bundle))
+
+model_registry = ModelRegistry(MODELS_DIR, build_bundle, warmup_fn=warm_up)
+model_registry.on_swap(clear_caches)
+# The StagedLoader of the latest load, with each component's state and timing
+model_loader = None
+
+def load_models():
+    """Load all trained models and data"""
+    try:
+        bundle = model_registry.load(force=True)
+        print(f"All models loaded successfully! (version {bundle.version})")
     except Exception as e:
         print(f"Error loading models: {e}")
         raise
 
+def load_models_in_background():
+    """Start load_models() on a background thread"""
+    def run():
+        try:
+            load_models()
+        except Exception:
+            # Already printed, and reported per component by /health
+            pass
+    
+    threading.Thread(target=run, name="model-load", daemon=True).start()
+
+def resolve_bundle(bundle):
+    """
+    Inference functions receive the bundle itself from the thread pool, but
+    only its version from the process pool, whose workers keep their own
+    registry and catch up with the requested version on demand.
+    """
+    if isinstance(bundle, ModelBundle):
+        return bundle
+    return model_registry.ensure_version(bundle)
+
+def predict_nic_codes(bundle, descriptions, top_k=NIC_TOP_K):
+    """Predict NIC codes for a list of descriptions with a single classifier pass.
+
+    Returns one list of (nic_code, probability) pairs per description, in
+    input order, most likely code first.
+    """
+    bundle = resolve_bundle(bundle)
+    if NIC_MODEL == "hierarchical" and bundle.nic_hierarchy is not None:
+        return bundle.nic_hierarchy.top_k(descriptions, top_k)
+    return bundle.nic_scorer.top_k(descriptions, top_k)
+
+def nic_calibrated(bundle, model=None):
+    """Whether the probabilities of a NIC model ("flat" or "hierarchical",
+    by default the one predict_nic_codes uses) come from a fitted temperature
+    """
+    model = model or NIC_MODEL
+    if model == "hierarchical" and bundle.nic_hierarchy is not None:
+        # Hierarchies pickled before the flag existed are treated as uncalibrated
+        return getattr(bundle.nic_hierarchy, "calibrated", False)
+    return bundle.nic_scorer.calibrated
+
+def predict_nic_paths(bundle, descriptions, top_k=NIC_TOP_K):
+    """Predict NIC codes with the confidence of each level of the top code's path.
+
+    Uses the hierarchical classifier if it was trained; otherwise the path
+    confidences are summed from the flat classifier's probabilities.
+    Returns one (candidates, path, model) tuple per description.
+    """
+    bundle = resolve_bundle(bundle)
+    if bundle.nic_hierarchy is not None:
+        return [
+            ([(code, p) for code, p, _ in leaves[:top_k]],
+             code_path(leaves[0][0], leaves[0][2]),
+             "hierarchical")
+            for leaves in bundle.nic_hierarchy.beam_search(descriptions, top_k)
+        ]
+    
+    scorer = bundle.nic_scorer
+    results = []
+    for candidates, probabilities in zip(scorer.top_k(descriptions, top_k),
+                                         scorer.class_probabilities(descriptions)):
+        totals = marginal_probabilities(scorer.classes, probabilities)
+        results.append((candidates, code_path(candidates[0][0], totals), "flat"))
+    return results
+
+def scheme_search_depth(top_k):
+    """The depth the scheme index is searched at for the best top_k schemes"""
+    bucketed = -(-top_k // SCHEME_DEPTH_BUCKET) * SCHEME_DEPTH_BUCKET
+    return max(top_k, min(bucketed, MAX_SCHEMES))
+
+def rank_schemes(bundle, query_embeddings, top_k=TOP_K_SCHEMES, query_texts=None, filters=None):
+    """Rank schemes for a matrix of query embeddings.
+
+    Returns one list of (scheme_index, similarity, score) triples per query,
+    best first by score: the fused score with a hybrid index, otherwise the
+    similarity.
+    With a hybrid index, query_texts (one per embedding) are also matched
+    against the BM25 index. filters is a filters_key(); only the schemes it
+    allows are scored. The index is searched at scheme_search_depth(top_k),
+    so any top_k in one depth bucket is a prefix of the same ranking.
+    """
+    bundle = resolve_bundle(bundle)
+    scheme_index = bundle.scheme_index
+    mask = bundle.eligibility.mask(filters) if bundle.eligibility is not None else None
+    depth = scheme_search_depth(top_k)
+    if isinstance(scheme_index, HybridIndex):
+        scores, ids = scheme_index.search(query_embeddings, depth, query_texts, mask=mask)
+        scores, ids = scores[:, :top_k], ids[:, :top_k]
+        similarities = scheme_index.similarities(query_embeddings, ids)
+    else:
+        similarities, ids = scheme_index.search(query_embeddings, depth, mask=mask)
+        similarities, ids = similarities[:, :top_k], ids[:, :top_k]
+        scores = similarities
+    return [
+        [
+            (int(idx), float(similarity), float(score))
+            for idx, similarity, score in zip(ids[row], similarities[row], scores[row])
+            if idx >= 0
+        ]
+        for row in range(ids.shape[0])
+    ]
+
+def encode_queries(descriptions):
+    """Embed a list of descriptions with one sentence model call"""
+    # The encoder is shared by every bundle version
+    return model_registry.current.sentence_model.encode(descriptions)
+
+def schemes_for_embeddings(bundle, query_embeddings, top_k=TOP_K_SCHEMES, query_texts=None,
+                           filters=None):
+    """
+    Build the top schemes for a matrix of query embeddings, as plain dicts
+    in the SchemeResponse shape. Hundreds of schemes per query are cheap
+    to serialize with orjson this way, where validating a SchemeResponse
+    for each would cost more than the search.
+    """
+    bundle = resolve_bundle(bundle)
+    names = bundle.scheme_metadata['scheme_names']
+    descriptions = bundle.scheme_metadata['descriptions']
+    with stage_timer.time("schemes.similarity"):
+        rankings = rank_schemes(bundle, query_embeddings, top_k, query_texts, filters)
+    return [
+        [
+            {"name": names[idx], "description": descriptions[idx], "similarity": similarity,
+             "score": score}
+            for idx, similarity, score in ranking
+        ]
+        for ranking in rankings
+    ]
+
+def recommend_schemes(bundle, descriptions, top_k=TOP_K_SCHEMES, filters=None):
+    """Encode descriptions in one batch and return their top scheme matches"""
+    bundle = resolve_bundle(bundle)
+    query_embeddings = bundle.sentence_model.encode(descriptions)
+    return schemes_for_embeddings(bundle, query_embeddings, top_k, descriptions, filters)
+
+def rank_nic_code(bundle, code, descriptions):
+    """
+    The serialized /schemes_by_nic response for a NIC code, ranked the way
+    utils/generate_nic_scheme_map.py ranks it: the mean of its description
+    embeddings against the schemes open to its sector
+    """
+    bundle = resolve_bundle(bundle)
+    embeddings = normalize_rows(bundle.sentence_model.encode(descriptions))
+    code_vector = normalize_rows(embeddings.mean(axis=0, keepdims=True))
+    rows, similarities = rank_schemes_for_codes([code], code_vector, bundle.scheme_embeddings,
+                                                bundle.eligibility, TOP_K_SCHEMES)
+    ranking = [(int(row), float(similarity))
+               for row, similarity in zip(rows[0], similarities[0]) if row >= 0]
+    return nic_scheme_responses({code: ranking}, bundle.scheme_metadata, bundle.version)[code]
+
+def run_batch(bundle, descriptions, batch_fn):
+    """Run batch_fn over the valid descriptions of a batch request.
+
+    Blank descriptions are reported as per-item errors. If the vectorized call
+    fails, each description is retried on its own so a single bad row does not
+    fail the whole batch. Returns (result, error) pairs in input order.
+    """
+    outcomes = [(None, "Empty description")] * len(descriptions)
+    valid = [i for i, text in enumerate(descriptions) if text.strip()]
+    if not valid:
+        return outcomes
+    
+    try:
+        results = batch_fn(bundle, [descriptions[i] for i in valid])
+        for i, result in zip(valid, results):
+            outcomes[i] = (result, None)
+    except Exception:
+        for i in valid:
+            try:
+                outcomes[i] = (batch_fn(bundle, [descriptions[i]])[0], None)
+            except Exception as e:
+                outcomes[i] = (None, str(e))
+    
+    return outcomes
+
+def validate_batch_size(request: BusinessDescriptionBatch):
+    """Reject batches that are empty or larger than MAX_BATCH_SIZE"""
+    if not request.descriptions:
+        raise HTTPException(status_code=422, detail="descriptions must not be empty")
+    if len(request.descriptions) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(request.descriptions)} > {MAX_BATCH_SIZE}"
+        )
+
+# Blocking inference runs here instead of on the event loop
+inference_executor = executor_from_env(initializer=load_models)
+
+@contextmanager
+def inference_errors():
+    """Map executor overload and timeouts to 503 and 504 responses"""
+    try:
+        yield
+    except ExecutorOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except InferenceTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+async def run_inference(fn, bundle, *args, timeout=None):
+    """Run fn(bundle, *args) on the inference executor"""
+    if inference_executor.kind == "process":
+        # Bundles stay in each process; only the version crosses over
+        bundle = bundle.version
+    with inference_errors():
+        return await inference_executor.run(fn, bundle, *args, timeout=timeout)
+
+# Concurrent single-query encodes are coalesced into one encoder call
+encode_batcher = MicroBatcher(
+    "encode",
+    encode_queries,
+    inference_executor.run,
+    max_batch_size=ENCODE_BATCH_MAX_SIZE,
+    max_wait_ms=ENCODE_BATCH_WINDOW_MS,
+    max_pending=ENCODE_BATCH_MAX_PENDING,
+)
+
+async def encode_query(description):
+    """Embed one description through the micro-batcher"""
+    with inference_errors():
+        return await encode_batcher.submit(description)
+
+def json_response(response, stage):
+    """Serialize a response model, timing it as the given stage"""
+    with stage_timer.time(stage):
+        return Response(content=response.model_dump_json(), media_type="application/json")
+
+def orjson_response(content, stage):
+    """Serialize plain response data with orjson, timing it as the given stage"""
+    with stage_timer.time(stage):
+        return ORJSONResponse(content)
+
+async def ndjson_chunks(items):
+    """items as NDJSON, serialized STREAM_CHUNK_LINES lines at a time as the client reads"""
+    for start in range(0, len(items), STREAM_CHUNK_LINES):
+        yield b"".join(orjson.dumps(item, option=orjson.OPT_APPEND_NEWLINE)
+                       for item in items[start:start + STREAM_CHUNK_LINES])
+
+def eligible_count(bundle, filters):
+    """Number of schemes open to a filters_key()"""
+    mask = bundle.eligibility.mask(filters) if bundle.eligibility is not None else None
+    return len(bundle.scheme_index) if mask is None else int(np.count_nonzero(mask))
+
+def models_loaded():
+    return model_registry.current is not None
+
+def encoder_name(model):
+    """Backend name of a sentence model; wrappers without one report their class"""
+    return getattr(model, "name", type(model).__name__)
+
+def component_status():
+    """State and load time of each model component in the latest load"""
+    return model_loader.status() if model_loader is not None else {}
+
+def current_bundle():
+    """The bundle a request will use from start to finish"""
+    bundle = model_registry.current
+    if bundle is None:
+        if model_registry.loading:
+            raise HTTPException(status_code=503, detail="Models are loading",
+                                headers={"Retry-After": "1"})
+        raise HTTPException(status_code=500, detail="Models not loaded")
+    return bundle
+
+def nic_bundle():
+    """
+    The bundle for endpoints that only use the NIC models. Before the first
+    bundle is complete, a partial one is returned as soon as the NIC models
+    are loaded, without waiting for the scheme indexes and the encoder.
+    """
+    loader = model_loader
+    if model_registry.current is None and loader is not None and loader.ready("nic"):
+        nic_classifier, nic_scorer, nic_hierarchy = loader.result("nic")
+        return ModelBundle(
+            version=loader.version,
+            nic_classifier=nic_classifier,
+            nic_scorer=nic_scorer,
+            nic_hierarchy=nic_hierarchy,
+            scheme_index=None,
+            scheme_metadata={},
+            sentence_model=None
+        )
+    return current_bundle()
+
 @app.on_event("startup")
 async def startup_event():
-    """Load models on startup"""
-    load_models()
+    """Load models on startup, unless a pre-fork master already loaded them"""
+    print(f"API modules imported in {IMPORT_SECONDS:.2f}s")
+    if not models_loaded():
+        if LAZY_LOAD:
+            load_models_in_background()
+        else:
+            load_models()
+    # Threads do not survive fork(), so each worker starts its own watcher
+    if MODEL_WATCH_SECONDS > 0:
+        model_registry.watch(MODEL_WATCH_SECONDS)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the inference workers"""
+    model_registry.stop_watching()
+    inference_executor.shutdown()
 
 @app.get("/")
 async def root():
@@ -72,81 +835,497 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "get_nic": "/get_nic",
-            "get_schemes": "/get_schemes"
+            "get_nic_path": "/get_nic_path",
+            "get_schemes": "/get_schemes",
+            "schemes_by_nic": "/schemes_by_nic/{code}",
+            "analyze": "/analyze",
+            "get_nic_batch": "/get_nic_batch",
+            "get_schemes_batch": "/get_schemes_batch"
         }
     }
 
-@app.post("/get_nic", response_model=NICResponse)
-async def get_nic_code(request: BusinessDescription):
+async def nic_for_key(bundle, key):
     """
-    Predict NIC code for a business description
+    NIC prediction for a normalized description, from the cache if possible,
+    or shared with a concurrent request for the same description
     """
-    if nic_classifier is None:
-        raise HTTPException(status_code=500, detail="NIC classifier not loaded")
+    cached = nic_cache.get(key)
+    if cached is not None:
+        return cached
+    return await nic_flights.do((bundle.version, key), partial(predict_nic_for_key, bundle, key))
+
+async def predict_nic_for_key(bundle, key):
+    """Run the NIC prediction for a normalized description and cache it"""
+    generation = nic_cache.generation
     
     try:
-        # Get prediction
-        prediction = nic_classifier.predict([request.description])[0]
-        
-        # Get confidence score
-        decision_scores = nic_classifier.decision_function([request.description])
-        confidence = float(np.max(decision_scores))
+        # Get prediction and confidence score
+        predictions = await run_inference(predict_nic_codes, bundle, [key])
+        candidates = predictions[0]
+        nic_code, confidence = candidates[0]
         
-        return NICResponse(
-            nic_code=str(prediction),
-            confidence=confidence
+        response = NICResponse(
+            nic_code=nic_code,
+            confidence=confidence,
+            candidates=[NICCandidate(nic_code=c, probability=p) for c, p in candidates],
+            calibrated=nic_calibrated(bundle),
+            model_version=bundle.version
         )
+        nic_cache.set(key, response, generation)
+        return response
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
 
-@app.post("/get_schemes", response_model=SchemesResponse)
-async def get_schemes(request: BusinessDescription):
+async def schemes_for_key(bundle, key, filters=None, depth=TOP_K_SCHEMES):
     """
-    Get top 5 government schemes for a business description
+    The best depth schemes for a normalized description and a filters_key(),
+    from the cache if possible, or shared with a concurrent request for the
+    same description, filters and depth. Returns a dict with the schemes
+    (as plain dicts) and the model version.
     """
-    if (scheme_embeddings is None or scheme_metadata is None or 
-        sentence_model is None):
-        raise HTTPException(status_code=500, detail="Scheme models not loaded")
+    cache_key = key if filters is None and depth == TOP_K_SCHEMES else (key, filters, depth)
+    cached = schemes_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    return await schemes_flights.do((bundle.version, cache_key),
+                                    partial(recommend_for_key, bundle, key, filters, depth,
+                                            cache_key))
+
+async def embedding_for_key(key):
+    """Query embedding of a normalized description, from the cache if possible"""
+    query_embedding = embedding_cache.get(key)
+    if query_embedding is not None:
+        return query_embedding
+    return await encode_flights.do(key, partial(encode_and_cache, key))
+
+async def encode_and_cache(key):
+    """Embed a normalized description, batched with concurrent requests, and cache it"""
+    generation = embedding_cache.generation
+    query_embedding = await encode_query(key)
+    embedding_cache.set(key, query_embedding, generation)
+    return query_embedding
+
+async def recommend_for_key(bundle, key, filters, depth, cache_key):
+    """Run the scheme search for a normalized description and cache it"""
+    generation = schemes_cache.generation
     
     try:
-        # Generate embedding for the input description
-        query_embedding = sentence_model.encode([request.description])
-        
-        # Calculate cosine similarities
-        similarities = cosine_similarity(query_embedding, scheme_embeddings)[0]
+        # Requests with other filters may be encoding the same description
+        query_embedding = await embedding_for_key(key)
         
-        # Get top 5 similar schemes
-        top_indices = np.argsort(similarities)[::-1][:5]
-        
-        schemes = []
-        for idx in top_indices:
-            schemes.append(SchemeResponse(
-                name=scheme_metadata['scheme_names'][idx],
-                description=scheme_metadata['descriptions'][idx],
-                similarity=float(similarities[idx])
-            ))
+        # Get the top depth similar schemes
+        recommendations = await run_inference(
+            schemes_for_embeddings, bundle, query_embedding.reshape(1, -1), depth, [key],
+            filters
+        )
         
-        return SchemesResponse(schemes=schemes)
+        response = {"schemes": recommendations[0], "model_version": bundle.version}
+        schemes_cache.set(cache_key, response, generation)
+        return response
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Scheme recommendation error: {str(e)}")
+
+@app.post("/get_nic", response_model=NICResponse)
+async def get_nic_code(request: BusinessDescription):
+    """
+    Predict NIC code for a business description
+    """
+    bundle = nic_bundle()
+    key = normalize_description(request.description)
+    response = await nic_for_key(bundle, key)
+    return json_response(response, "nic.serialize")
+
+@app.post("/get_nic_path", response_model=NICPathResponse)
+async def get_nic_path(request: BusinessDescription):
+    """
+    Predict the NIC code for a business description with its full path,
+    section to sub-class, and the probability of each level
+    """
+    bundle = nic_bundle()
+    key = normalize_description(request.description)
+    try:
+        results = await run_inference(predict_nic_paths, bundle, [key])
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+    
+    candidates, path, model = results[0]
+    response = NICPathResponse(
+        nic_code=candidates[0][0],
+        confidence=candidates[0][1],
+        path=[NICLevel(**level) for level in path],
+        candidates=[NICCandidate(nic_code=c, probability=p) for c, p in candidates],
+        model=model,
+        calibrated=nic_calibrated(bundle, model),
+        model_version=bundle.version
+    )
+    return json_response(response, "nic.serialize")
+
+@app.post("/get_schemes", response_model=SchemesResponse)
+async def get_schemes(request: SchemePageRequest, accept: Optional[str] = Header(None)):
+    """
+    Get government schemes for a business description, best first, among
+    the schemes open to the optional eligibility filters: k of them (5 by
+    default) after skipping the best offset. With Accept:
+    application/x-ndjson, the page is streamed as one scheme per line, and
+    the model version and next offset are sent as headers.
+    """
+    depth = request.offset + request.k
+    if depth > MAX_SCHEMES:
+        raise HTTPException(status_code=422, detail=f"offset + k must be at most {MAX_SCHEMES}")
+    bundle = current_bundle()
+    key = normalize_description(request.description)
+    filters = request.filters.key() if request.filters else None
+    results = await schemes_for_key(bundle, key, filters, depth)
+    schemes = results["schemes"][request.offset:]
+    more = len(results["schemes"]) == depth and depth < eligible_count(bundle, filters)
+    next_offset = depth if more else None
     
+    if accept and "application/x-ndjson" in accept:
+        headers = {"X-Model-Version": results["model_version"]}
+        if next_offset is not None:
+            headers["X-Next-Offset"] = str(next_offset)
+        return StreamingResponse(ndjson_chunks(schemes), media_type="application/x-ndjson",
+                                 headers=headers)
+    response = {
+        "schemes": schemes,
+        "offset": request.offset,
+        "next_offset": next_offset,
+        "model_version": results["model_version"]
+    }
+    return orjson_response(response, "schemes.serialize")
+
+async def rank_nic_code_on_request(bundle, code, descriptions):
+    """Rank the schemes for a NIC code and keep the response for the bundle's lifetime"""
+    try:
+        content = await run_inference(rank_nic_code, bundle, code, descriptions)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Scheme recommendation error: {str(e)}")
+    bundle.nic_schemes_ranked[code] = content
+    return content
+
+@app.get("/schemes_by_nic/{code}", response_model=NICSchemesResponse)
+async def schemes_by_nic(code: str = Path(..., pattern=r"^\d{2,5}$")):
+    """
+    Top schemes for a NIC code from nic_codes.csv, precomputed offline by
+    utils/generate_nic_scheme_map.py: a dictionary lookup, with no encoding.
+
+    If the map is missing or was built for another scheme catalogue, the
+    code is ranked the same way on its first request, which encodes its
+    descriptions, and the response is kept until the next reload. Returns
+    404 for codes not in nic_codes.csv, and 503 if neither the map nor
+    nic_codes.csv is available.
+    """
+    bundle = current_bundle()
+    if bundle.nic_schemes is not None:
+        content = bundle.nic_schemes.get(code)
+        if content is None:
+            raise HTTPException(status_code=404, detail=f"No precomputed schemes for NIC code {code}")
+        return Response(content=content, media_type="application/json")
+    
+    if bundle.nic_code_descriptions is None:
+        raise HTTPException(
+            status_code=503,
+            detail="NIC scheme map and data/nic_codes.csv not available; "
+                   "run utils/generate_nic_scheme_map.py"
+        )
+    descriptions = bundle.nic_code_descriptions.get(code)
+    if descriptions is None:
+        raise HTTPException(status_code=404, detail=f"Unknown NIC code {code}")
+    content = bundle.nic_schemes_ranked.get(code)
+    if content is None:
+        content = await schemes_flights.do(
+            (bundle.version, ("nic", code)),
+            partial(rank_nic_code_on_request, bundle, code, descriptions)
+        )
+    return Response(content=content, media_type="application/json")
+
+@app.post("/analyze", response_model=AnalyzeResponse)
+async def analyze(request: SchemeRequest):
+    """
+    Predict the NIC code and recommend schemes for a business description in
+    one call. The description is parsed and normalized once, and the NIC
+    classifier and the scheme encoder run at the same time on the inference
+    pool, so the call takes about as long as the slower of the two.
+    """
+    bundle = current_bundle()
+    key = normalize_description(request.description)
+    filters = request.filters.key() if request.filters else None
+    nic, schemes = await asyncio.gather(
+        nic_for_key(bundle, key),
+        schemes_for_key(bundle, key, filters)
+    )
+    response = {
+        "nic_code": nic.nic_code,
+        "confidence": nic.confidence,
+        "nic_candidates": [candidate.model_dump() for candidate in nic.candidates],
+        "calibrated": nic.calibrated,
+        "schemes": schemes["schemes"],
+        "model_version": bundle.version
+    }
+    return orjson_response(response, "analyze.serialize")
+
+@app.post("/get_nic_batch", response_model=NICBatchResponse)
+async def get_nic_code_batch(request: BusinessDescriptionBatch):
+    """
+    Predict NIC codes for a list of business descriptions in one classifier pass
+    """
+    bundle = nic_bundle()
+    validate_batch_size(request)
+    
+    results = []
+    outcomes = await run_inference(
+        run_batch, bundle, request.descriptions, predict_nic_codes, timeout=BATCH_TIMEOUT
+    )
+    for prediction, error in outcomes:
+        if error is not None:
+            results.append(NICBatchItem(error=error))
+        else:
+            nic_code, confidence = prediction[0]
+            results.append(NICBatchItem(
+                nic_code=nic_code,
+                confidence=confidence,
+                candidates=[NICCandidate(nic_code=c, probability=p) for c, p in prediction]
+            ))
+    
+    return NICBatchResponse(results=results, calibrated=nic_calibrated(bundle),
+                            model_version=bundle.version)
+
+@app.post("/get_schemes_batch", response_model=SchemesBatchResponse)
+async def get_schemes_batch(request: SchemesBatchRequest):
+    """
+    Get top 5 government schemes for each description in a list, using one
+    encoder call and one similarity matrix for the whole batch
+    """
+    bundle = current_bundle()
+    validate_batch_size(request)
+    
+    results = []
+    filters = request.filters.key() if request.filters else None
+    outcomes = await run_inference(
+        run_batch, bundle, request.descriptions, partial(recommend_schemes, filters=filters),
+        timeout=BATCH_TIMEOUT
+    )
+    for schemes, error in outcomes:
+        if error is not None:
+            results.append({"schemes": [], "error": error})
+        else:
+            results.append({"schemes": schemes, "error": None})
+    
+    return ORJSONResponse({"results": results, "model_version": bundle.version})
+
+@app.get("/stats/batching")
+async def batching_stats():
+    """Batch size and queue wait histograms for the encode micro-batcher"""
+    return encode_batcher.stats()
+
+@app.get("/stats/stages")
+async def stage_stats():
+    """Latency histograms for each stage of /get_nic and /get_schemes, in ms"""
+    return stage_timer.snapshot()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Metrics for this process in the Prometheus text format"""
+    text = PrometheusText()
+    
+    # Requests
+    text.metric("govbiz_requests_total", "counter", "HTTP requests by route and status", [
+        ({"method": method, "route": route, "status": status}, count)
+        for (method, route, status), count in sorted(request_metrics.counts().items())
+    ])
+    text.histogram("govbiz_request_duration_seconds", "HTTP request latency", [
+        ({"method": method, "route": route}, snapshot)
+        for (method, route), snapshot in sorted(request_metrics.latency().items())
+    ])
+    text.metric("govbiz_requests_in_flight", "gauge", "HTTP requests being handled",
+                [({}, request_metrics.in_flight)])
+    
+    # Inference stages, recorded in ms and exported in seconds
+    text.histogram("govbiz_stage_duration_seconds", "Time per call of each inference stage", [
+        ({"stage": stage}, histogram.snapshot())
+        for stage, histogram in stage_timer.histograms().items()
+    ], scale=0.001)
+    
+    # Inference pool and encode micro-batcher
+    executor_stats = inference_executor.stats()
+    text.metric("govbiz_inference_pending", "gauge",
+                "Inference calls running or waiting for a worker",
+                [({}, executor_stats["pending"])])
+    text.metric("govbiz_inference_queued", "gauge", "Inference calls waiting for a worker",
+                [({}, executor_stats["queued"])])
+    text.metric("govbiz_inference_capacity", "gauge", "Inference workers plus queue slots",
+                [({}, executor_stats["max_workers"] + executor_stats["max_queue"])])
+    text.metric("govbiz_inference_rejected_total", "counter",
+                "Inference calls rejected with 503", [({}, executor_stats["rejected"])])
+    text.metric("govbiz_inference_timed_out_total", "counter",
+                "Inference calls that returned 504", [({}, executor_stats["timed_out"])])
+    text.metric("govbiz_encode_batch_pending", "gauge", "Queries waiting for an encode batch",
+                [({}, encode_batcher.pending)])
+    text.histogram("govbiz_encode_batch_size", "Queries per encode batch",
+                   [({}, encode_batcher.batch_size.snapshot())])
+    text.histogram("govbiz_encode_batch_queue_wait_seconds",
+                   "Time queries wait for their encode batch",
+                   [({}, encode_batcher.queue_wait.snapshot())])
+    
+    # Caches
+    cache_stats = [(cache.name, cache.stats()) for cache in caches]
+    for field, kind, description in [
+        ("entries", "gauge", "Entries in the cache"),
+        ("bytes", "gauge", "Approximate memory held by the cache"),
+        ("hits", "counter", "Cache hits"),
+        ("misses", "counter", "Cache misses"),
+        ("evictions", "counter", "Entries evicted to stay within the limits"),
+        ("expirations", "counter", "Entries dropped after their TTL"),
+    ]:
+        name = f"govbiz_cache_{field}" + ("_total" if kind == "counter" else "")
+        text.metric(name, kind, description,
+                    [({"cache": cache}, stats[field]) for cache, stats in cache_stats])
+    
+    # Identical concurrent computations collapsed into one
+    flight_stats = [(flight.name, flight.stats()) for flight in flights]
+    text.metric("govbiz_single_flight_calls_total", "counter",
+                "Cache misses that needed an encode, NIC prediction or scheme search",
+                [({"flight": name}, stats["calls"]) for name, stats in flight_stats])
+    text.metric("govbiz_single_flight_shared_total", "counter",
+                "Calls that shared a computation already in progress",
+                [({"flight": name}, stats["shared"]) for name, stats in flight_stats])
+    text.metric("govbiz_single_flight_in_flight", "gauge", "Computations in progress",
+                [({"flight": name}, stats["in_flight"]) for name, stats in flight_stats])
+    
+    # Models and process
+    status = model_registry.status()
+    bundle = model_registry.current
+    text.metric("govbiz_model_info", "gauge", "Serving model version and encoder backend", [
+        ({"version": bundle.version, "encoder": encoder_name(bundle.sentence_model)}, 1)
+    ] if bundle is not None else [])
+    text.metric("govbiz_model_load_seconds", "gauge",
+                "Duration of the last model load, including warm-up",
+                [({}, status["last_reload_seconds"])])
+    text.metric("govbiz_model_loaded_timestamp_seconds", "gauge",
+                "When the serving models were loaded", [({}, status["loaded_at"])])
+    text.metric("govbiz_model_swaps_total", "counter", "Model versions swapped in",
+                [({}, status["swap_count"])])
+    components = component_status()
+    text.metric("govbiz_model_component_ready", "gauge",
+                "Whether each model component of the latest load is ready",
+                [({"component": name}, int(c["state"] == "ready")) for name, c in components.items()])
+    text.metric("govbiz_model_component_load_seconds", "gauge",
+                "Load time of each model component in the latest load",
+                [({"component": name}, c["seconds"]) for name, c in components.items()])
+    text.metric("govbiz_import_seconds", "gauge", "Time to import the API modules",
+                [({}, IMPORT_SECONDS)])
+    text.metric("govbiz_process_resident_memory_bytes", "gauge", "Resident set size",
+                [({}, process_rss_bytes())])
+    if slow_request_profiler is not None:
+        text.metric("govbiz_slow_request_profiles_total", "counter",
+                    "Slow request profiles written", [({}, slow_request_profiler.dumps)])
+    
+    # Starlette appends "; charset=utf-8"
+    return PlainTextResponse(text.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/stats/cache")
+async def cache_stats():
+    """Hit, miss and eviction counters for the query and result caches"""
+    return {cache.name: cache.stats() for cache in caches}
+
+@app.get("/stats/single_flight")
+async def single_flight_stats():
+    """
+    Computations started and calls that shared one already in progress, for
+    query encoding, NIC prediction and scheme search
+    """
+    return {flight.name: flight.stats() for flight in flights}
+
+def check_admin_token(token):
+    """Admin endpoints require X-Admin-Token when GOVBIZ_ADMIN_TOKEN is set"""
+    if ADMIN_TOKEN and token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.post("/admin/reload", status_code=202)
+async def reload_models(force: bool = False, x_admin_token: Optional[str] = Header(None)):
+    """
+    Load the artifacts in models/ in the background and swap them in once
+    warmed up. Unchanged artifacts are not reloaded unless force is set.
+    """
+    check_admin_token(x_admin_token)
+    started = model_registry.reload_in_background(force=force)
+    return {
+        "status": "reloading" if started else "already_reloading",
+        "model_version": model_registry.version
+    }
+
+@app.get("/admin/models")
+async def model_status(x_admin_token: Optional[str] = Header(None)):
+    """Serving model version and the state of the last reload"""
+    check_admin_token(x_admin_token)
+    bundle = model_registry.current
+    delta = bundle.scheme_delta if bundle is not None else None
+    return {
+        **model_registry.status(),
+        "on_disk_version": model_registry.fingerprint(),
+        "components": component_status(),
+        "scheme_catalogue": {
+            "digest": bundle.scheme_metadata.get('digest') if bundle is not None else None,
+            "last_delta": {
+                "base_digest": delta["base_digest"],
+                "added": len(delta["added"]),
+                "updated": len(delta["updated"]),
+                "removed": len(delta["removed"]),
+            } if delta is not None else None,
+        },
+    }
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    models_loaded = all([
-        nic_classifier is not None,
-        scheme_embeddings is not None,
-        scheme_metadata is not None,
-        sentence_model is not None
-    ])
+    """
+    Health check endpoint. "live" is true while the process answers at all;
+    "ready" once every model is loaded and all endpoints can serve.
+    """
+    loaded = models_loaded()
     
     return {
-        "status": "healthy" if models_loaded else "unhealthy",
-        "models_loaded": models_loaded
+        "status": "healthy" if loaded else "loading" if model_registry.loading else "unhealthy",
+        "live": True,
+        "ready": loaded,
+        "models_loaded": loaded,
+        "model_version": model_registry.version,
+        "encoder_backend": encoder_name(model_registry.current.sentence_model) if loaded else None,
+        "components": component_status(),
+        "startup": {
+            "import_seconds": round(IMPORT_SECONDS, 3),
+            "load_seconds": model_registry.last_reload_seconds
+        },
+        "inference": inference_executor.stats()
     }
 
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe: the process is up, whether or not models are loaded"""
+    return {"status": "live"}
+
+@app.get("/health/ready")
+async def readiness():
+    """Readiness probe: 503, with each component's state, until every model is loaded"""
+    loaded = models_loaded()
+    return JSONResponse(
+        status_code=200 if loaded else 503,
+        content={
+            "status": "ready" if loaded else "not_ready",
+            "model_version": model_registry.version,
+            "components": component_status()
+        }
+    )
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
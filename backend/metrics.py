@@ -0,0 +1,238 @@
+import bisect
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Histogram:
+    """
+    A fixed-bucket histogram in the Prometheus style.
+
+    Bucket counts are cumulative: each upper bound counts every observation
+    less than or equal to it, and "+Inf" counts all of them.
+    """
+
+    def __init__(self, name, description, buckets):
+        self.name = name
+        self.description = description
+        self.buckets = sorted(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self):
+        """Cumulative bucket counts, total count and sum"""
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        cumulative, running = {}, 0
+        for bound, count in zip(self.buckets + ["+Inf"], counts):
+            running += count
+            cumulative[str(bound)] = running
+        return {"buckets": cumulative, "count": running, "sum": total}
+
+    def reset(self):
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)
+            self._sum = 0.0
+
+
+# Milliseconds, from a cached lookup to a slow encoder batch
+STAGE_BUCKETS_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+
+class StageTimer:
+    """
+    Per-stage latency histograms, in milliseconds.
+
+    Stages are recorded once per call, so a stage that processes a batch
+    (such as one encoder call for many coalesced queries) is counted once
+    for the whole batch.
+    """
+
+    def __init__(self, buckets=STAGE_BUCKETS_MS):
+        self.buckets = buckets
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage):
+        histogram = self._stages.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._stages.setdefault(
+                    stage, Histogram(stage, f"Time spent in {stage}, in ms", self.buckets)
+                )
+        return histogram
+
+    @contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histogram(stage).observe((time.perf_counter() - start) * 1000)
+
+    def snapshot(self):
+        stages = {}
+        for stage, histogram in sorted(self._stages.items()):
+            snapshot = histogram.snapshot()
+            snapshot["mean_ms"] = snapshot["sum"] / snapshot["count"] if snapshot["count"] else None
+            stages[stage] = snapshot
+        return stages
+
+    def histograms(self):
+        return dict(sorted(self._stages.items()))
+
+    def reset(self):
+        for histogram in list(self._stages.values()):
+            histogram.reset()
+
+
+# Seconds, for whole requests
+REQUEST_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+
+class RequestMetrics:
+    """Request counts per route and status, latency histograms per route"""
+
+    def __init__(self, buckets=REQUEST_BUCKETS):
+        self.buckets = buckets
+        self.in_flight = 0
+        self._counts = {}
+        self._latency = {}
+        self._lock = threading.Lock()
+
+    def observe(self, method, route, status, seconds):
+        with self._lock:
+            key = (method, route, status)
+            self._counts[key] = self._counts.get(key, 0) + 1
+            histogram = self._latency.get((method, route))
+            if histogram is None:
+                histogram = self._latency[(method, route)] = Histogram(
+                    "request_duration_seconds", "Request latency", self.buckets
+                )
+        histogram.observe(seconds)
+
+    def counts(self):
+        with self._lock:
+            return dict(self._counts)
+
+    def latency(self):
+        with self._lock:
+            return {key: histogram.snapshot() for key, histogram in self._latency.items()}
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware that records every HTTP request in a RequestMetrics.
+
+    Requests are labelled with the route template (for example
+    "/schemes_by_nic/{code}") rather than the raw path, so the number of
+    series stays bounded. An optional profiler is told when each request
+    starts and finishes.
+    """
+
+    def __init__(self, app, request_metrics, profiler=None):
+        self.app = app
+        self.request_metrics = request_metrics
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics = self.request_metrics
+        metrics.in_flight += 1
+        if self.profiler is not None:
+            self.profiler.request_started()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            metrics.in_flight -= 1
+            # The router stores the matched route in the shared scope
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            metrics.observe(scope["method"], path, status, duration)
+            if self.profiler is not None:
+                self.profiler.request_finished(f"{scope['method']} {path}", start, duration)
+
+
+def process_rss_bytes():
+    """Resident set size of this process"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # Peak rather than current RSS, outside Linux (bytes on macOS)
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class PrometheusText:
+    """Builds a response in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self.lines = []
+
+    def metric(self, name, kind, description, samples):
+        """samples: (labels, value) pairs for a counter or gauge"""
+        self.lines.append(f"# HELP {name} {description}")
+        self.lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            if value is not None:
+                self.lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+    def histogram(self, name, description, series, scale=1.0):
+        """
+        series: (labels, Histogram.snapshot()) pairs. scale converts the
+        recorded unit into the exported one (0.001 for ms to seconds).
+        """
+        self.lines.append(f"# HELP {name} {description}")
+        self.lines.append(f"# TYPE {name} histogram")
+        for labels, snapshot in series:
+            for bound, count in snapshot["buckets"].items():
+                le = bound if bound == "+Inf" else _number(float(bound) * scale)
+                self.lines.append(f"{name}_bucket{_labels({**labels, 'le': le})} {count}")
+            self.lines.append(f"{name}_sum{_labels(labels)} {_number(snapshot['sum'] * scale)}")
+            self.lines.append(f"{name}_count{_labels(labels)} {snapshot['count']}")
+
+    def render(self):
+        return "\n".join(self.lines) + "\n"
@@ -0,0 +1,209 @@
+import heapq
+from collections import defaultdict
+from contextlib import nullcontext
+
+import numpy as np
+
+from nic_inference import linear_weights, softmax
+
+NIC_HIERARCHY_FILE = "nic_hierarchy.pkl"
+
+# NIC 2008 levels below the section, by code prefix length
+NIC_LEVELS = (("division", 2), ("group", 3), ("class", 4), ("subclass", 5))
+
+# NIC 2008 sections and the divisions they cover
+NIC_SECTIONS = (
+    ("A", 1, 3), ("B", 5, 9), ("C", 10, 33), ("D", 35, 35), ("E", 36, 39),
+    ("F", 41, 43), ("G", 45, 47), ("H", 49, 53), ("I", 55, 56), ("J", 58, 63),
+    ("K", 64, 66), ("L", 68, 68), ("M", 69, 75), ("N", 77, 82), ("O", 84, 84),
+    ("P", 85, 85), ("Q", 86, 88), ("R", 90, 93), ("S", 94, 96), ("T", 97, 98),
+    ("U", 99, 99),
+)
+
+
+def nic_section(code):
+    """Section letter of a NIC code, from its division; None if it has none"""
+    division = int(code[:2])
+    for section, first, last in NIC_SECTIONS:
+        if first <= division <= last:
+            return section
+    return None
+
+
+def code_path(code, probabilities):
+    """
+    The path from section to sub-class of a 5-digit code, with the
+    probability of each level. probabilities maps a code prefix (or a
+    section letter) to the probability that the true code is under it.
+    """
+    section = nic_section(code)
+    path = [{"level": "section", "code": section, "confidence": probabilities.get(section, 0.0)}]
+    for level, length in NIC_LEVELS:
+        prefix = code[:length]
+        path.append({"level": level, "code": prefix, "confidence": probabilities.get(prefix, 0.0)})
+    return path
+
+
+def marginal_probabilities(classes, probabilities):
+    """
+    Probability of every section and code prefix, summed from a probability
+    distribution over all 5-digit codes (one row)
+    """
+    totals = defaultdict(float)
+    for code, p in zip(classes, probabilities):
+        totals[nic_section(code)] += float(p)
+        for _, length in NIC_LEVELS:
+            totals[code[:length]] += float(p)
+    return totals
+
+
+class NICNode:
+    """A linear classifier over the children of one code prefix"""
+
+    def __init__(self, children, weights=None, intercept=None):
+        self.children = children
+        # None when there is a single child, which then has probability 1
+        self.weights = weights
+        self.intercept = intercept
+
+
+class HierarchicalNICClassifier:
+    """
+    Predicts NIC codes one level at a time: the 2-digit division, then the
+    group, class and sub-class under it.
+
+    Each prefix has its own linear classifier over its children, trained
+    only on the descriptions under that prefix. Prediction is a beam search:
+    only the children of the beam_width most likely prefixes at each level
+    are scored, so the cost per description grows with the beam width and
+    the branching factor rather than with the number of leaf codes.
+
+    A path's probability is the product of the softmax probabilities of its
+    nodes. The top candidates therefore come from the beam, and paths
+    pruned early are not ranked.
+    """
+
+    def __init__(self, vectorizer, nodes, temperature=1.0, beam_width=3):
+        self.vectorizer = vectorizer
+        self.nodes = nodes
+        self.temperature = temperature
+        # Set by train_nic_hierarchy.py once the temperature is fitted
+        self.calibrated = False
+        self.beam_width = beam_width
+        self.timer = None
+        self.classes = sorted(
+            child for node in nodes.values() for child in node.children if len(child) == 5
+        )
+
+    @classmethod
+    def fit(cls, descriptions, codes, vectorizer, make_classifier, **kwargs):
+        """
+        Fit the shared vectorizer on every description, then one classifier
+        per prefix with more than one child, from make_classifier()
+        """
+        codes = [str(code) for code in codes]
+        for code in codes:
+            if len(code) != 5 or not code.isdigit():
+                raise ValueError(f"Expected a 5-digit NIC code, got {code!r}")
+        features = vectorizer.fit_transform(descriptions)
+        codes = np.array(codes)
+
+        nodes = {}
+        parents = [("", np.arange(len(codes)))]
+        for _, length in NIC_LEVELS:
+            next_parents = []
+            for prefix, rows in parents:
+                child_codes = np.array([code[:length] for code in codes[rows]])
+                children = sorted(set(child_codes))
+                if len(children) == 1:
+                    nodes[prefix] = NICNode(children)
+                else:
+                    classifier = make_classifier().fit(features[rows], child_codes)
+                    weights, intercept = linear_weights(classifier, len(children))
+                    nodes[prefix] = NICNode([str(c) for c in classifier.classes_], weights, intercept)
+                next_parents.extend((child, rows[child_codes == child]) for child in children)
+            parents = next_parents
+        return cls(vectorizer, nodes, **kwargs)
+
+    def stage(self, name):
+        return self.timer.time(name) if self.timer is not None else nullcontext()
+
+    def _node_probabilities(self, node, features):
+        if node.weights is None:
+            return np.ones((features.shape[0], 1))
+        scores = np.asarray(features @ node.weights) + node.intercept
+        return softmax(scores, self.temperature)
+
+    def beam_search(self, descriptions, k=5, beam_width=None):
+        """
+        For each description, up to max(k, beam_width) leaf codes as
+        (code, probability, prefix_probabilities) tuples, most likely first.
+        prefix_probabilities has the probability of every prefix on the path,
+        and of the section.
+        """
+        beam_width = beam_width or self.beam_width
+        with self.stage("nic.tokenize"):
+            features = self.vectorizer.transform(descriptions)
+
+        with self.stage("nic.classify"):
+            # The beam of every row, as parallel arrays: row, code prefix,
+            # probability and the entry it was expanded from
+            rows = np.arange(len(descriptions))
+            codes = np.full(len(descriptions), "", dtype=object)
+            probabilities = np.ones(len(descriptions))
+            levels = []
+            for depth in range(len(NIC_LEVELS)):
+                width = beam_width if depth < len(NIC_LEVELS) - 1 else max(beam_width, k)
+
+                # Score each prefix once for all the rows whose beam contains it
+                entries_by_prefix = defaultdict(list)
+                for entry, prefix in enumerate(codes):
+                    entries_by_prefix[prefix].append(entry)
+                expanded = []
+                for prefix, entries in entries_by_prefix.items():
+                    node = self.nodes[prefix]
+                    entries = np.array(entries)
+                    child_probabilities = self._node_probabilities(node, features[rows[entries]])
+                    if depth == 0:
+                        root_probabilities = child_probabilities
+                    n_children = len(node.children)
+                    expanded.append((
+                        np.repeat(rows[entries], n_children),
+                        np.tile(np.array(node.children, dtype=object), len(entries)),
+                        (probabilities[entries][:, None] * child_probabilities).ravel(),
+                        np.repeat(entries, n_children),
+                    ))
+                rows, codes, probabilities, parents = (np.concatenate(a) for a in zip(*expanded))
+
+                # Keep the width most likely children of each row, best first
+                order = np.lexsort((-probabilities, rows))
+                sorted_rows = rows[order]
+                rank = np.arange(len(order)) - np.searchsorted(sorted_rows, sorted_rows)
+                keep = order[rank < width]
+                rows, codes, probabilities, parents = rows[keep], codes[keep], probabilities[keep], parents[keep]
+                levels.append((codes, probabilities, parents))
+
+        # Sections are unions of divisions, so their probability is exact
+        root = self.nodes[""]
+        division_sections = np.array([nic_section(d) for d in root.children], dtype=object)
+
+        results = [[] for _ in descriptions]
+        for entry, row in enumerate(rows):
+            if len(results[row]) >= max(k, 1):
+                continue
+            path = {}
+            parent = entry
+            for level_codes, level_probabilities, level_parents in reversed(levels):
+                path[level_codes[parent]] = float(level_probabilities[parent])
+                parent = level_parents[parent]
+            section = nic_section(codes[entry])
+            path[section] = float(root_probabilities[row, division_sections == section].sum())
+            results[row].append((codes[entry], float(probabilities[entry]), path))
+        return results
+
+    def top_k(self, descriptions, k=5):
+        """
+        The k most likely codes for each description, as lists of
+        (nic_code, probability) pairs, like NICScorer.top_k
+        """
+        return [[(code, p) for code, p, _ in leaves[:k]] for leaves in self.beam_search(descriptions, k)]
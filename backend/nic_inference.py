@@ -0,0 +1,173 @@
+import json
+import os
+from contextlib import nullcontext
+
+import numpy as np
+
+NIC_CALIBRATION_FILE = "nic_calibration.json"
+
+
+def softmax(scores, temperature=1.0):
+    """Row-wise softmax of scores / temperature"""
+    scaled = scores / temperature
+    scaled = scaled - scaled.max(axis=1, keepdims=True)
+    exp = np.exp(scaled)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def fit_temperature(scores, labels, low=0.01, high=100.0, steps=60):
+    """
+    Temperature that minimizes the negative log-likelihood of softmax(scores / T)
+    for the true class indices in labels (temperature scaling, Guo et al. 2017).
+
+    A golden-section search over log(T); NLL is unimodal in T for fixed scores.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    labels = np.asarray(labels)
+
+    def nll(log_t):
+        probabilities = softmax(scores, np.exp(log_t))
+        return -np.mean(np.log(probabilities[np.arange(len(labels)), labels] + 1e-12))
+
+    a, b = np.log(low), np.log(high)
+    ratio = (np.sqrt(5) - 1) / 2
+    c, d = b - ratio * (b - a), a + ratio * (b - a)
+    for _ in range(steps):
+        if nll(c) < nll(d):
+            b, d = d, c
+            c = b - ratio * (b - a)
+        else:
+            a, c = c, d
+            d = a + ratio * (b - a)
+    log_t = (a + b) / 2
+    return float(np.exp(log_t)), float(nll(0.0)), float(nll(log_t))
+
+
+def save_calibration(models_dir, temperature, **details):
+    path = os.path.join(models_dir, NIC_CALIBRATION_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump({"temperature": temperature, **details}, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def remove_calibration(models_dir):
+    """
+    Delete a calibration left by an earlier model, so its temperature is not
+    applied to one it was not fitted for. True if there was one.
+    """
+    path = os.path.join(models_dir, NIC_CALIBRATION_FILE)
+    if not os.path.exists(path):
+        return False
+    os.remove(path)
+    return True
+
+
+def load_calibration(models_dir):
+    """Softmax temperature for the NIC classifier; None if it was never calibrated"""
+    path = os.path.join(models_dir, NIC_CALIBRATION_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return float(json.load(f)["temperature"])
+
+
+def linear_weights(classifier, n_classes):
+    """
+    (weights, intercept) of a fitted linear classifier with n_classes
+    classes, as a contiguous (n_features, n_classes) float64 matrix and a
+    vector, so scores are features @ weights + intercept
+    """
+    # float64 like sklearn, so ties break exactly as in predict()
+    coef = np.asarray(classifier.coef_, dtype=np.float64)
+    intercept = np.asarray(classifier.intercept_, dtype=np.float64)
+    if coef.shape[0] == 1 and n_classes == 2:
+        # Binary: one margin for the second class, its negation for the first
+        coef = np.vstack([-coef, coef])
+        intercept = np.concatenate([-intercept, intercept])
+    return np.ascontiguousarray(coef.T), intercept
+
+
+class NICScorer:
+    """
+    Fast inference for the TF-IDF + linear classifier pipeline.
+
+    The vectorizer runs once per batch, and the class scores for the whole
+    batch come from a single sparse-dense product with the classifier's
+    weights, transposed and made contiguous at load time. Scores are turned
+    into probabilities with a softmax at the fitted temperature, or at 1.0 if
+    the classifier was never calibrated (self.calibrated is then false). The
+    top k codes are selected with argpartition.
+
+    Pipelines whose last step has no linear coef_ fall back to
+    decision_function, with the same top-k and calibration.
+    """
+
+    def __init__(self, pipeline, temperature=None, timer=None):
+        self.pipeline = pipeline
+        self.temperature = temperature
+        self.calibrated = temperature is not None
+        self.timer = timer
+        classifier = pipeline[-1] if hasattr(pipeline, "steps") else pipeline
+        self.classes = [str(c) for c in classifier.classes_]
+
+        self.vectorizer = None
+        self.weights = None
+        if hasattr(pipeline, "steps") and hasattr(classifier, "coef_"):
+            self.vectorizer = pipeline[:-1]
+            self.weights, self.intercept = linear_weights(classifier, len(self.classes))
+
+    def stage(self, name):
+        return self.timer.time(name) if self.timer is not None else nullcontext()
+
+    def _pipeline_scores(self, descriptions):
+        scores = self.pipeline.decision_function(descriptions)
+        if scores.ndim == 1:
+            scores = np.column_stack([-scores, scores])
+        return scores
+
+    def _linear_scores(self, features):
+        # CSR x dense: touches only the non-zero TF-IDF entries
+        return np.asarray(features @ self.weights) + self.intercept
+
+    def decision_scores(self, descriptions):
+        """Raw class scores, one row per description"""
+        if self.weights is None:
+            return self._pipeline_scores(descriptions)
+        return self._linear_scores(self.vectorizer.transform(descriptions))
+
+    def _rank(self, scores, k):
+        scores = softmax(scores, self.temperature or 1.0)
+        k = min(k, scores.shape[1])
+        if k < scores.shape[1]:
+            top = np.sort(np.argpartition(-scores, k - 1, axis=1)[:, :k], axis=1)
+        else:
+            top = np.tile(np.arange(k), (len(scores), 1))
+        rows = np.arange(len(scores))[:, None]
+        # Stable, so equal scores keep class order like argmax
+        order = np.argsort(-scores[rows, top], axis=1, kind="stable")
+        top = top[rows, order]
+        return [
+            [(self.classes[j], float(scores[i, j])) for j in row]
+            for i, row in enumerate(top)
+        ]
+
+    def class_probabilities(self, descriptions):
+        """
+        Probability of every code (self.classes), one row per description;
+        a plain softmax of the scores if the scorer is not calibrated
+        """
+        return softmax(self.decision_scores(descriptions), self.temperature or 1.0)
+
+    def top_k(self, descriptions, k=5):
+        """
+        The k most likely codes for each description, as lists of
+        (nic_code, probability) pairs, most likely first
+        """
+        if self.weights is None:
+            with self.stage("nic.classify"):
+                return self._rank(self._pipeline_scores(descriptions), k)
+
+        with self.stage("nic.tokenize"):
+            features = self.vectorizer.transform(descriptions)
+        with self.stage("nic.classify"):
+            return self._rank(self._linear_scores(features), k)
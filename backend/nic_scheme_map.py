@@ -0,0 +1,116 @@
+import hashlib
+import os
+
+import numpy as np
+
+from artifacts import catalogue_digest, scheme_content_hash
+from eligibility import filters_key
+from vector_index import ExactIndex
+
+NIC_SCHEME_MAP_FILE = "nic_scheme_map.npz"
+
+
+def nic_content_hash(descriptions, encoder):
+    """Hash of what determines a NIC code's embedding: its descriptions and the encoder"""
+    text = "\n".join(sorted(descriptions))
+    return hashlib.sha1(f"{encoder}\0{text}".encode("utf-8")).hexdigest()[:16]
+
+
+def scheme_catalogue_version(scheme_metadata):
+    """
+    The catalogue digest of scheme metadata, or for artifacts written
+    without one, a digest of the scheme names, descriptions and attributes
+    """
+    if scheme_metadata.get("digest"):
+        return scheme_metadata["digest"]
+    hashes = [scheme_content_hash(d, "") for d in scheme_metadata["descriptions"]]
+    return catalogue_digest(scheme_metadata["scheme_names"], hashes,
+                            scheme_metadata.get("attributes"))
+
+
+def rank_schemes_for_codes(codes, code_vectors, scheme_vectors, eligibility, k):
+    """
+    The top k scheme rows and similarities for each code's vector, among
+    the schemes open to the code's sector. Returns (rows, similarities)
+    arrays of shape (len(codes), k); empty slots have row -1.
+    """
+    index = ExactIndex(scheme_vectors, normalized=True)
+    rows = np.full((len(codes), k), -1, dtype=np.int32)
+    similarities = np.zeros((len(codes), k), dtype=np.float32)
+    # Codes of the same division share an eligibility mask, so search them together
+    by_division = {}
+    for i, code in enumerate(codes):
+        by_division.setdefault(filters_key(nic_code=code), []).append(i)
+    for key, positions in by_division.items():
+        mask = eligibility.mask(key) if eligibility is not None else None
+        scores, ids = index.search(code_vectors[positions], k, mask=mask)
+        found = ids >= 0
+        rows[positions] = np.where(found, ids, -1)
+        similarities[positions] = np.where(found, scores, 0)
+    return rows, similarities
+
+
+class NICSchemeMap:
+    """
+    The top k schemes for every NIC code, ranked offline by the similarity
+    of each code's description embedding to the scheme embeddings.
+
+    Scheme rows refer to the catalogue whose scheme_catalogue_version() is
+    scheme_digest. Code
+    vectors and content hashes are kept so that rebuilds only encode new or
+    edited codes.
+    """
+
+    def __init__(self, codes, code_hashes, code_vectors, scheme_rows, similarities,
+                 scheme_digest, encoder):
+        self.codes = codes
+        self.code_hashes = code_hashes
+        self.code_vectors = code_vectors
+        self.scheme_rows = scheme_rows
+        self.similarities = similarities
+        self.scheme_digest = scheme_digest
+        self.encoder = encoder
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def k(self):
+        return self.scheme_rows.shape[1]
+
+    def rankings(self):
+        """code -> [(scheme_row, similarity), ...], best first"""
+        return {
+            str(code): [(int(row), float(similarity))
+                        for row, similarity in zip(rows, similarities) if row >= 0]
+            for code, rows, similarities in zip(self.codes, self.scheme_rows, self.similarities)
+        }
+
+    def save(self, path):
+        """Write the map to an .npz file, replacing any previous one atomically"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                codes=np.asarray(self.codes, dtype=str),
+                code_hashes=np.asarray(self.code_hashes, dtype=str),
+                code_vectors=self.code_vectors.astype(np.float32),
+                scheme_rows=self.scheme_rows.astype(np.int32),
+                similarities=self.similarities.astype(np.float32),
+                scheme_digest=np.array(self.scheme_digest),
+                encoder=np.array(self.encoder),
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["codes"].tolist(),
+                data["code_hashes"].tolist(),
+                data["code_vectors"],
+                data["scheme_rows"],
+                data["similarities"],
+                str(data["scheme_digest"]),
+                str(data["encoder"]),
+            )
@@ -0,0 +1,120 @@
+import collections
+import os
+import re
+import sys
+import threading
+import time
+
+
+def folded_stack(frame):
+    """A frame's call stack, outermost first, as 'func (file:line)' entries"""
+    entries = []
+    while frame is not None:
+        code = frame.f_code
+        entries.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(entries))
+
+
+class SlowRequestProfiler:
+    """
+    Sampling profiler that writes a profile for every slow request.
+
+    While any request is in flight, a background thread samples the stack
+    of every thread with sys._current_frames() every interval seconds. When
+    a request takes longer than threshold seconds, the samples taken during
+    it are written to output_dir in the folded (collapsed) stack format used
+    by py-spy and flamegraph.pl: one "thread;outer;...;inner count" line per
+    distinct stack.
+
+    Samples cover all threads, including the inference pool threads doing
+    the request's work; with concurrent requests, a profile also contains
+    the other requests' stacks. At most one profile is written per
+    min_dump_interval seconds.
+    """
+
+    def __init__(self, output_dir, threshold, interval=0.005, max_seconds=60,
+                 min_dump_interval=1.0):
+        self.output_dir = output_dir
+        self.threshold = threshold
+        self.interval = interval
+        self.min_dump_interval = min_dump_interval
+        self.dumps = 0
+        self._samples = collections.deque(maxlen=int(max_seconds / interval))
+        self._active = 0
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._last_dump = 0.0
+        self._thread = None
+        self._pid = None
+
+    def _ensure_sampler(self):
+        # Threads do not survive fork(), so each worker starts its own sampler
+        if self._thread is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="slow-request-profiler",
+                                            daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while True:
+            self._wake.wait()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            now = time.perf_counter()
+            stacks = [
+                f"{names.get(thread_id, thread_id)};{folded_stack(frame)}"
+                for thread_id, frame in sys._current_frames().items()
+                if thread_id != own_id
+            ]
+            self._samples.append((now, stacks))
+            time.sleep(self.interval)
+
+    def request_started(self):
+        with self._lock:
+            self._active += 1
+            self._ensure_sampler()
+            self._wake.set()
+
+    def request_finished(self, name, start, duration):
+        with self._lock:
+            self._active -= 1
+            if self._active == 0:
+                self._wake.clear()
+        if duration < self.threshold or start - self._last_dump < self.min_dump_interval:
+            return
+        self._last_dump = start
+
+        counts = collections.Counter()
+        for sampled_at, stacks in list(self._samples):
+            if start <= sampled_at <= start + duration:
+                counts.update(stacks)
+        if counts:
+            # Formatting and writing happen on a separate thread
+            threading.Thread(target=self._write, args=(name, duration, counts),
+                             daemon=True).start()
+
+    def _write(self, name, duration, counts):
+        os.makedirs(self.output_dir, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", name).strip("_")
+        path = os.path.join(
+            self.output_dir,
+            f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{slug}-{duration * 1000:.0f}ms.folded"
+        )
+        with open(path, "w") as f:
+            for stack, count in counts.most_common():
+                f.write(f"{stack} {count}\n")
+        self.dumps += 1
+        print(f"Slow request {name} took {duration * 1000:.0f} ms; profile written to {path}")
+
+
+def profiler_from_env():
+    """A SlowRequestProfiler if GOVBIZ_PROFILE_SLOW_MS is set, otherwise None"""
+    threshold_ms = float(os.getenv("GOVBIZ_PROFILE_SLOW_MS", "0"))
+    if threshold_ms <= 0:
+        return None
+    return SlowRequestProfiler(
+        output_dir=os.getenv("GOVBIZ_PROFILE_DIR", "profiles"),
+        threshold=threshold_ms / 1000,
+        interval=float(os.getenv("GOVBIZ_PROFILE_INTERVAL_MS", "5")) / 1000,
+    )
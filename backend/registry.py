@@ -0,0 +1,188 @@
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+
+@dataclass
+class ModelBundle:
+    """Every model and artifact needed to serve a request, at one version"""
+    version: str
+    nic_classifier: Any
+    nic_scorer: Any
+    nic_hierarchy: Any
+    scheme_index: Any
+    scheme_metadata: dict
+    sentence_model: Any
+    loaded_at: float = field(default_factory=time.time)
+    # Fingerprint of the NIC classifier files, to reuse it across reloads
+    nic_stamp: str = ""
+    # Catalogue changes since the previous bundle, if they are known exactly
+    scheme_delta: Optional[dict] = None
+    # Precomputed scheme eligibility masks (eligibility.EligibilityIndex)
+    eligibility: Any = None
+    # Serialized /schemes_by_nic responses by NIC code, if the map is current
+    nic_schemes: Optional[dict] = None
+    # Without a current map: the descriptions of each NIC code in nic_codes.csv,
+    # and the responses ranked from them on request
+    nic_code_descriptions: Optional[dict] = None
+    nic_schemes_ranked: dict = field(default_factory=dict)
+
+    @property
+    def scheme_embeddings(self):
+        return self.scheme_index.vectors
+
+
+class ModelRegistry:
+    """
+    Holds the model bundle currently being served and swaps in new versions.
+
+    A bundle's version is a hash of the names, sizes and modification times
+    of the files in models_dir. Reloading builds a complete new bundle with
+    load_fn, warms it up with warmup_fn and only then replaces the current
+    reference in a single assignment. Requests read the reference once and
+    keep using that bundle, so in-flight requests finish on the version they
+    started with while new requests see the new one.
+
+    If loading or warm-up fails, the current bundle keeps serving and the
+    error is kept in last_error.
+    """
+
+    def __init__(self, models_dir, load_fn, warmup_fn=None):
+        self.models_dir = models_dir
+        self.load_fn = load_fn
+        self.warmup_fn = warmup_fn
+        self.current: Optional[ModelBundle] = None
+        self.loading = False
+        self.last_error = None
+        self.last_reload_seconds = None
+        self.swap_count = 0
+        self._listeners = []
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self._stop_watching = threading.Event()
+
+    def on_swap(self, callback):
+        """Call callback(old_bundle, new_bundle) after every swap"""
+        self._listeners.append(callback)
+
+    def fingerprint(self, names=None):
+        """Version string for the artifacts currently on disk, or only the named ones"""
+        digest = hashlib.sha1()
+        for name in sorted(os.listdir(self.models_dir) if names is None else names):
+            if name.endswith(".tmp") or name.startswith("."):
+                continue
+            path = os.path.join(self.models_dir, name)
+            if not os.path.exists(path):
+                digest.update(f"{name}:missing;".encode())
+                continue
+            stat = os.stat(path)
+            digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        return digest.hexdigest()[:12]
+
+    def load(self, force=False):
+        """
+        Load the artifacts on disk and swap them in.
+
+        Without force, nothing is loaded if the current bundle already has
+        the on-disk version. Returns the bundle being served afterwards.
+        """
+        with self._reload_lock:
+            version = self.fingerprint()
+            if not force and self.current is not None and self.current.version == version:
+                return self.current
+
+            self.loading = True
+            start = time.perf_counter()
+            try:
+                bundle = self.load_fn(version, self.current)
+                if self.warmup_fn is not None:
+                    self.warmup_fn(bundle)
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                self.loading = False
+
+            self.last_reload_seconds = time.perf_counter() - start
+            self.last_error = None
+            self.swap(bundle)
+            return bundle
+
+    def swap(self, bundle):
+        previous = self.current
+        self.current = bundle
+        self.swap_count += 1
+        for callback in self._listeners:
+            callback(previous, bundle)
+
+    def reload_in_background(self, force=False):
+        """Start a reload on a background thread; False if one is already running"""
+        if self.loading or self._reload_lock.locked():
+            return False
+
+        def run():
+            try:
+                self.load(force=force)
+            except Exception as e:
+                print(f"Model reload failed, still serving {self.version}: {e}")
+
+        threading.Thread(target=run, name="model-reload", daemon=True).start()
+        return True
+
+    def ensure_version(self, version):
+        """Return the current bundle, reloading first if it is not at version"""
+        if self.current is None or self.current.version != version:
+            self.load()
+        return self.current
+
+    def watch(self, interval):
+        """Poll models_dir and reload when its contents change and settle"""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop_watching.clear()
+
+        def run():
+            pending = failed = None
+            while not self._stop_watching.wait(interval):
+                try:
+                    version = self.fingerprint()
+                except OSError:
+                    continue
+                if version in (self.version, failed):
+                    pending = None
+                elif version == pending:
+                    # Unchanged for a whole interval, so writers have finished
+                    try:
+                        self.load()
+                        print(f"Reloaded models, now serving {self.version}")
+                    except Exception as e:
+                        # Not retried until the files change again
+                        failed = version
+                        print(f"Model reload failed, still serving {self.version}: {e}")
+                    pending = None
+                else:
+                    pending = version
+
+        self._watcher = threading.Thread(target=run, name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop_watching.set()
+
+    @property
+    def version(self):
+        return self.current.version if self.current is not None else None
+
+    def status(self):
+        return {
+            "version": self.version,
+            "loaded_at": self.current.loaded_at if self.current is not None else None,
+            "loading": self.loading,
+            "swap_count": self.swap_count,
+            "last_reload_seconds": self.last_reload_seconds,
+            "last_error": self.last_error,
+            "watching": self._watcher is not None and self._watcher.is_alive(),
+        }
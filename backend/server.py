@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Production server for the GovBizConnect API.
+
+The master process loads every model once, then forks the worker processes.
+Workers inherit the loaded models copy-on-write instead of each loading its
+own copy, so memory grows far less than linearly with the worker count and
+new workers start serving immediately.
+
+Each worker is given its own share of the CPU: BLAS/OpenMP and torch thread
+pools are sized so that workers x inference threads x math threads does not
+exceed the number of cores.
+
+Run from the backend directory:
+    python server.py --workers 4 --port 8000
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+
+def default_math_threads(workers):
+    """Math threads per inference call so the whole server fits the cores"""
+    inference_threads = int(os.getenv("GOVBIZ_EXECUTOR_WORKERS", "4"))
+    return max(1, (os.cpu_count() or 1) // (workers * inference_threads))
+
+
+def limit_threads(threads):
+    """Cap BLAS, OpenMP and torch thread pools for this process"""
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+    # Rust tokenizers spawn their own pool, which is unsafe after fork()
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+    if "torch" in sys.modules:
+        import torch
+        torch.set_num_threads(threads)
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(threads)
+    except ImportError:
+        pass
+
+
+def bind_socket(host, port, backlog=2048):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock, args):
+    """Serve requests on the shared socket until told to stop"""
+    import uvicorn
+
+    # The master's handlers must not run in the worker; uvicorn installs its own
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    limit_threads(args.threads)
+
+    config = uvicorn.Config(
+        app,
+        log_level=args.log_level,
+        timeout_keep_alive=args.keep_alive,
+        lifespan="on",
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def spawn_worker(app, sock, args):
+    pid = os.fork()
+    if pid == 0:
+        try:
+            run_worker(app, sock, args)
+        finally:
+            os._exit(0)
+    return pid
+
+
+def serve(args):
+    limit_threads(args.threads)
+
+    # Imported only now so numpy and torch pick up the thread limits
+    import main as backend
+
+    start = time.perf_counter()
+    backend.load_models()
+    print(f"Models loaded in master (pid {os.getpid()}) in {time.perf_counter() - start:.1f}s")
+
+    # Move everything loaded so far out of the garbage collector's reach, so
+    # collections in the workers do not write to (and copy) shared pages
+    gc.collect()
+    gc.freeze()
+
+    sock = bind_socket(args.host, args.port)
+    workers = {spawn_worker(backend.app, sock, args) for _ in range(args.workers)}
+    print(f"Serving on http://{args.host}:{args.port} with {args.workers} workers "
+          f"({args.threads} math threads each): {sorted(workers)}")
+
+    stopping = False
+
+    def stop(signum, _frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        workers.discard(pid)
+        if not stopping:
+            print(f"Worker {pid} exited with status {status}, restarting")
+            workers.add(spawn_worker(backend.app, sock, args))
+
+    sock.close()
+    print("All workers stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork production server")
+    parser.add_argument("--host", default=os.getenv("GOVBIZ_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("GOVBIZ_PORT", "8000")))
+    parser.add_argument("--workers", type=int,
+                        default=int(os.getenv("GOVBIZ_WORKERS", str(os.cpu_count() or 1))))
+    parser.add_argument("--threads", type=int, default=None,
+                        help="math threads per inference call (default: cores / "
+                             "(workers x GOVBIZ_EXECUTOR_WORKERS))")
+    parser.add_argument("--keep-alive", type=int, default=5)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+    if args.threads is None:
+        args.threads = default_math_threads(args.workers)
+    serve(args)
+
+
+if __name__ == "__main__":
+    main()
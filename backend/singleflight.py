@@ -0,0 +1,62 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Collapses concurrent identical computations into one.
+
+    The first do(key, fn) runs fn() as a task; calls with the same key that
+    arrive while it is still running wait for that task instead of starting
+    their own, and all of them get its result or its exception. The key is
+    released as soon as the task finishes, so later calls compute again;
+    keeping finished results is the caches' job.
+
+    A caller that is cancelled (for example because its client went away)
+    stops waiting without cancelling the computation for the others.
+
+    With enabled=False every call runs its own fn(), but is still counted.
+    Must only be used from the event loop thread.
+    """
+
+    def __init__(self, name, enabled=True):
+        self.name = name
+        self.enabled = enabled
+        self.calls = 0
+        self.executed = 0
+        self._flights = {}
+
+    @property
+    def in_flight(self):
+        return len(self._flights)
+
+    async def do(self, key, fn):
+        """Return the result of fn(), shared with concurrent calls for key"""
+        self.calls += 1
+        if not self.enabled:
+            self.executed += 1
+            return await fn()
+
+        task = self._flights.get(key)
+        if task is None:
+            self.executed += 1
+            task = asyncio.ensure_future(fn())
+            self._flights[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        # Mark the exception retrieved in case every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "executed": self.executed,
+            "shared": self.calls - self.executed,
+            "shared_rate": (self.calls - self.executed) / self.calls if self.calls else 0.0,
+            "in_flight": self.in_flight,
+            "enabled": self.enabled,
+        }
@@ -0,0 +1,63 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+class StagedLoader:
+    """
+    Runs independent loading steps on parallel threads and tracks each one.
+
+    steps maps a component name to a function of no arguments that loads
+    it; all of them start at once. Each component's state (pending,
+    loading, ready or failed) and load time is kept, so callers can use a
+    component as soon as it is ready instead of waiting for the slowest.
+    Loading is mostly file reads and the import and initialization of
+    native libraries, which release the GIL for much of the time, so the
+    steps overlap even on threads. version labels what is being loaded.
+    """
+
+    def __init__(self, steps, version=None):
+        self.version = version
+        self.states = {name: "pending" for name in steps}
+        self.seconds = {}
+        self.errors = {}
+        executor = ThreadPoolExecutor(max_workers=max(1, len(steps)),
+                                      thread_name_prefix="model-load")
+        self._futures = {name: executor.submit(self._run, name, fn) for name, fn in steps.items()}
+        # The threads exit once their step is done
+        executor.shutdown(wait=False)
+
+    def _run(self, name, fn):
+        self.states[name] = "loading"
+        start = time.perf_counter()
+        try:
+            result = fn()
+        except Exception as e:
+            self.errors[name] = f"{type(e).__name__}: {e}"
+            self.states[name] = "failed"
+            raise
+        finally:
+            self.seconds[name] = time.perf_counter() - start
+        self.states[name] = "ready"
+        return result
+
+    def ready(self, name):
+        return self.states.get(name) == "ready"
+
+    def result(self, name, timeout=None):
+        """The loaded component, waiting for it if needed; raises if its step failed"""
+        return self._futures[name].result(timeout)
+
+    def results(self):
+        """Wait for every step; the first failure is raised once all have finished"""
+        wait(self._futures.values())
+        return {name: future.result() for name, future in self._futures.items()}
+
+    def status(self):
+        return {
+            name: {
+                "state": state,
+                "seconds": round(self.seconds[name], 3) if name in self.seconds else None,
+                "error": self.errors.get(name),
+            }
+            for name, state in self.states.items()
+        }
@@ -0,0 +1,365 @@
+import math
+
+import numpy as np
+
+# Rows scored per block when vectors are stored in reduced precision
+SCORE_BLOCK_ROWS = 16384
+# int8 rows are upcast in smaller blocks, which stay in cache while scored
+QUANTIZED_BLOCK_ROWS = 512
+# Rows gathered per block when a mask selects a subset, small enough to stay in cache
+GATHER_BLOCK_ROWS = 2048
+# Above this share of selected rows, scoring every row and discarding the
+# others is cheaper than gathering the selected ones
+MASK_GATHER_MAX_SHARE = 0.5
+
+
+def normalize_rows(vectors):
+    """Return a float32 copy of vectors with every row scaled to unit length"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def top_k(scores, k):
+    """
+    Indices and values of the k largest scores in each row, best first.
+
+    Uses argpartition so only the k winners are sorted, not the whole row.
+    """
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        empty = np.empty((scores.shape[0], 0))
+        return empty.astype(scores.dtype), empty.astype(np.int64)
+    if k < scores.shape[1]:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind="stable")
+    return (
+        np.take_along_axis(candidate_scores, order, axis=1),
+        np.take_along_axis(candidates, order, axis=1),
+    )
+
+
+class ExactIndex:
+    """
+    Brute-force cosine search over a pre-normalized matrix.
+
+    Scores are a single matrix product against unit-length rows, so there is
+    no per-request renormalization of the catalogue. The matrix may be a
+    read-only memory map; float16 matrices are upcast block by block so no
+    full float32 copy is ever made. QuantizedIndex stores int8 codes instead.
+    """
+
+    kind = "exact"
+
+    def __init__(self, vectors, normalized=False):
+        self.vectors = vectors if normalized else normalize_rows(vectors)
+
+    def __len__(self):
+        return self.vectors.shape[0]
+
+    def search(self, queries, k, mask=None):
+        """
+        Return (scores, ids) arrays of shape (n_queries, k), best first.
+        With a boolean mask, only the rows it selects are scored; slots
+        beyond the number of selected rows have id -1.
+        """
+        return _search_rows(normalize_rows(queries), self.vectors, k, mask)
+
+
+class IVFIndex:
+    """
+    Inverted-file (IVF) approximate search over the same normalized vectors.
+
+    Vectors are clustered with spherical k-means into n_lists cells. A query
+    is scored only against the rows of its n_probe nearest cells, which cuts
+    the work per query by roughly n_lists / n_probe at some cost in recall.
+
+    The index stores only centroids and cell membership; the vectors
+    themselves are shared with the exact index.
+    """
+
+    kind = "ivf"
+
+    def __init__(self, vectors, centroids, list_ids, list_offsets, n_probe=8):
+        self.vectors = vectors
+        self.centroids = centroids
+        self.list_ids = list_ids
+        self.list_offsets = list_offsets
+        self.n_probe = n_probe
+
+    def __len__(self):
+        return self.vectors.shape[0]
+
+    @property
+    def n_lists(self):
+        return self.centroids.shape[0]
+
+    @classmethod
+    def build(cls, vectors, n_lists=None, n_iter=20, sample_size=None, seed=42,
+              n_probe=8):
+        """Train centroids with spherical k-means and assign every vector to a cell"""
+        n = vectors.shape[0]
+        if n_lists is None:
+            n_lists = int(round(math.sqrt(n)))
+        n_lists = max(1, min(n_lists, n))
+
+        rng = np.random.default_rng(seed)
+        # Training on a sample keeps build time flat for very large catalogues
+        sample_size = sample_size or min(n, 256 * n_lists)
+        sample = np.asarray(
+            vectors[rng.choice(n, size=sample_size, replace=False)], dtype=np.float32
+        )
+        centroids = sample[rng.choice(sample_size, size=n_lists, replace=False)].copy()
+
+        for _ in range(n_iter):
+            assignment = _assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            counts = np.bincount(assignment, minlength=n_lists)
+            empty = counts == 0
+            if empty.any():
+                # Reseed empty cells with random sample points
+                sums[empty] = sample[rng.choice(sample_size, size=int(empty.sum()))]
+            centroids = normalize_rows(sums)
+
+        assignment = _assign(vectors, centroids)
+        list_ids = np.argsort(assignment, kind="stable").astype(np.int64)
+        counts = np.bincount(assignment, minlength=n_lists)
+        list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return cls(vectors, centroids, list_ids, list_offsets, n_probe=n_probe)
+
+    def assignment(self):
+        """Cell of every vector, indexed by row"""
+        assignment = np.empty(len(self.list_ids), dtype=np.int64)
+        counts = np.diff(self.list_offsets)
+        assignment[self.list_ids] = np.repeat(np.arange(self.n_lists), counts)
+        return assignment
+
+    def updated(self, vectors, previous_rows):
+        """
+        The index over a new version of the catalogue, keeping the centroids.
+
+        previous_rows[i] is the row in this index that vectors[i] was copied
+        from, or -1 for a new or re-embedded vector. Kept rows stay in their
+        cells; only the other rows are assigned to their nearest centroid.
+        Centroids drift from the data as the catalogue changes, so rebuild
+        the index after large updates.
+        """
+        previous_rows = np.asarray(previous_rows, dtype=np.int64)
+        assignment = np.empty(len(previous_rows), dtype=np.int64)
+        kept = previous_rows >= 0
+        assignment[kept] = self.assignment()[previous_rows[kept]]
+        new_rows = np.flatnonzero(~kept)
+        if new_rows.size:
+            assignment[new_rows] = _assign(np.asarray(vectors[new_rows]), self.centroids)
+
+        list_ids = np.argsort(assignment, kind="stable").astype(np.int64)
+        counts = np.bincount(assignment, minlength=self.n_lists)
+        list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return IVFIndex(vectors, self.centroids, list_ids, list_offsets, n_probe=self.n_probe)
+
+    def search(self, queries, k, n_probe=None, mask=None):
+        """
+        Return (scores, ids) arrays of shape (n_queries, k), best first.
+        With a boolean mask, only the rows it selects are candidates. When
+        it selects fewer rows than the probed cells hold on average, they
+        are searched exactly instead.
+        """
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        if mask is not None and np.count_nonzero(mask) <= len(self) * n_probe / self.n_lists:
+            return ExactIndex(self.vectors, normalized=True).search(queries, k, mask)
+        queries = normalize_rows(queries)
+        _, probes = top_k(queries @ self.centroids.T, n_probe)
+
+        all_scores = np.full((queries.shape[0], k), -np.inf, dtype=np.float32)
+        all_ids = np.full((queries.shape[0], k), -1, dtype=np.int64)
+        for row, query in enumerate(queries):
+            candidates = np.concatenate([
+                self.list_ids[self.list_offsets[cell]:self.list_offsets[cell + 1]]
+                for cell in probes[row]
+            ])
+            if mask is not None:
+                candidates = candidates[mask[candidates]]
+            if candidates.size == 0:
+                continue
+            rows = np.asarray(self.vectors[candidates], dtype=np.float32)
+            scores, positions = top_k((rows @ query)[None, :], k)
+            found = scores.shape[1]
+            all_scores[row, :found] = scores[0]
+            all_ids[row, :found] = candidates[positions[0]]
+        return all_scores, all_ids
+
+    def save(self, path):
+        """Persist centroids and cell membership (not the vectors) to an .npz file"""
+        np.savez(
+            path,
+            kind=np.array(self.kind),
+            centroids=self.centroids,
+            list_ids=self.list_ids,
+            list_offsets=self.list_offsets,
+            n_probe=np.array(self.n_probe),
+        )
+
+    @classmethod
+    def load(cls, path, vectors, n_probe=None):
+        with np.load(path, allow_pickle=False) as data:
+            if data["list_ids"].shape[0] != vectors.shape[0]:
+                raise ValueError(
+                    f"IVF index covers {data['list_ids'].shape[0]} vectors, "
+                    f"embeddings have {vectors.shape[0]}"
+                )
+            return cls(
+                vectors,
+                data["centroids"],
+                data["list_ids"],
+                data["list_offsets"],
+                n_probe=n_probe or int(data["n_probe"]),
+            )
+
+
+class QuantizedIndex:
+    """
+    Exact search over int8 scalar-quantized vectors, with re-ranking.
+
+    Dimension j of the normalized vectors is stored as round(x_j / s_j)
+    with s_j = max|x_j| / 127, a quarter of the float32 size. A query is
+    multiplied by the scales and scored against the int8 rows, upcast in
+    small blocks. The top rerank candidates are then re-scored against the
+    full-precision vectors, reading only those rows. The vectors can stay
+    a memory map: the pages read are clean page cache, shared between
+    workers and dropped by the kernel under pressure, not private memory.
+    With rerank=0 the full-precision vectors are never read and the
+    approximate scores are returned as they are.
+    """
+
+    kind = "int8"
+
+    def __init__(self, vectors, codes, scales, rerank=50):
+        if codes.shape != vectors.shape:
+            raise ValueError(
+                f"Quantized vectors have shape {codes.shape}, vectors have {vectors.shape}"
+            )
+        self.vectors = vectors
+        self.codes = codes
+        self.scales = np.asarray(scales, dtype=np.float32)
+        self.rerank = rerank
+
+    def __len__(self):
+        return self.codes.shape[0]
+
+    @classmethod
+    def build(cls, vectors, rerank=50):
+        """Quantize normalized vectors in memory"""
+        codes, scales = quantize_rows(vectors)
+        return cls(vectors, codes, scales, rerank=rerank)
+
+    def search(self, queries, k, mask=None):
+        """
+        Return (scores, ids) arrays of shape (n_queries, k), best first, as
+        ExactIndex.search does. Scores are exact cosine similarities when
+        re-ranking, and their int8 approximations otherwise.
+        """
+        queries = normalize_rows(queries)
+        candidates = max(k, self.rerank)
+        scores, ids = _search_rows(queries * self.scales, self.codes, candidates, mask,
+                                   block_rows=QUANTIZED_BLOCK_ROWS)
+        if not self.rerank:
+            return scores[:, :k], ids[:, :k]
+
+        width = min(k, ids.shape[1])
+        all_scores = np.full((queries.shape[0], width), -np.inf, dtype=np.float32)
+        all_ids = np.full((queries.shape[0], width), -1, dtype=np.int64)
+        for row, query in enumerate(queries):
+            found = ids[row][ids[row] >= 0]
+            if found.size == 0:
+                continue
+            rows = np.asarray(self.vectors[found], dtype=np.float32)
+            exact_scores, positions = top_k((rows @ query)[None, :], k)
+            count = exact_scores.shape[1]
+            all_scores[row, :count] = exact_scores[0]
+            all_ids[row, :count] = found[positions[0]]
+        return all_scores, all_ids
+
+
+def quantize_rows(vectors, chunk_size=65536):
+    """
+    int8 codes of normalized vectors and the float32 scale of each
+    dimension, such that vectors ~= codes * scales
+    """
+    scales = np.zeros(vectors.shape[1], dtype=np.float32)
+    for start in range(0, vectors.shape[0], chunk_size):
+        block = np.abs(np.asarray(vectors[start:start + chunk_size], dtype=np.float32))
+        np.maximum(scales, block.max(axis=0), out=scales)
+    scales /= 127
+    scales[scales == 0] = 1.0
+    codes = np.empty(vectors.shape, dtype=np.int8)
+    for start in range(0, vectors.shape[0], chunk_size):
+        block = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+        codes[start:start + chunk_size] = np.clip(np.rint(block / scales), -127, 127)
+    return codes, scales
+
+
+def _search_rows(queries, vectors, k, mask=None, block_rows=SCORE_BLOCK_ROWS):
+    """
+    Top k of queries (already normalized) against vectors. With a boolean
+    mask, only the rows it selects are scored; slots beyond the number of
+    selected rows have id -1.
+    """
+    if mask is None:
+        return top_k(_score_blocks(queries, vectors, block_rows=block_rows), k)
+
+    rows = np.flatnonzero(mask)
+    all_scores = np.full((queries.shape[0], k), -np.inf, dtype=np.float32)
+    all_ids = np.full((queries.shape[0], k), -1, dtype=np.int64)
+    if rows.size == 0:
+        return all_scores, all_ids
+    if rows.size > MASK_GATHER_MAX_SHARE * vectors.shape[0]:
+        scores = _score_blocks(queries, vectors, block_rows=block_rows)
+        scores[:, ~mask] = -np.inf
+        scores, ids = top_k(scores, min(k, rows.size))
+    else:
+        scores, positions = top_k(_score_blocks(queries, vectors, rows), k)
+        ids = rows[positions]
+    all_scores[:, :scores.shape[1]] = scores
+    all_ids[:, :scores.shape[1]] = ids
+    return all_scores, all_ids
+
+
+def _score_blocks(queries, vectors, rows=None, block_rows=SCORE_BLOCK_ROWS):
+    """
+    Scores of queries against vectors (or the given rows of them). Float32
+    matrices are scored in one product; reduced-precision rows are upcast
+    block by block.
+    """
+    if rows is None and vectors.dtype == np.float32:
+        return queries @ vectors.T
+    if rows is None:
+        count = vectors.shape[0]
+    else:
+        count, block_rows = rows.size, GATHER_BLOCK_ROWS
+    scores = np.empty((queries.shape[0], count), dtype=np.float32)
+    for start in range(0, count, block_rows):
+        block = (vectors[start:start + block_rows] if rows is None
+                 else vectors[rows[start:start + block_rows]])
+        scores[:, start:start + block_rows] = queries @ np.asarray(block, dtype=np.float32).T
+    return scores
+
+
+def _assign(vectors, centroids, chunk_size=65536):
+    """Index of the nearest centroid for each row, computed in chunks"""
+    assignment = np.empty(vectors.shape[0], dtype=np.int64)
+    for start in range(0, vectors.shape[0], chunk_size):
+        block = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+        assignment[start:start + chunk_size] = np.argmax(block @ centroids.T, axis=1)
+    return assignment
+
+
+INDEX_TYPES = {
+    ExactIndex.kind: ExactIndex,
+    IVFIndex.kind: IVFIndex,
+    QuantizedIndex.kind: QuantizedIndex,
+}
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Recall-vs-latency benchmark for scheme retrieval indexes.
+
+Builds a synthetic catalogue of unit vectors with cluster structure similar
+to sentence embeddings, then compares per-query latency of:
+
+  * baseline: sklearn cosine_similarity + full argsort (the original path)
+  * exact:    pre-normalized matrix product + argpartition top-k
+  * ivf:      IVF index at several n_probe settings
+
+Recall@k is measured against the exact top-k.
+
+Run from the project root:
+    python benchmarks/ann_benchmark.py --size 100000 --queries 200
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from vector_index import ExactIndex, IVFIndex, normalize_rows
+
+
+def synthetic_catalogue(size, dim, n_topics, seed, spread=2.0):
+    """Unit vectors scattered around n_topics random topic directions"""
+    rng = np.random.default_rng(seed)
+    topics = normalize_rows(rng.standard_normal((n_topics, dim)))
+    members = rng.integers(0, n_topics, size=size)
+    noise = rng.standard_normal((size, dim)) / np.sqrt(dim)
+    return normalize_rows(topics[members] + spread * noise)
+
+
+def synthetic_queries(catalogue, count, seed):
+    """Queries near random catalogue rows, like paraphrased descriptions"""
+    rng = np.random.default_rng(seed + 1)
+    picks = catalogue[rng.choice(catalogue.shape[0], size=count, replace=False)]
+    noise = rng.standard_normal(picks.shape) / np.sqrt(picks.shape[1])
+    return normalize_rows(picks + 0.3 * noise)
+
+
+def time_queries(search, queries):
+    """Per-query latencies in milliseconds and the returned ids"""
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        ids = search(query[None, :])
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append(ids)
+    return np.array(latencies), np.vstack(results)
+
+
+def recall(found, truth):
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def report(name, latencies, found=None, truth=None):
+    line = (f"{name:<22} p50 {np.percentile(latencies, 50):8.3f} ms   "
+            f"p99 {np.percentile(latencies, 99):8.3f} ms")
+    if truth is not None:
+        line += f"   recall {recall(found, truth):.3f}"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--topics", type=int, default=500)
+    parser.add_argument("--spread", type=float, default=2.0,
+                        help="noise around each topic; higher means harder for IVF")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--n-lists", type=int, default=None)
+    parser.add_argument("--n-probe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"Catalogue: {args.size} x {args.dim}, {args.queries} queries, k={args.k}")
+    catalogue = synthetic_catalogue(args.size, args.dim, args.topics, args.seed, args.spread)
+    queries = synthetic_queries(catalogue, args.queries, args.seed)
+
+    exact = ExactIndex(catalogue, normalized=True)
+    truth = exact.search(queries, args.k)[1]
+
+    try:
+        from sklearn.metrics.pairwise import cosine_similarity
+
+        def baseline(query):
+            similarities = cosine_similarity(query, catalogue)[0]
+            return np.argsort(similarities)[::-1][:args.k][None, :]
+
+        latencies, found = time_queries(baseline, queries)
+        report("cosine + argsort", latencies, found, truth)
+    except ImportError:
+        print("scikit-learn not installed, skipping baseline")
+
+    latencies, found = time_queries(lambda q: exact.search(q, args.k)[1], queries)
+    report("exact (argpartition)", latencies, found, truth)
+
+    start = time.perf_counter()
+    ivf = IVFIndex.build(catalogue, n_lists=args.n_lists, seed=args.seed)
+    print(f"IVF build: {ivf.n_lists} lists in {time.perf_counter() - start:.1f}s")
+
+    for n_probe in args.n_probe:
+        if n_probe > ivf.n_lists:
+            continue
+        latencies, found = time_queries(
+            lambda q: ivf.search(q, args.k, n_probe=n_probe)[1], queries
+        )
+        report(f"ivf n_probe={n_probe}", latencies, found, truth)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Latency and throughput benchmark for /get_nic, /get_schemes and /analyze.
+
+Sends a synthetic corpus of business descriptions to each endpoint at one or
+more concurrency levels and reports, per endpoint and concurrency:
+
+  p50/p95/p99   request latency in milliseconds
+  rps           completed requests per second
+  stages        mean time per call of each backend stage (tokenize, encode,
+                similarity, classify, serialize), from GET /stats/stages
+
+Modes:
+  asgi  drives the FastAPI app in-process through httpx's ASGI transport,
+        which measures the application without network or server overhead
+  http  sends real HTTP requests to a running server (--url)
+
+Descriptions are unique by default so the response caches do not hide the
+model cost; --repeat-fraction sends some descriptions more than once.
+
+Results are written as JSON tagged with the git commit, so runs on two
+commits can be compared with --compare.
+
+Run from the project root:
+    python benchmarks/api_benchmark.py --mode asgi --concurrency 1 8 32
+    python benchmarks/api_benchmark.py --mode http --url http://localhost:8000
+    python benchmarks/api_benchmark.py --compare benchmarks/results/old.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+BACKEND_DIR = os.path.join(ROOT_DIR, "backend")
+RESULTS_DIR = os.path.join(ROOT_DIR, "benchmarks", "results")
+ENDPOINTS = ("get_nic", "get_schemes", "analyze")
+# Stages recorded by each endpoint, by name prefix
+STAGE_PREFIXES = {
+    "get_nic": ("nic.",),
+    "get_schemes": ("schemes.",),
+    "analyze": ("nic.", "schemes.", "analyze."),
+}
+
+OPENINGS = [
+    "We are a", "Our company is a", "I run a", "Family-owned", "Newly registered",
+    "Women-led", "Rural", "Export-oriented", "Small", "Medium-sized",
+]
+BUSINESSES = [
+    "food processing unit", "textile weaving business", "software development firm",
+    "dairy cooperative", "auto parts manufacturer", "handicraft workshop",
+    "organic farm", "pharmaceutical distributor", "solar panel installer",
+    "logistics and transport company", "bakery", "furniture manufacturer",
+    "mobile repair shop", "tourism and homestay operator", "rice mill",
+    "leather goods maker", "fish processing plant", "printing press",
+]
+DETAILS = [
+    "that sells mainly to local retailers", "with about {n} employees",
+    "looking for a working capital loan", "planning to buy new machinery",
+    "operating from a {place}", "that wants to start exporting",
+    "registered as a micro enterprise", "supplying government departments",
+    "run by first-generation entrepreneurs", "seeking a subsidy for technology upgrades",
+    "that trains local youth", "with annual turnover of {n} lakh rupees",
+    "focused on sustainable and eco-friendly products", "using traditional methods",
+]
+PLACES = ["village", "district town", "industrial estate", "metro city", "tribal area"]
+
+
+def synthetic_corpus(size, seed, repeat_fraction=0.0):
+    """
+    Business descriptions of realistic length: a business type plus 1-6
+    details, so most are 10 to 40 words long like real form submissions
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(size):
+        if corpus and rng.random() < repeat_fraction:
+            corpus.append(rng.choice(corpus))
+            continue
+        details = rng.sample(DETAILS, rng.randint(1, 6))
+        text = f"{rng.choice(OPENINGS)} {rng.choice(BUSINESSES)} " + ", ".join(details)
+        text = text.format(n=rng.randint(2, 500), place=rng.choice(PLACES))
+        # A trailing id keeps every description unique unless repeated above
+        corpus.append(f"{text} (ref {seed}-{i})")
+    return corpus
+
+
+def summarize(latencies, elapsed, statuses):
+    values = np.array(latencies) * 1000
+    ok = statuses.get(200, 0)
+    return {
+        "requests": len(latencies),
+        "errors": len(latencies) - ok,
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "rps": round(ok / elapsed, 1),
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p95_ms": round(float(np.percentile(values, 95)), 2),
+        "p99_ms": round(float(np.percentile(values, 99)), 2),
+        "max_ms": round(float(values.max()), 2),
+    }
+
+
+def stage_delta(before, after, endpoint):
+    """Mean ms per call of each stage recorded between two /stats/stages snapshots"""
+    stages = {}
+    for stage, snapshot in after.items():
+        if not stage.startswith(STAGE_PREFIXES[endpoint]):
+            continue
+        count = snapshot["count"] - before.get(stage, {}).get("count", 0)
+        total = snapshot["sum"] - before.get(stage, {}).get("sum", 0.0)
+        if count:
+            stages[stage] = {"calls": count, "mean_ms": round(total / count, 3)}
+    return stages
+
+
+async def run_level(client, endpoint, corpus, concurrency):
+    queue = list(reversed(corpus))
+    latencies, statuses = [], {}
+
+    async def worker():
+        while queue:
+            description = queue.pop()
+            start = time.perf_counter()
+            response = await client.post(f"/{endpoint}", json={"description": description})
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return summarize(latencies, time.perf_counter() - start, statuses)
+
+
+async def run_benchmark(client, args):
+    results = []
+    for endpoint in args.endpoints:
+        for level, concurrency in enumerate(args.concurrency):
+            # A fresh slice per level so earlier levels do not warm the caches
+            seed = args.seed + 1000 * ENDPOINTS.index(endpoint) + level
+            corpus = synthetic_corpus(args.warmup + args.requests, seed, args.repeat_fraction)
+            warmup, corpus = corpus[:args.warmup], corpus[args.warmup:]
+            await run_level(client, endpoint, warmup, concurrency)
+
+            before = (await client.get("/stats/stages")).json()
+            result = {"endpoint": endpoint, "concurrency": concurrency}
+            result.update(await run_level(client, endpoint, corpus, concurrency))
+            after = (await client.get("/stats/stages")).json()
+            result["stages"] = stage_delta(before, after, endpoint)
+            results.append(result)
+            print(json.dumps(result))
+    return results
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    cwd=ROOT_DIR, capture_output=True, text=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def compare(old_path, new_results):
+    with open(old_path) as f:
+        old = json.load(f)
+    old_results = {(r["endpoint"], r["concurrency"]): r for r in old["results"]}
+    print(f"\nCompared with {old.get('commit', '?')[:12]} ({old_path}):")
+    print(f"{'endpoint':<14}{'conc':>6}{'p50_ms':>18}{'p99_ms':>18}{'rps':>18}")
+    for result in new_results:
+        previous = old_results.get((result["endpoint"], result["concurrency"]))
+        if previous is None:
+            continue
+        cells = []
+        for key in ("p50_ms", "p99_ms", "rps"):
+            change = (result[key] - previous[key]) / previous[key] * 100 if previous[key] else 0
+            cells.append(f"{previous[key]:.1f}->{result[key]:.1f} {change:+.0f}%")
+        print(f"{result['endpoint']:<14}{result['concurrency']:>6}"
+              + "".join(f"{cell:>18}" for cell in cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--mode", choices=["asgi", "http"], default="asgi")
+    parser.add_argument("--url", default="http://localhost:8000", help="server for --mode http")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=500, help="per endpoint and level")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--repeat-fraction", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<commit>-<mode>.json)")
+    parser.add_argument("--compare", metavar="RESULTS_JSON",
+                        help="compare with an earlier results file")
+    args = parser.parse_args()
+
+    if args.mode == "asgi":
+        os.chdir(BACKEND_DIR)
+        sys.path.insert(0, BACKEND_DIR)
+        import main as backend
+
+        # The ASGI transport does not send lifespan events
+        backend.load_models()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=backend.app),
+                                   base_url="http://test", timeout=None)
+    else:
+        limits = httpx.Limits(max_connections=max(args.concurrency))
+        client = httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60)
+
+    async def run():
+        async with client:
+            return await run_benchmark(client, args)
+
+    results = asyncio.run(run())
+
+    commit, dirty = git_commit()
+    report = {
+        "commit": commit,
+        "dirty": dirty,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "mode": args.mode,
+        "url": args.url if args.mode == "http" else None,
+        "config": {
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "repeat_fraction": args.repeat_fraction,
+            "seed": args.seed,
+            "env": {k: v for k, v in os.environ.items() if k.startswith("GOVBIZ_")},
+        },
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{(commit or 'unknown')[:12]}{'-dirty' if dirty else ''}-{args.mode}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {output}")
+
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Startup time and memory benchmark for scheme artifact formats.
+
+Writes a synthetic catalogue in both the legacy pickle format (embeddings
+plus a metadata pickle that repeats them) and the memory-mapped .npy + JSON
+format, then starts several loader processes per format at once. Each
+loader loads the artifacts the way backend/main.py does and runs one
+exact search, touching every page of the matrix.
+
+Reported per process:
+  load_s  time to load the artifacts
+  rss_mb  resident set size (shared pages are counted in every process)
+  pss_mb  proportional set size (shared pages split between processes;
+          Linux only), which shows the real per-worker cost
+
+Run from the project root:
+    python benchmarks/artifact_startup.py --size 100000 --processes 4
+"""
+
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+from artifacts import save_scheme_artifacts
+
+LOADER = r"""
+import json, os, pickle, sys, time
+sys.path.insert(0, sys.argv[3])
+import numpy as np
+from artifacts import load_scheme_artifacts
+from vector_index import ExactIndex
+
+fmt, models_dir = sys.argv[1], sys.argv[2]
+start = time.perf_counter()
+if fmt == "pickle":
+    with open(os.path.join(models_dir, "scheme_embeddings.pkl"), "rb") as f:
+        vectors = ExactIndex(pickle.load(f)).vectors
+    with open(os.path.join(models_dir, "scheme_metadata.pkl"), "rb") as f:
+        metadata = pickle.load(f)
+    metadata.pop("embeddings", None)
+else:
+    vectors, metadata = load_scheme_artifacts(models_dir)
+load_s = time.perf_counter() - start
+
+ExactIndex(vectors, normalized=True).search(np.ones((1, vectors.shape[1])), 5)
+
+def read_kb(path, field):
+    try:
+        with open(path) as f:
+            for line in f:
+                if line.startswith(field):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+
+print(json.dumps({"ready": True, "load_s": load_s}), flush=True)
+sys.stdin.readline()  # wait until every loader is resident
+print(json.dumps({
+    "rss_kb": read_kb("/proc/self/status", "VmRSS:"),
+    "pss_kb": read_kb("/proc/self/smaps_rollup", "Pss:"),
+}), flush=True)
+"""
+
+
+def write_artifacts(models_dir, size, dim, seed):
+    rng = np.random.default_rng(seed)
+    embeddings = rng.standard_normal((size, dim)).astype(np.float32)
+    names = [f"Scheme {i}" for i in range(size)]
+    descriptions = [f"Synthetic description of government scheme number {i}" for i in range(size)]
+
+    with open(os.path.join(models_dir, "scheme_embeddings.pkl"), "wb") as f:
+        pickle.dump(embeddings, f)
+    with open(os.path.join(models_dir, "scheme_metadata.pkl"), "wb") as f:
+        pickle.dump({"scheme_names": names, "descriptions": descriptions,
+                     "embeddings": embeddings}, f)
+    save_scheme_artifacts(models_dir, embeddings, names, descriptions)
+
+
+def run_format(fmt, models_dir, processes):
+    loaders = [
+        subprocess.Popen(
+            [sys.executable, "-c", LOADER, fmt, models_dir, BACKEND_DIR],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+        )
+        for _ in range(processes)
+    ]
+    load_times = [json.loads(p.stdout.readline())["load_s"] for p in loaders]
+    usage = []
+    for p in loaders:
+        p.stdin.write("\n")
+        p.stdin.flush()
+        usage.append(json.loads(p.stdout.readline()))
+        p.wait()
+
+    def mean_mb(key):
+        values = [u[key] for u in usage if u[key] is not None]
+        return round(sum(values) / len(values) / 1024, 1) if values else None
+
+    return {
+        "format": fmt,
+        "processes": processes,
+        "load_s": round(sum(load_times) / len(load_times), 4),
+        "rss_mb": mean_mb("rss_kb"),
+        "pss_mb": mean_mb("pss_kb"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as models_dir:
+        write_artifacts(models_dir, args.size, args.dim, args.seed)
+        print(f"Catalogue: {args.size} x {args.dim}, {args.processes} concurrent loaders")
+        for fmt in ("pickle", "mmap"):
+            # Warm the page cache so both formats are measured from memory
+            run_format(fmt, models_dir, 1)
+            print(json.dumps(run_format(fmt, models_dir, args.processes)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Per-interaction latency of the frontend's API calls, before and after the
+shared client in api_client.py.
+
+One interaction is what the Streamlit page does when a user submits a
+description: a health check followed by POST /analyze. Compares:
+
+  oneoff  requests.get / requests.post, a new TCP connection per call and a
+          health check on every interaction (the original frontend)
+  pooled  APIClient: one keep-alive connection and the health status
+          cached for --health-ttl seconds
+  async   AsyncAPIClient with --concurrency interactions in flight
+
+Descriptions are repeated from a small set and sent once before timing, so
+the backend answers from its response cache and the numbers show the
+client and connection overhead rather than the model cost.
+
+Starts the backend on --port unless --url points at a running server.
+
+Run from the project root:
+    python benchmarks/client_benchmark.py
+    python benchmarks/client_benchmark.py --url http://localhost:8000 --interactions 500
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import requests
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+BACKEND_DIR = os.path.join(ROOT_DIR, "backend")
+sys.path.insert(0, ROOT_DIR)
+
+from api_client import APIClient, AsyncAPIClient
+
+DESCRIPTIONS = [
+    f"{business} {detail}"
+    for business in ("small bakery", "software development firm", "organic farm",
+                     "textile weaving unit", "auto parts manufacturer")
+    for detail in ("seeking a working capital loan", "planning to export",
+                   "run by women entrepreneurs", "buying new machinery")
+]
+
+
+def start_server(port):
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+               "--log-level", "warning"]
+    return subprocess.Popen(command, cwd=BACKEND_DIR)
+
+
+def summary(name, latencies, elapsed):
+    latencies = np.array(latencies) * 1000
+    print(f"{name:<8}{np.percentile(latencies, 50):>10.2f}{np.percentile(latencies, 95):>10.2f}"
+          f"{np.percentile(latencies, 99):>10.2f}{len(latencies) / elapsed:>12.1f}")
+
+
+def run_oneoff(base_url, interactions):
+    latencies = []
+    start = time.perf_counter()
+    for i in range(interactions):
+        begin = time.perf_counter()
+        requests.get(f"{base_url}/health", timeout=5)
+        requests.post(f"{base_url}/analyze",
+                      json={"description": DESCRIPTIONS[i % len(DESCRIPTIONS)]}, timeout=10)
+        latencies.append(time.perf_counter() - begin)
+    return latencies, time.perf_counter() - start
+
+
+def run_pooled(base_url, interactions, health_ttl):
+    latencies = []
+    with APIClient(base_url, health_ttl=health_ttl) as client:
+        start = time.perf_counter()
+        for i in range(interactions):
+            begin = time.perf_counter()
+            client.healthy()
+            client.post("/analyze", json={"description": DESCRIPTIONS[i % len(DESCRIPTIONS)]})
+            latencies.append(time.perf_counter() - begin)
+        return latencies, time.perf_counter() - start
+
+
+async def run_async(base_url, interactions, health_ttl, concurrency):
+    latencies = []
+    async with AsyncAPIClient(base_url, health_ttl=health_ttl, pool_size=concurrency) as client:
+        async def interaction(i):
+            begin = time.perf_counter()
+            await client.healthy()
+            await client.post("/analyze", json={"description": DESCRIPTIONS[i % len(DESCRIPTIONS)]})
+            latencies.append(time.perf_counter() - begin)
+
+        async def worker(offset):
+            for i in range(offset, interactions, concurrency):
+                await interaction(i)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(offset) for offset in range(concurrency)))
+        return latencies, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", help="a running server; by default one is started")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--interactions", type=int, default=300)
+    parser.add_argument("--health-ttl", type=float, default=5)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.url
+    if base_url is None:
+        base_url = f"http://127.0.0.1:{args.port}"
+        server = start_server(args.port)
+    try:
+        client = APIClient(base_url)
+        deadline = time.time() + args.timeout
+        while not client.healthy(max_age=0):
+            if time.time() > deadline:
+                print("Server did not become healthy")
+                return
+            time.sleep(0.5)
+
+        # Fill the response cache so every timed call is a cache hit
+        for description in DESCRIPTIONS:
+            client.post("/analyze", json={"description": description})
+        client.close()
+
+        print(f"{'client':<8}{'p50_ms':>10}{'p95_ms':>10}{'p99_ms':>10}{'per_s':>12}")
+        summary("oneoff", *run_oneoff(base_url, args.interactions))
+        summary("pooled", *run_pooled(base_url, args.interactions, args.health_ttl))
+        summary("async", *asyncio.run(run_async(base_url, args.interactions, args.health_ttl,
+                                                args.concurrency)))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Bursts of identical requests, with and without single-flight deduplication.
+
+Sends --bursts bursts of --burst-size identical descriptions at once to
+/get_nic, /get_schemes and /analyze, each burst with a new description so
+the response caches start cold, and reports per endpoint:
+
+  burst_ms   median time until every request of a burst has its answer
+  executed   encodes, NIC predictions and scheme searches actually run,
+             from GET /stats/single_flight
+  calls      cache misses that needed one of them
+
+The app runs in-process through httpx's ASGI transport, once with
+single-flight disabled and once enabled.
+
+Run from the project root:
+    python benchmarks/dedup_benchmark.py --burst-size 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+import numpy as np
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+ENDPOINTS = ("get_nic", "get_schemes", "analyze")
+
+
+async def run_bursts(client, endpoint, bursts, burst_size, tag):
+    timings = []
+    for burst in range(bursts):
+        body = {"description": f"Small food processing unit seeking a working capital loan "
+                               f"({tag} {endpoint} {burst})"}
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(client.post(f"/{endpoint}", json=body)
+                                           for _ in range(burst_size)))
+        timings.append((time.perf_counter() - start) * 1000)
+        assert all(r.status_code == 200 for r in responses), [r.status_code for r in responses]
+    return round(float(np.median(timings)), 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--bursts", type=int, default=20)
+    parser.add_argument("--burst-size", type=int, default=20)
+    args = parser.parse_args()
+
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, BACKEND_DIR)
+    import main as backend
+
+    # The ASGI transport does not send lifespan events
+    backend.load_models()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=backend.app),
+                               base_url="http://test", timeout=None)
+
+    async def run():
+        async with client:
+            for enabled in (False, True):
+                for flight in backend.flights:
+                    flight.enabled = enabled
+                for endpoint in ENDPOINTS:
+                    before = (await client.get("/stats/single_flight")).json()
+                    burst_ms = await run_bursts(client, endpoint, args.bursts, args.burst_size,
+                                                "on" if enabled else "off")
+                    after = (await client.get("/stats/single_flight")).json()
+                    result = {"single_flight": enabled, "endpoint": endpoint, "burst_ms": burst_ms}
+                    for field in ("executed", "calls"):
+                        result[field] = {name: after[name][field] - before[name][field]
+                                         for name in after
+                                         if after[name]["calls"] != before[name]["calls"]}
+                    print(json.dumps(result))
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Parity and latency benchmark for the sentence encoder backends.
+
+Compares the PyTorch SentenceTransformer with the ONNX Runtime exports in
+backend/models/encoder_onnx (int8, and float32 if present). Queries are the
+business and scheme descriptions in backend/data.
+
+Parity, against the PyTorch embeddings:
+  cosine        cosine similarity of each query embedding (min / mean)
+  top5_overlap  share of the top 5 schemes, ranked against the current
+                scheme_vectors.npy, that both encoders agree on
+
+Latency and throughput:
+  single_ms     p50 / p95 / p99 of encoding one query at a time
+  texts_per_s   throughput when encoding batches of --batch-size queries
+
+Export the ONNX model first, then run from the project root:
+    python utils/export_onnx_encoder.py
+    python benchmarks/encoder_benchmark.py --threads 1
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+
+
+def percentile_ms(samples, q):
+    import numpy as np
+    return round(float(np.percentile(samples, q)) * 1000, 2)
+
+
+def load_queries():
+    import pandas as pd
+    queries = pd.read_csv("data/nic_codes.csv")["description"].tolist()
+    queries += pd.read_csv("data/govt_schemes.csv")["description"].tolist()
+    return queries
+
+
+def parity(reference, candidate, scheme_index, top_k=5):
+    import numpy as np
+    cosines = np.sum(reference * candidate, axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    )
+    _, reference_ids = scheme_index.search(reference, top_k)
+    _, candidate_ids = scheme_index.search(candidate, top_k)
+    overlap = np.mean([
+        len(set(r) & set(c)) / top_k for r, c in zip(reference_ids, candidate_ids)
+    ])
+    return {
+        "cosine_min": round(float(cosines.min()), 4),
+        "cosine_mean": round(float(cosines.mean()), 4),
+        "top5_overlap": round(float(overlap), 4),
+    }
+
+
+def latency(encoder, queries, repeat, batch_size):
+    encoder.encode(queries[:batch_size])  # warm up
+
+    single = []
+    for i in range(repeat):
+        query = queries[i % len(queries)]
+        start = time.perf_counter()
+        encoder.encode([query])
+        single.append(time.perf_counter() - start)
+
+    batch = (queries * (batch_size // len(queries) + 1))[:batch_size]
+    start = time.perf_counter()
+    rounds = max(1, repeat // batch_size)
+    for _ in range(rounds):
+        encoder.encode(batch, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "single_ms_p50": percentile_ms(single, 50),
+        "single_ms_p95": percentile_ms(single, 95),
+        "single_ms_p99": percentile_ms(single, 99),
+        "texts_per_s": round(rounds * batch_size / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--threads", type=int, default=None,
+                        help="math threads per encoder (default: library default)")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    if args.threads:
+        # Set before torch and onnxruntime create their thread pools
+        os.environ["OMP_NUM_THREADS"] = str(args.threads)
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, BACKEND_DIR)
+    from artifacts import load_scheme_artifacts
+    from encoders import ONNX_MODEL_DIR, OnnxEncoder, TorchEncoder
+    from vector_index import ExactIndex
+
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+
+    queries = load_queries()
+    scheme_vectors, _ = load_scheme_artifacts("models")
+    scheme_index = ExactIndex(scheme_vectors, normalized=True)
+
+    encoders = [("torch", TorchEncoder())]
+    for model_file in ("model_int8.onnx", "model.onnx"):
+        if os.path.exists(os.path.join(ONNX_MODEL_DIR, model_file)):
+            encoders.append((f"onnx:{model_file}", OnnxEncoder(model_file=model_file)))
+    if len(encoders) == 1:
+        print("No ONNX export found; run utils/export_onnx_encoder.py first")
+
+    reference = encoders[0][1].encode(queries)
+    print(f"{len(queries)} queries, threads={args.threads or 'default'}")
+    for name, encoder in encoders:
+        result = {"encoder": name}
+        result.update(parity(reference, encoder.encode(queries), scheme_index))
+        result.update(latency(encoder, queries, args.repeat, args.batch_size))
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
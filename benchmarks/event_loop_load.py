@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Load test for event loop responsiveness under a saturated encoder.
+
+Drives the FastAPI app in-process through httpx's ASGI transport. A pool of
+clients hammers /get_schemes while the encoder is artificially slowed down,
+and a prober measures /health latency at a fixed interval. With inference on
+the executor, /health p99 should stay in the low milliseconds; with
+--inline (the old behaviour of encoding inside the coroutine) every probe
+waits behind the whole encode backlog.
+
+Run from the project root:
+    python benchmarks/event_loop_load.py --concurrency 32 --encode-delay 0.2
+    python benchmarks/event_loop_load.py --concurrency 32 --encode-delay 0.2 --inline
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import sys
+import time
+
+import httpx
+import numpy as np
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+
+
+class SlowEncoder:
+    """Wraps a sentence model and adds a fixed blocking delay to every encode"""
+
+    def __init__(self, model, delay):
+        self.model = model
+        self.delay = delay
+        self.name = getattr(model, "name", type(model).__name__)
+
+    def encode(self, *args, **kwargs):
+        time.sleep(self.delay)
+        return self.model.encode(*args, **kwargs)
+
+
+def percentiles(samples):
+    if not samples:
+        return {"count": 0}
+    values = np.array(samples) * 1000
+    return {
+        "count": len(samples),
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p95_ms": round(float(np.percentile(values, 95)), 2),
+        "p99_ms": round(float(np.percentile(values, 99)), 2),
+        "max_ms": round(float(values.max()), 2),
+    }
+
+
+async def scheme_client(client, deadline, latencies, statuses, request_ids):
+    while time.perf_counter() < deadline:
+        # A unique description per request, so every request misses the
+        # embedding and result caches and single-flight has nothing to share
+        description = f"small business loan for a rural agro unit (ref {next(request_ids)})"
+        start = time.perf_counter()
+        response = await client.post("/get_schemes", json={"description": description})
+        latencies.append(time.perf_counter() - start)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        if response.status_code == 503:
+            await asyncio.sleep(0.05)
+
+
+async def health_prober(client, deadline, interval, latencies):
+    # Latency is measured from the scheduled probe time, so time spent waiting
+    # for a blocked event loop to wake the prober is counted too
+    scheduled = time.perf_counter()
+    while scheduled < deadline:
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        await client.get("/health")
+        latencies.append(time.perf_counter() - scheduled)
+        scheduled = max(scheduled + interval, time.perf_counter())
+
+
+async def run_load(app, args):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test",
+                                 timeout=None) as client:
+        deadline = time.perf_counter() + args.duration
+        scheme_latencies, health_latencies, statuses = [], [], {}
+        request_ids = itertools.count()
+        await asyncio.gather(
+            health_prober(client, deadline, args.probe_interval, health_latencies),
+            *[
+                scheme_client(client, deadline, scheme_latencies, statuses, request_ids)
+                for _ in range(args.concurrency)
+            ],
+        )
+    return health_latencies, scheme_latencies, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--encode-delay", type=float, default=0.2,
+                        help="extra blocking seconds added to every encode call")
+    parser.add_argument("--probe-interval", type=float, default=0.05)
+    parser.add_argument("--inline", action="store_true",
+                        help="run inference inside the coroutine (pre-executor baseline)")
+    args = parser.parse_args()
+
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, BACKEND_DIR)
+    import main as backend
+
+    backend.load_models()
+    bundle = backend.model_registry.current
+    bundle.sentence_model = SlowEncoder(bundle.sentence_model, args.encode_delay)
+
+    if args.inline:
+        async def run_inline(fn, *fn_args, timeout=None):
+            return fn(*fn_args)
+        backend.run_inference = run_inline
+
+    health, schemes, statuses = asyncio.run(run_load(backend.app, args))
+
+    mode = "inline" if args.inline else f"executor ({backend.inference_executor.kind})"
+    print(f"Mode: {mode}, concurrency={args.concurrency}, encode delay={args.encode_delay}s")
+    print(f"/health       {percentiles(health)}")
+    print(f"/get_schemes  {percentiles(schemes)}")
+    print(f"Status codes: {statuses}")
+    if not args.inline:
+        print(f"Executor: {backend.inference_executor.stats()}")
+        batch_sizes = backend.encode_batcher.stats()["batch_size"]
+        print(f"Encode batches: {batch_sizes['count']}, mean size "
+              f"{batch_sizes['sum'] / max(1, batch_sizes['count']):.1f}")
+
+
+if __name__ == "__main__":
+    main()
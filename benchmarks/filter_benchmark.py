@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Latency of eligibility-filtered scheme search.
+
+Builds a synthetic catalogue of --size schemes with random eligibility
+attributes (state, sector, enterprise size, category), then times top-5
+search per query for increasingly selective filters:
+
+  unfiltered  the plain index search
+  post        score every scheme, then drop the ineligible ones (the
+              obvious way to filter, and what filtering costs without masks)
+  mask        the precomputed masks select the eligible rows, and only
+              those are scored
+
+for the exact and IVF indexes. mask_us is the time to combine the
+precomputed masks for a filter; eligible is the share of the catalogue
+that passes it.
+
+Run from the project root:
+    python benchmarks/filter_benchmark.py --size 100000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from eligibility import CATEGORIES, ENTERPRISE_SIZES, EligibilityIndex, filters_key
+from nic_hierarchy import NIC_SECTIONS
+from vector_index import ExactIndex, IVFIndex, normalize_rows, top_k
+
+STATES = [f"state{i}" for i in range(36)]
+FILTERS = [
+    {"enterprise_size": "micro"},
+    {"enterprise_size": "micro", "nic_code": "10"},
+    {"enterprise_size": "micro", "nic_code": "10", "state": "state3"},
+    {"enterprise_size": "micro", "nic_code": "10", "state": "state3", "categories": ["women"]},
+]
+
+
+def random_cells(rng, size, values, open_share, max_values=3):
+    """';'-joined random subsets of values, or "all" for about open_share of rows"""
+    cells = []
+    for _ in range(size):
+        if rng.random() < open_share:
+            cells.append("all")
+        else:
+            count = rng.integers(1, max_values + 1)
+            cells.append(";".join(rng.choice(values, size=count, replace=False)))
+    return cells
+
+
+def synthetic_attributes(size, seed):
+    rng = np.random.default_rng(seed)
+    return {
+        "states": random_cells(rng, size, STATES, 0.6),
+        "sectors": random_cells(rng, size, [s.lower() for s, _, _ in NIC_SECTIONS], 0.3),
+        "enterprise_sizes": random_cells(rng, size, list(ENTERPRISE_SIZES), 0.4, 2),
+        "categories": random_cells(rng, size, list(CATEGORIES), 0.6, 2),
+    }
+
+
+def time_ms(search, queries):
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query[None, :])
+        timings.append((time.perf_counter() - start) * 1000)
+    return round(float(np.percentile(timings, 50)), 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    vectors = normalize_rows(rng.standard_normal((args.size, args.dim)).astype(np.float32))
+    queries = normalize_rows(rng.standard_normal((args.queries, args.dim)).astype(np.float32))
+    start = time.perf_counter()
+    eligibility = EligibilityIndex.build(synthetic_attributes(args.size, args.seed), args.size)
+    print(f"Catalogue: {args.size} x {args.dim}; masks built in "
+          f"{time.perf_counter() - start:.1f}s")
+
+    for index in (ExactIndex(vectors, normalized=True), IVFIndex.build(vectors)):
+        result = {"index": index.kind, "filter": None, "eligible": 1.0,
+                  "unfiltered_ms": time_ms(lambda q: index.search(q, args.k), queries)}
+        print(json.dumps(result))
+        for filters in FILTERS:
+            key = filters_key(**filters)
+            start = time.perf_counter()
+            for _ in range(100):
+                mask = eligibility.mask(key)
+            mask_us = (time.perf_counter() - start) / 100 * 1e6
+
+            def post_filter(q):
+                if index.kind == "exact":
+                    scores = q @ vectors.T
+                    scores[:, ~mask] = -np.inf
+                    return top_k(scores, args.k)
+                # Without masks, an approximate index has to over-fetch
+                scores, ids = index.search(q, args.k * 20)
+                keep = (ids[0] >= 0) & mask[ids[0]]
+                return scores[:, keep][:, :args.k], ids[:, keep][:, :args.k]
+
+            result = {
+                "index": index.kind,
+                "filter": filters,
+                "eligible": round(float(mask.mean()), 4),
+                "mask_us": round(mask_us, 1),
+                "post_ms": time_ms(post_filter, queries),
+                "mask_ms": time_ms(lambda q: index.search(q, args.k, mask=mask), queries),
+            }
+            print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Relevance and latency of dense, BM25 and hybrid scheme retrieval.
+
+Relevance: every query in benchmarks/data/scheme_queries.csv is labelled
+with the schemes that answer it. Queries and scheme descriptions are
+encoded with the configured encoder (GOVBIZ_ENCODER_BACKEND), and each
+retriever is scored on:
+
+  recall@k   share of a query's relevant schemes in its top k
+  mrr        mean reciprocal rank of the first relevant scheme in the top k
+  ndcg@k     normalized discounted cumulative gain of the top k
+
+Latency: per-query ranking time (the query is already encoded) on the
+real catalogue and on a synthetic catalogue of --size schemes with random
+texts, with exact and IVF vector indexes.
+
+Run from the project root:
+    python benchmarks/hybrid_benchmark.py
+    python benchmarks/hybrid_benchmark.py --size 100000 --candidates 50
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+BACKEND_DIR = os.path.join(ROOT_DIR, "backend")
+QUERIES_PATH = os.path.join(ROOT_DIR, "benchmarks", "data", "scheme_queries.csv")
+
+
+def relevance(rankings, relevant_sets, k):
+    recall, mrr, ndcg = [], [], []
+    for ranking, relevant in zip(rankings, relevant_sets):
+        ranking = list(ranking[:k])
+        hits = [idx in relevant for idx in ranking]
+        recall.append(sum(hits) / len(relevant))
+        mrr.append(next((1 / (rank + 1) for rank, hit in enumerate(hits) if hit), 0.0))
+        dcg = sum(1 / math.log2(rank + 2) for rank, hit in enumerate(hits) if hit)
+        ideal = sum(1 / math.log2(rank + 2) for rank in range(min(k, len(relevant))))
+        ndcg.append(dcg / ideal)
+    return {
+        f"recall@{k}": round(float(np.mean(recall)), 4),
+        "mrr": round(float(np.mean(mrr)), 4),
+        f"ndcg@{k}": round(float(np.mean(ndcg)), 4),
+    }
+
+
+def latency(search, count):
+    """p50 / p99 of search(i) over count queries, in milliseconds"""
+    timings = []
+    for i in range(count):
+        start = time.perf_counter()
+        search(i)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "ms_p50": round(float(np.percentile(timings, 50)), 3),
+        "ms_p99": round(float(np.percentile(timings, 99)), 3),
+    }
+
+
+def retrievers(vector_index, bm25_index, candidates):
+    """name -> search(embeddings, texts, k) returning ids"""
+    from lexical_index import HybridIndex
+    hybrid = HybridIndex(vector_index, bm25_index, candidates=candidates)
+    return {
+        f"dense ({vector_index.kind})": lambda q, t, k: vector_index.search(q, k)[1],
+        "bm25": lambda q, t, k: bm25_index.search(t, k)[1],
+        f"hybrid ({vector_index.kind})": lambda q, t, k: hybrid.search(q, k, t)[1],
+    }
+
+
+def synthetic_texts(size, seed, vocabulary=20000, length=20):
+    """Random texts over a Zipf-distributed vocabulary, like short scheme descriptions"""
+    rng = np.random.default_rng(seed)
+    words = np.minimum(rng.zipf(1.3, size=(size, length)), vocabulary)
+    return [" ".join(f"term{w}" for w in row) for row in words]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--candidates", type=int, default=50,
+                        help="schemes each retriever contributes to the fusion")
+    parser.add_argument("--size", type=int, default=50000, help="synthetic catalogue size")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200, help="synthetic queries")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, BACKEND_DIR)
+    import pandas as pd
+    from artifacts import load_scheme_artifacts
+    from encoders import load_encoder
+    from lexical_index import BM25Index
+    from vector_index import ExactIndex, IVFIndex, normalize_rows
+
+    # Relevance on the labelled queries, with the catalogue and the queries
+    # encoded by the same encoder
+    _, metadata = load_scheme_artifacts("models")
+    names = metadata["scheme_names"]
+    labelled = pd.read_csv(QUERIES_PATH)
+    texts = [text.lower() for text in labelled["query"]]
+    row_of_name = {name: row for row, name in enumerate(names)}
+    relevant_sets = [{row_of_name[name] for name in labels.split(";")}
+                     for labels in labelled["relevant"]]
+
+    encoder = load_encoder()
+    vectors = normalize_rows(encoder.encode(metadata["descriptions"]))
+    queries = normalize_rows(encoder.encode(texts))
+    bm25 = BM25Index.build([f"{n} {d}" for n, d in zip(names, metadata["descriptions"])])
+
+    print(f"{len(texts)} labelled queries over {len(names)} schemes, k={args.k}")
+    for name, search in retrievers(ExactIndex(vectors, normalized=True), bm25,
+                                   args.candidates).items():
+        rankings = search(queries, texts, args.k)
+        result = {"catalogue": "schemes", "retriever": name}
+        result.update(relevance(rankings, relevant_sets, args.k))
+        result.update(latency(lambda i: search(queries[i:i + 1], texts[i:i + 1], args.k),
+                              len(texts)))
+        print(json.dumps(result))
+
+    # Latency on a large synthetic catalogue
+    rng = np.random.default_rng(args.seed)
+    vectors = normalize_rows(rng.standard_normal((args.size, args.dim)).astype(np.float32))
+    documents = synthetic_texts(args.size, args.seed)
+    start = time.perf_counter()
+    bm25 = BM25Index.build(documents)
+    print(f"Synthetic catalogue: {args.size} schemes, BM25 built in "
+          f"{time.perf_counter() - start:.1f}s with {len(bm25.terms)} terms")
+    picks = rng.choice(args.size, size=args.queries, replace=False)
+    queries = normalize_rows(vectors[picks] + 0.3 * rng.standard_normal((args.queries, args.dim))
+                             / np.sqrt(args.dim))
+    texts = [" ".join(documents[i].split()[:4]) for i in picks]
+
+    for vector_index in (ExactIndex(vectors, normalized=True), IVFIndex.build(vectors)):
+        for name, search in retrievers(vector_index, bm25, args.candidates).items():
+            if name == "bm25" and vector_index.kind != "exact":
+                continue
+            result = {"catalogue": f"synthetic {args.size}", "retriever": name}
+            result.update(latency(lambda i: search(queries[i:i + 1], texts[i:i + 1], args.k),
+                                  args.queries))
+            print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
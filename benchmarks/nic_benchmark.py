@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for NIC code inference.
+
+Compares three ways of classifying a batch of business descriptions with
+the TF-IDF + LinearSVC pipeline:
+
+  predict+decision  pipeline.predict() and pipeline.decision_function(),
+                    the original /get_nic code: vectorizer and SVM run twice
+  decision+argmax   one pipeline.decision_function() pass plus argmax
+  scorer_top_k      NICScorer.top_k(): one vectorizer pass, one sparse-dense
+                    product with the precomputed weights, top k calibrated
+                    probabilities
+
+for the committed backend/models/nic_classifier.pkl and for a synthetic
+pipeline with --classes classes (the full NIC 2008 list has over a thousand
+5-digit codes), at batch sizes 1, 32 and 1000. Reports milliseconds per
+batch (median of --repeat runs) and descriptions per second, and checks
+that the top code agrees with predict().
+
+Run from the project root:
+    python benchmarks/nic_benchmark.py
+    python benchmarks/nic_benchmark.py --classes 1000 --batch-sizes 1 32 1000
+"""
+
+import argparse
+import json
+import os
+import pickle
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+BACKEND_DIR = os.path.join(ROOT_DIR, "backend")
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, "benchmarks"))
+
+from api_benchmark import synthetic_corpus
+from nic_inference import NICScorer
+
+
+def synthetic_pipeline(classes, seed):
+    """A pipeline with the training script's hyperparameters and `classes` codes"""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.pipeline import Pipeline
+    from sklearn.svm import LinearSVC
+
+    rng = random.Random(seed)
+    # Business descriptions like the queries, plus keywords unique to each code
+    descriptions = synthetic_corpus(classes * 5, seed + 1)
+    texts, labels = [], []
+    for code in range(classes):
+        keywords = [f"kw{code}x{i}" for i in range(4)]
+        for _ in range(5):
+            texts.append(f"{descriptions[len(texts)]} {' '.join(rng.sample(keywords, 3))}")
+            labels.append(str(10000 + code))
+
+    pipeline = Pipeline([
+        ('tfidf', TfidfVectorizer(max_features=5000, ngram_range=(1, 2),
+                                  stop_words='english', min_df=2, max_df=0.95)),
+        ('classifier', LinearSVC(random_state=42, max_iter=1000, C=1.0)),
+    ])
+    pipeline.fit(texts, labels)
+    return pipeline
+
+
+def predict_and_decision(pipeline, scorer, batch):
+    codes = pipeline.predict(batch)
+    confidences = np.max(pipeline.decision_function(batch), axis=1)
+    return [str(c) for c in codes], confidences
+
+
+def decision_argmax(pipeline, scorer, batch):
+    scores = pipeline.decision_function(batch)
+    return [scorer.classes[i] for i in scores.argmax(axis=1)], scores.max(axis=1)
+
+
+def scorer_top_k(pipeline, scorer, batch):
+    candidates = scorer.top_k(batch, 5)
+    return [c[0][0] for c in candidates], [c[0][1] for c in candidates]
+
+
+METHODS = {
+    "predict+decision": predict_and_decision,
+    "decision+argmax": decision_argmax,
+    "scorer_top_k": scorer_top_k,
+}
+
+
+def bench(name, pipeline, corpus, batch_sizes, repeat):
+    scorer = NICScorer(pipeline)
+    expected = [str(c) for c in pipeline.predict(corpus)]
+
+    for batch_size in batch_sizes:
+        batches = [corpus[i:i + batch_size] for i in range(0, len(corpus), batch_size)]
+        batches = (batches * (repeat // len(batches) + 1))[:repeat]
+        for method, fn in METHODS.items():
+            fn(pipeline, scorer, batches[0])  # warm up
+            timings = []
+            for batch in batches:
+                start = time.perf_counter()
+                fn(pipeline, scorer, batch)
+                timings.append(time.perf_counter() - start)
+            codes, _ = fn(pipeline, scorer, corpus)
+            agreement = np.mean([a == b for a, b in zip(codes, expected)])
+            median = statistics.median(timings)
+            print(json.dumps({
+                "model": name,
+                "classes": len(scorer.classes),
+                "batch_size": batch_size,
+                "method": method,
+                "ms_per_batch": round(median * 1000, 3),
+                "texts_per_s": round(len(batches[0]) / median, 1),
+                "top1_agreement": round(float(agreement), 4),
+            }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--classes", type=int, default=500, help="codes in the synthetic model")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 32, 1000])
+    parser.add_argument("--repeat", type=int, default=50, help="timed batches per size and method")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    corpus = synthetic_corpus(max(args.batch_sizes), args.seed)
+
+    with open(os.path.join(BACKEND_DIR, "models", "nic_classifier.pkl"), "rb") as f:
+        bench("committed", pickle.load(f), corpus, args.batch_sizes, args.repeat)
+
+    print(f"Training a synthetic {args.classes}-class model...")
+    pipeline = synthetic_pipeline(args.classes, args.seed)
+    bench("synthetic", pipeline, corpus, args.batch_sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
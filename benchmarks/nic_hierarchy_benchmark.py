@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Flat vs hierarchical NIC classification as the number of codes grows.
+
+For each --classes count, builds a synthetic labelled dataset whose codes
+follow the NIC structure (divisions of 4 groups x 2 classes x 2 sub-classes),
+with descriptions that mix words specific to each level of a code's path,
+words borrowed from a sibling branch, and noise. Trains both models with
+the same TF-IDF + LinearSVC settings as utils/train_nic_classifier.py and
+reports, on held-out descriptions:
+
+  top1 / top5     accuracy of the first / any of the first 5 codes
+  division        accuracy of the 2-digit division of the first code
+  single_ms       p50 / p99 latency of one description at a time
+  batch_per_s     descriptions per second in batches of --batch-size
+  train_s         training time
+
+The flat model scores every code for every description; the hierarchical
+model scores only the children of the --beam-width best prefixes per level.
+
+Run from the project root:
+    python benchmarks/nic_hierarchy_benchmark.py
+    python benchmarks/nic_hierarchy_benchmark.py --classes 100 400 1300 --beam-width 2 3
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from nic_hierarchy import HierarchicalNICClassifier
+from nic_inference import NICScorer
+
+
+def synthetic_codes(n_classes):
+    """About n_classes 5-digit codes, 16 per division, starting at division 10"""
+    divisions = min(87, math.ceil(n_classes / 16))
+    return [
+        f"{10 + d}{g}{c}{s}"
+        for d in range(divisions) for g in range(1, 5) for c in range(1, 3) for s in range(1, 3)
+    ][:n_classes]
+
+
+def synthetic_dataset(codes, per_code, seed):
+    rng = random.Random(seed)
+    noise = [f"noise{i}" for i in range(2000)]
+    texts, labels = [], []
+    for code in codes:
+        for _ in range(per_code):
+            words = []
+            for length in (2, 3, 4, 5):
+                prefix = code[:length]
+                if rng.random() < 0.2:
+                    # A word from a sibling branch, to make each level ambiguous
+                    prefix = prefix[:-1] + str(rng.randint(1, 4))
+                words += rng.sample([f"l{length}p{prefix}w{i}" for i in range(4)], 2)
+            words += rng.sample(noise, 4)
+            rng.shuffle(words)
+            texts.append(" ".join(words))
+            labels.append(code)
+    return texts, labels
+
+
+def tfidf():
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    return TfidfVectorizer(max_features=5000, ngram_range=(1, 2), stop_words='english',
+                           min_df=2, max_df=0.95)
+
+
+def linear_svc():
+    from sklearn.svm import LinearSVC
+    return LinearSVC(random_state=42, max_iter=1000, C=1.0)
+
+
+def evaluate(top_k, texts, labels, batch_size, repeat):
+    candidates = top_k(texts, 5)
+    top1 = np.mean([c[0][0] == y for c, y in zip(candidates, labels)])
+    top5 = np.mean([y in [code for code, _ in c] for c, y in zip(candidates, labels)])
+    division = np.mean([c[0][0][:2] == y[:2] for c, y in zip(candidates, labels)])
+
+    single = []
+    for text in texts[:repeat]:
+        start = time.perf_counter()
+        top_k([text], 5)
+        single.append(time.perf_counter() - start)
+
+    batch = (texts * (batch_size // len(texts) + 1))[:batch_size]
+    start = time.perf_counter()
+    top_k(batch, 5)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "top1": round(float(top1), 4),
+        "top5": round(float(top5), 4),
+        "division": round(float(division), 4),
+        "single_ms_p50": round(float(np.percentile(single, 50)) * 1000, 3),
+        "single_ms_p99": round(float(np.percentile(single, 99)) * 1000, 3),
+        "batch_per_s": round(batch_size / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--classes", type=int, nargs="+", default=[100, 400, 1300])
+    parser.add_argument("--beam-width", type=int, nargs="+", default=[3])
+    parser.add_argument("--train-per-code", type=int, default=20)
+    parser.add_argument("--test-per-code", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200, help="single-description timings")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    for n_classes in args.classes:
+        codes = synthetic_codes(n_classes)
+        train_texts, train_labels = synthetic_dataset(codes, args.train_per_code, args.seed)
+        test_texts, test_labels = synthetic_dataset(codes, args.test_per_code, args.seed + 1)
+
+        from sklearn.pipeline import Pipeline
+        start = time.perf_counter()
+        flat = Pipeline([('tfidf', tfidf()), ('classifier', linear_svc())]).fit(train_texts, train_labels)
+        train_seconds = time.perf_counter() - start
+        result = {"classes": len(codes), "model": "flat", "train_s": round(train_seconds, 1)}
+        result.update(evaluate(NICScorer(flat).top_k, test_texts, test_labels,
+                               args.batch_size, args.repeat))
+        print(json.dumps(result))
+
+        start = time.perf_counter()
+        hierarchy = HierarchicalNICClassifier.fit(train_texts, train_labels, tfidf(), linear_svc)
+        train_seconds = time.perf_counter() - start
+        for beam_width in args.beam_width:
+            hierarchy.beam_width = beam_width
+            result = {"classes": len(codes), "model": f"hierarchical (beam {beam_width})",
+                      "train_s": round(train_seconds, 1)}
+            result.update(evaluate(hierarchy.top_k, test_texts, test_labels,
+                                   args.batch_size, args.repeat))
+            print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
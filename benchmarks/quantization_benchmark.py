@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Memory, speed and agreement of reduced-precision scheme vectors.
+
+Writes a synthetic catalogue (see ann_benchmark.py) with
+save_scheme_artifacts, as float32 with int8 codes and as float16, then
+loads it the way the backend does and reports for each search path:
+
+  resident_mb  pages of the memory-mapped vector files this process has
+               mapped, from /proc/self/smaps (Linux only); the in-memory
+               baseline counts its whole matrix. Re-ranking reads scattered
+               float32 rows and the kernel maps the pages around each
+               one, so over many queries the float32 file becomes resident
+               as well, as clean page cache that can be dropped
+  qps          single-description queries per second
+  p50_ms       median latency of one query
+  top5         share of the float32 top 5 that the path also returns
+
+Paths:
+  cosine        sklearn cosine_similarity + full argsort (the original path)
+  float32       ExactIndex over the memory-mapped float32 matrix
+  float16       ExactIndex over a float16 matrix, upcast block by block
+  int8          QuantizedIndex without re-ranking
+  int8+rerankN  QuantizedIndex re-scoring the top N in float32
+
+Every path runs in a fresh process, so the resident pages are its own.
+
+Run from the project root:
+    python benchmarks/quantization_benchmark.py --size 100000 --queries 200
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT_DIR, "backend"))
+sys.path.insert(0, os.path.join(ROOT_DIR, "benchmarks"))
+from ann_benchmark import synthetic_catalogue, synthetic_queries
+from artifacts import load_scheme_artifacts, load_scheme_codes, save_scheme_artifacts
+from vector_index import ExactIndex, QuantizedIndex, top_k
+
+
+def mapped_mb(directory):
+    """Resident MB of this process's memory maps of files in directory"""
+    directory = os.path.realpath(directory)
+    total_kb, current = 0, None
+    with open("/proc/self/smaps") as f:
+        for line in f:
+            parts = line.split()
+            if "-" in parts[0] and len(parts) >= 5:
+                current = parts[5] if len(parts) > 5 else None
+            elif parts[0] == "Rss:" and current and current.startswith(directory):
+                total_kb += int(parts[1])
+    return total_kb / 1024
+
+
+def load_search(path, directory, k):
+    """The search function for a path, as the backend would load it"""
+    if path == "cosine":
+        from sklearn.metrics.pairwise import cosine_similarity
+        vectors, _ = load_scheme_artifacts(os.path.join(directory, "float32"), mmap=False)
+
+        def search(query):
+            similarities = cosine_similarity(query, vectors)[0]
+            return np.argsort(similarities)[::-1][:k]
+        return search, vectors.nbytes / 2**20
+
+    if path == "float16":
+        vectors, _ = load_scheme_artifacts(os.path.join(directory, "float16"))
+        index = ExactIndex(vectors, normalized=True)
+    else:
+        vectors, metadata = load_scheme_artifacts(os.path.join(directory, "float32"))
+        if path == "float32":
+            index = ExactIndex(vectors, normalized=True)
+        else:
+            rerank = int(path.split("rerank")[1]) if "rerank" in path else 0
+            index = QuantizedIndex(vectors, *load_scheme_codes(
+                os.path.join(directory, "float32"), metadata), rerank=rerank)
+    return (lambda query: index.search(query, k)[1][0]), None
+
+
+def run_path(path, directory, k):
+    queries = np.load(os.path.join(directory, "queries.npy"))
+    truth = np.load(os.path.join(directory, "truth.npy"))
+    search, in_memory_mb = load_search(path, directory, k)
+    search(queries[:1])
+    latencies, agreement = [], 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        ids = search(query[None, :])
+        latencies.append(time.perf_counter() - start)
+        agreement += len(set(ids.tolist()) & set(expected.tolist()))
+    return {
+        "path": path,
+        "resident_mb": round(in_memory_mb if in_memory_mb is not None else mapped_mb(directory), 1),
+        "qps": round(len(latencies) / sum(latencies), 1),
+        "p50_ms": round(float(np.median(latencies)) * 1000, 3),
+        f"top{k}": round(agreement / truth.size, 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--topics", type=int, default=500)
+    parser.add_argument("--spread", type=float, default=2.0)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--rerank", type=int, nargs="+", default=[20, 50])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    parser.add_argument("--dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.path:
+        print(json.dumps(run_path(args.path, args.dir, args.k)))
+        return
+
+    print(f"Catalogue: {args.size} x {args.dim}, {args.queries} queries, k={args.k}")
+    catalogue = synthetic_catalogue(args.size, args.dim, args.topics, args.seed, args.spread)
+    queries = synthetic_queries(catalogue, args.queries, args.seed)
+    names = [f"scheme {i}" for i in range(args.size)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        save_scheme_artifacts(os.path.join(directory, "float32"), catalogue, names, names,
+                              normalized=True, quantize=True)
+        save_scheme_artifacts(os.path.join(directory, "float16"), catalogue, names, names,
+                              dtype="float16", normalized=True)
+        np.save(os.path.join(directory, "queries.npy"), queries)
+        np.save(os.path.join(directory, "truth.npy"),
+                top_k(queries @ catalogue.T, args.k)[1])
+
+        paths = (["cosine", "float32", "float16", "int8"]
+                 + [f"int8+rerank{n}" for n in args.rerank])
+        for path in paths:
+            result = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--path", path, "--dir", directory,
+                 "--k", str(args.k)],
+                capture_output=True, text=True,
+            )
+            if result.returncode != 0:
+                print(f"{path}: failed\n{result.stderr}")
+                continue
+            print(result.stdout.strip())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Cost of building and serializing /get_schemes responses.
+
+For pages of --k schemes (names and descriptions cycled from
+backend/data/govt_schemes.csv), reports the microseconds per response of:
+
+  models   the previous path: a validated SchemeResponse per scheme, a
+           SchemesResponse around them, and model_dump_json()
+  orjson   plain dicts, as schemes_for_embeddings() now returns them,
+           rendered by ORJSONResponse
+  ndjson   the same dicts streamed as NDJSON by ndjson_chunks(); first_us
+           is the time until the first chunk is ready to send
+
+Search and encoding are not included; they cost the same on every path.
+
+Run from the project root:
+    python benchmarks/serialization_benchmark.py --k 5 100 1000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+
+
+def per_call_us(fn, seconds):
+    """Mean microseconds per call of fn, repeated for about the given time"""
+    fn()
+    calls, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        fn()
+        calls += 1
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--k", type=int, nargs="+", default=[5, 100, 1000])
+    parser.add_argument("--seconds", type=float, default=1.0, help="time spent per measurement")
+    args = parser.parse_args()
+
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, BACKEND_DIR)
+    import main as backend
+    from fastapi.responses import ORJSONResponse
+
+    df = pd.read_csv("data/govt_schemes.csv")
+    names, descriptions = df["scheme_name"].tolist(), df["description"].tolist()
+
+    async def first_and_all(schemes):
+        chunks = backend.ndjson_chunks(schemes)
+        start = time.perf_counter()
+        first = await chunks.__anext__()
+        first_us = (time.perf_counter() - start) * 1e6
+        return first_us, first + b"".join([chunk async for chunk in chunks])
+
+    loop = asyncio.new_event_loop()
+    for k in args.k:
+        ranking = [(i % len(names), 0.9 - i / (10 * k)) for i in range(k)]
+
+        def models():
+            response = backend.SchemesResponse(
+                schemes=[backend.SchemeResponse(name=names[idx], description=descriptions[idx],
+                                                similarity=similarity, score=similarity)
+                         for idx, similarity in ranking],
+                model_version="v1"
+            )
+            return response.model_dump_json().encode()
+
+        def plain():
+            return [{"name": names[idx], "description": descriptions[idx],
+                     "similarity": similarity, "score": similarity} for idx, similarity in ranking]
+
+        def orjson_body():
+            return ORJSONResponse({"schemes": plain(), "offset": 0, "next_offset": None,
+                                   "model_version": "v1"}).body
+
+        def ndjson_body():
+            return loop.run_until_complete(first_and_all(plain()))[1]
+
+        first_us = min(loop.run_until_complete(first_and_all(plain()))[0] for _ in range(50))
+        results = {
+            "models": per_call_us(models, args.seconds),
+            "orjson": per_call_us(orjson_body, args.seconds),
+            "ndjson": per_call_us(ndjson_body, args.seconds),
+        }
+        print(json.dumps({
+            "k": k,
+            "us": {name: round(value, 1) for name, value in results.items()},
+            "speedup": {name: round(results["models"] / value, 2)
+                        for name, value in results.items() if name != "models"},
+            "ndjson_first_us": round(first_us, 1),
+            "bytes": {"json": len(orjson_body()), "ndjson": len(ndjson_body())},
+        }))
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
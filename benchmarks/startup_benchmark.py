@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Cold-start time of the backend.
+
+Starts the API with uvicorn --runs times and polls it every --poll-ms to
+record, from the moment the process is started:
+
+  live    first 200 from /health/live (the old /health-only servers are
+          polled on /health; any answer counts)
+  nic     first 200 from /get_nic
+  ready   first 200 from /health/ready (or a healthy /health)
+
+with background loading (GOVBIZ_LAZY_LOAD=1, the default) and with models
+loaded before the server starts accepting requests (GOVBIZ_LAZY_LOAD=0).
+The backend's own import and per-component load timings are printed from
+/health when it reports them.
+
+Run from the project root:
+    python benchmarks/startup_benchmark.py
+    python benchmarks/startup_benchmark.py --backend-dir /path/to/other/backend
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import requests
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def first_success(base_url, started, timeout, poll_ms):
+    """Seconds since started until live, /get_nic and ready each first succeed"""
+    session = requests.Session()
+    times = {}
+    deadline = time.perf_counter() + timeout
+    while len(times) < 3 and time.perf_counter() < deadline:
+        now = time.perf_counter() - started
+        try:
+            if "live" not in times:
+                response = session.get(f"{base_url}/health/live", timeout=1)
+                if response.status_code in (200, 404):
+                    times["live"] = now
+            if "nic" not in times:
+                response = session.post(f"{base_url}/get_nic",
+                                        json={"description": "software development"}, timeout=30)
+                if response.status_code == 200:
+                    times["nic"] = time.perf_counter() - started
+            if "ready" not in times:
+                response = session.get(f"{base_url}/health/ready", timeout=1)
+                if response.status_code == 404:
+                    response = session.get(f"{base_url}/health", timeout=1)
+                    if response.json().get("status") == "healthy":
+                        times["ready"] = time.perf_counter() - started
+                elif response.status_code == 200:
+                    times["ready"] = time.perf_counter() - started
+        except requests.ConnectionError:
+            pass
+        time.sleep(poll_ms / 1000)
+    health = session.get(f"{base_url}/health", timeout=5).json() if len(times) == 3 else {}
+    session.close()
+    return times, health
+
+
+def run(backend_dir, port, lazy, timeout, poll_ms):
+    env = dict(os.environ, GOVBIZ_LAZY_LOAD="1" if lazy else "0")
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+               "--log-level", "warning"]
+    started = time.perf_counter()
+    server = subprocess.Popen(command, cwd=backend_dir, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        return first_success(f"http://127.0.0.1:{port}", started, timeout, poll_ms)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--backend-dir", default=os.path.join(ROOT_DIR, "backend"))
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--poll-ms", type=float, default=20)
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    for lazy in (True, False):
+        results = [run(args.backend_dir, args.port, lazy, args.timeout, args.poll_ms)
+                   for _ in range(args.runs)]
+        summary = {"lazy_load": lazy}
+        for stage in ("live", "nic", "ready"):
+            values = [times[stage] for times, _ in results if stage in times]
+            summary[f"{stage}_s"] = round(float(np.median(values)), 2) if values else None
+        health = results[-1][1]
+        if "components" in health:
+            summary["import_s"] = health["startup"]["import_seconds"]
+            summary["components_s"] = {name: c["seconds"]
+                                       for name, c in health["components"].items()}
+        print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
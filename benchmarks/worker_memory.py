@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Per-worker memory of the pre-fork server versus plain uvicorn workers.
+
+Starts the backend with N workers, waits until it is healthy, sends some
+warm-up traffic so every worker has run inference, then reads
+/proc/<pid>/smaps_rollup (Linux only) for the master and each worker:
+
+  rss_mb      resident memory, counting shared pages in full
+  pss_mb      proportional share: shared pages divided between processes
+  private_mb  pages only this process holds (the real marginal cost)
+
+Modes:
+  prefork  backend/server.py: models loaded once in the master, forked workers
+  uvicorn  uvicorn main:app --workers N: every worker loads its own models
+
+Run from the project root:
+    python benchmarks/worker_memory.py --mode prefork --workers 4
+    python benchmarks/worker_memory.py --mode uvicorn --workers 4
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+
+
+def smaps_rollup(pid):
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss_mb": round(values.get("Rss", 0) / 1024, 1),
+        "pss_mb": round(values.get("Pss", 0) / 1024, 1),
+        "private_mb": round(
+            (values.get("Private_Clean", 0) + values.get("Private_Dirty", 0)) / 1024, 1
+        ),
+    }
+
+
+def children(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+def start_server(mode, workers, port):
+    if mode == "prefork":
+        command = [sys.executable, "server.py", "--workers", str(workers),
+                   "--port", str(port), "--log-level", "warning"]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "main:app", "--workers", str(workers),
+                   "--port", str(port), "--log-level", "warning"]
+    return subprocess.Popen(command, cwd=BACKEND_DIR)
+
+
+def wait_until_healthy(base_url, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health", timeout=2).json().get("models_loaded"):
+                return True
+        except (httpx.HTTPError, ValueError):
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--mode", choices=["prefork", "uvicorn"], default="prefork")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--warmup-requests", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    start = time.perf_counter()
+    server = start_server(args.mode, args.workers, args.port)
+    try:
+        if not wait_until_healthy(base_url, args.timeout):
+            print("Server did not become healthy")
+            return
+        print(f"{args.mode}: healthy after {time.perf_counter() - start:.1f}s")
+
+        # New connections are spread across workers by the kernel
+        for i in range(args.warmup_requests):
+            description = f"small manufacturing business number {i} seeking a loan"
+            httpx.post(f"{base_url}/get_nic", json={"description": description})
+            httpx.post(f"{base_url}/get_schemes", json={"description": description})
+        time.sleep(1)
+
+        master = server.pid
+        print(f"{'process':<16}{'rss_mb':>10}{'pss_mb':>10}{'private_mb':>12}")
+        usage = smaps_rollup(master)
+        print(f"{'master ' + str(master):<16}{usage['rss_mb']:>10}{usage['pss_mb']:>10}"
+              f"{usage['private_mb']:>12}")
+        total_pss = usage["pss_mb"]
+        for pid in children(master):
+            usage = smaps_rollup(pid)
+            total_pss += usage["pss_mb"]
+            print(f"{'worker ' + str(pid):<16}{usage['rss_mb']:>10}{usage['pss_mb']:>10}"
+                  f"{usage['private_mb']:>12}")
+        print(f"Total PSS: {total_pss:.1f} MB")
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
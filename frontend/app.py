@@ -1,7 +1,10 @@
 import streamlit as st
 import requests
 import json
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+# api_client.py is in the project root, which must be on PYTHONPATH
+from api_client import APIClient
 
 # Page configuration
 st.set_page_config(
@@ -56,41 +59,45 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# API configuration
-API_BASE_URL = "http://localhost:8000"
+@st.cache_resource
+def get_api_client():
+    """One pooled API client per server process, shared by every session and rerun"""
+    return APIClient()
 
 def check_api_health():
-    """Check if the API is running"""
-    try:
-        response = requests.get(f"{API_BASE_URL}/health", timeout=5)
-        return response.status_code == 200
-    except:
-        return False
+    """Check if the API is running (cached for a few seconds, as this runs on every rerun)"""
+    return get_api_client().healthy()
 
-def get_nic_prediction(description: str) -> Dict:
-    """Get NIC code prediction from API"""
-    try:
-        response = requests.post(
-            f"{API_BASE_URL}/get_nic",
-            json={"description": description},
-            timeout=10
-        )
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        st.error(f"API Error: {str(e)}")
-        return None
+# Eligibility filter choices accepted by the API, with display names
+# States and union territories, matched case-insensitively against the
+# states column of govt_schemes.csv
+STATES = [
+    "Andaman and Nicobar Islands", "Andhra Pradesh", "Arunachal Pradesh", "Assam", "Bihar",
+    "Chandigarh", "Chhattisgarh", "Dadra and Nagar Haveli and Daman and Diu", "Delhi", "Goa",
+    "Gujarat", "Haryana", "Himachal Pradesh", "Jammu and Kashmir", "Jharkhand", "Karnataka",
+    "Kerala", "Ladakh", "Lakshadweep", "Madhya Pradesh", "Maharashtra", "Manipur", "Meghalaya",
+    "Mizoram", "Nagaland", "Odisha", "Puducherry", "Punjab", "Rajasthan", "Sikkim",
+    "Tamil Nadu", "Telangana", "Tripura", "Uttar Pradesh", "Uttarakhand", "West Bengal",
+]
+ENTERPRISE_SIZES = ["micro", "small", "medium"]
+CATEGORIES = {
+    "sc_st": "SC/ST",
+    "women": "Women",
+    "rural": "Rural",
+    "farmer": "Farmers",
+    "exporter": "Exporters",
+    "startup": "Startups",
+}
 
-def get_scheme_recommendations(description: str) -> List[Dict]:
-    """Get scheme recommendations from API"""
+def analyze_business(description: str, filters: Optional[Dict] = None) -> Dict:
+    """Get the NIC code prediction and scheme recommendations in one API call"""
     try:
-        response = requests.post(
-            f"{API_BASE_URL}/get_schemes",
-            json={"description": description},
-            timeout=10
+        response = get_api_client().post(
+            "/analyze",
+            json={"description": description, "filters": filters}
         )
         response.raise_for_status()
-        return response.json()["schemes"]
+        return response.json()
     except requests.exceptions.RequestException as e:
         st.error(f"API Error: {str(e)}")
         return None
@@ -151,28 +158,57 @@ def main():
             help="Provide a detailed description of your business activities, products, or services"
         )
         
+        # Optional eligibility filters; schemes not open to the business are left out
+        with st.expander("🎯 Eligibility filters (optional)"):
+            state = st.selectbox("State or union territory", ["Any"] + STATES)
+            enterprise_size = st.selectbox("Enterprise size", ["Any"] + ENTERPRISE_SIZES)
+            categories = st.multiselect(
+                "The business belongs to",
+                list(CATEGORIES),
+                format_func=CATEGORIES.get
+            )
+            nic_code = st.text_input("NIC division or code", placeholder="e.g., 10 or 10712")
+        filters = {
+            "state": None if state == "Any" else state,
+            "enterprise_size": None if enterprise_size == "Any" else enterprise_size,
+            "categories": categories,
+            "nic_code": nic_code.strip() or None
+        }
+        
         # Submit button
         if st.button("🚀 Get Recommendations", type="primary", use_container_width=True):
             if business_description.strip():
                 with st.spinner("Analyzing your business description..."):
-                    # Get NIC prediction
-                    nic_result = get_nic_prediction(business_description)
-                    
-                    # Get scheme recommendations
-                    schemes_result = get_scheme_recommendations(business_description)
+                    # Get NIC prediction and scheme recommendations together
+                    result = analyze_business(business_description, filters)
                     
-                    if nic_result and schemes_result:
+                    if result:
+                        nic_result = result
+                        schemes_result = result["schemes"]
+                        
                         # Display results
                         st.success("✅ Analysis complete!")
                         
                         # NIC Code Result
                         with col2:
                             st.header("🏷️ Predicted NIC Code")
-                            st.markdown(f'<div class="result-box"><div class="nic-code">{nic_result["nic_code"]}</div><div class="confidence-score">Confidence: {nic_result["confidence"]:.2%}</div></div>', unsafe_allow_html=True)
+                            # Uncalibrated probabilities rank the codes but may be over- or underconfident
+                            calibration_note = "" if nic_result.get("calibrated") else " (uncalibrated)"
+                            st.markdown(f'<div class="result-box"><div class="nic-code">{nic_result["nic_code"]}</div><div class="confidence-score">Confidence: {nic_result["confidence"]:.2%}{calibration_note}</div></div>', unsafe_allow_html=True)
+                            
+                            # Other likely codes, with their probabilities
+                            for candidate in nic_result.get("nic_candidates", [])[1:]:
+                                st.markdown(f'{candidate["nic_code"]}: {candidate["probability"]:.2%}')
                         
                         # Scheme Recommendations
                         st.header("📋 Recommended Government Schemes")
-                        st.markdown("Here are the top 5 government schemes most relevant to your business:")
+                        # Filters can leave fewer schemes than the API returns by default
+                        if not schemes_result:
+                            st.info("No schemes match the selected eligibility filters.")
+                        elif len(schemes_result) == 1:
+                            st.markdown("Here is the government scheme most relevant to your business:")
+                        else:
+                            st.markdown(f"Here are the top {len(schemes_result)} government schemes most relevant to your business:")
                         
                         for i, scheme in enumerate(schemes_result, 1):
                             with st.container():
@@ -8,9 +8,12 @@ import subprocess
 import sys
 import os
 import time
-import requests
 from pathlib import Path
 
+from api_client import APIClient
+
+api_client = APIClient()
+
 def run_command(command, description):
     """Run a command and handle errors"""
     print(f"\n🔄 {description}...")
@@ -26,12 +29,8 @@ def run_command(command, description):
         return False
 
 def check_backend_health():
-    """Check if backend is running"""
-    try:
-        response = requests.get("http://localhost:8000/health", timeout=5)
-        return response.status_code == 200
-    except:
-        return False
+    """Check if backend is running (not cached, as this polls during startup)"""
+    return api_client.healthy(max_age=0)
 
 def main():
     print("🚀 Starting GovBizConnect Application")
@@ -58,17 +57,25 @@ def main():
         print("✅ NIC classifier already exists, skipping training")
     
     # Step 3: Generate scheme embeddings
-    if not Path("backend/models/scheme_embeddings.pkl").exists():
+    if not Path("backend/models/scheme_vectors.npy").exists():
         if not run_command("python utils/generate_scheme_embeddings.py", "Generating scheme embeddings"):
             print("❌ Failed to generate scheme embeddings")
             sys.exit(1)
     else:
         print("✅ Scheme embeddings already exist, skipping generation")
     
-    # Step 4: Start backend
+    # Step 4: Precompute the top schemes for every NIC code
+    if not Path("backend/models/nic_scheme_map.npz").exists():
+        if not run_command("python utils/generate_nic_scheme_map.py", "Generating NIC scheme map"):
+            print("❌ Failed to generate the NIC scheme map")
+            sys.exit(1)
+    else:
+        print("✅ NIC scheme map already exists, skipping generation")
+    
+    # Step 5: Start backend (models load once, workers are forked from it)
     print("\n🔧 Starting FastAPI backend...")
     backend_process = subprocess.Popen(
-        "cd backend && uvicorn main:app --reload --host 0.0.0.0 --port 8000",
+        "cd backend && python server.py --host 0.0.0.0 --port 8000",
         shell=True,
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE
@@ -86,11 +93,14 @@ def main():
         backend_process.terminate()
         sys.exit(1)
     
-    # Step 5: Start frontend
+    # Step 6: Start frontend
     print("\n🌐 Starting Streamlit frontend...")
+    # The frontend imports api_client from the project root
+    frontend_env = dict(os.environ, PYTHONPATH=os.path.abspath("."))
     frontend_process = subprocess.Popen(
         "cd frontend && streamlit run app.py --server.port 8501 --server.address 0.0.0.0",
-        shell=True
+        shell=True,
+        env=frontend_env
     )
     
     print("\n🎉 GovBizConnect is now running!")
@@ -53,7 +53,7 @@ else
     echo "✅ NIC classifier already exists"
 fi
 
-if [ ! -f "backend/models/scheme_embeddings.pkl" ]; then
+if [ ! -f "backend/models/scheme_vectors.npy" ]; then
     echo "🤖 Generating scheme embeddings..."
     python utils/generate_scheme_embeddings.py
     
@@ -65,6 +65,18 @@ else
     echo "✅ Scheme embeddings already exist"
 fi
 
+if [ ! -f "backend/models/nic_scheme_map.npz" ]; then
+    echo "🤖 Precomputing schemes for every NIC code..."
+    python utils/generate_nic_scheme_map.py
+    
+    if [ $? -ne 0 ]; then
+        echo "❌ Failed to generate the NIC scheme map"
+        exit 1
+    fi
+else
+    echo "✅ NIC scheme map already exists"
+fi
+
 echo ""
 echo "🎉 Setup completed successfully!"
 echo ""
@@ -75,7 +87,7 @@ echo ""
 echo "Or start manually:"
 echo "  source venv/bin/activate"
 echo "  cd backend && uvicorn main:app --reload"
-echo "  cd frontend && streamlit run app.py"
+echo "  cd frontend && PYTHONPATH=.. streamlit run app.py"
 echo ""
 echo "Access the application at:"
 echo "  Frontend: http://localhost:8501"
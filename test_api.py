@@ -3,17 +3,18 @@
 Test script for GovBizConnect API
 """
 
-import requests
 import json
 import time
 
-API_BASE_URL = "http://localhost:8000"
+from api_client import APIClient
+
+client = APIClient()
 
 def test_health():
     """Test health endpoint"""
     print("🔍 Testing health endpoint...")
     try:
-        response = requests.get(f"{API_BASE_URL}/health")
+        response = client.get("/health")
         print(f"Status: {response.status_code}")
         print(f"Response: {response.json()}")
         return response.status_code == 200
@@ -34,11 +35,7 @@ def test_nic_prediction():
     
     for description in test_cases:
         try:
-            response = requests.post(
-                f"{API_BASE_URL}/get_nic",
-                json={"description": description},
-                timeout=10
-            )
+            response = client.post("/get_nic", json={"description": description})
             print(f"\nDescription: {description}")
             print(f"Status: {response.status_code}")
             if response.status_code == 200:
@@ -62,11 +59,7 @@ def test_scheme_recommendations():
     
     for description in test_cases:
         try:
-            response = requests.post(
-                f"{API_BASE_URL}/get_schemes",
-                json={"description": description},
-                timeout=10
-            )
+            response = client.post("/get_schemes", json={"description": description})
             print(f"\nDescription: {description}")
             print(f"Status: {response.status_code}")
             if response.status_code == 200:
@@ -0,0 +1,129 @@
+"""
+Single-flight shares one computation between concurrent identical requests,
+and a model swap drops exactly the cached results the new bundle could
+answer differently, including ones still being computed for the old bundle.
+"""
+
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+import main
+from cache import TTLCache
+from singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_computation():
+    flights = SingleFlight("test")
+    runs = []
+
+    async def compute():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def scenario():
+        shared = await asyncio.gather(*[flights.do("key", compute) for _ in range(5)])
+        other = await flights.do("other", compute)
+        # Released once finished, so a later call computes again
+        again = await flights.do("key", compute)
+        return shared, other, again
+
+    shared, other, again = asyncio.run(scenario())
+    assert shared == ["result"] * 5
+    assert other == again == "result"
+    assert len(runs) == 3
+    assert flights.stats()["shared"] == 4
+    assert flights.in_flight == 0
+
+
+def test_every_caller_gets_the_exception():
+    flights = SingleFlight("test")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("encoder failed")
+
+    async def scenario():
+        return await asyncio.gather(*[flights.do("key", fail) for _ in range(3)],
+                                    return_exceptions=True)
+
+    errors = asyncio.run(scenario())
+    assert all(isinstance(e, ValueError) for e in errors)
+    assert flights.executed == 1
+
+
+def test_disabled_single_flight_runs_every_call():
+    flights = SingleFlight("test", enabled=False)
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        return 1
+
+    async def scenario():
+        return await asyncio.gather(*[flights.do("key", compute) for _ in range(3)])
+
+    assert asyncio.run(scenario()) == [1, 1, 1]
+    assert flights.executed == 3
+
+
+def test_results_for_an_older_generation_are_not_cached():
+    cache = TTLCache("test")
+    generation = cache.generation
+    cache.clear()
+    cache.set("key", "stale", generation)
+    assert cache.get("key") is None
+    cache.set("key", "fresh", cache.generation)
+    assert cache.get("key") == "fresh"
+
+
+def bundle(version, encoder, nic_stamp="nic", scheme_delta=None):
+    return SimpleNamespace(version=version, sentence_model=encoder, nic_stamp=nic_stamp,
+                           scheme_delta=scheme_delta)
+
+
+@pytest.fixture
+def registry():
+    caches = (main.embedding_cache, main.nic_cache, main.schemes_cache)
+    for cache in caches:
+        cache.clear()
+    main.embedding_cache.set("bakery", [0.1, 0.2])
+    main.nic_cache.set("bakery", main.NICResponse(
+        nic_code="10712", confidence=0.9, candidates=[], calibrated=False, model_version="v1"))
+    main.schemes_cache.set("bakery", {"schemes": [], "model_version": "v1"})
+    previous, swap_count = main.model_registry.current, main.model_registry.swap_count
+    yield main.model_registry
+    main.model_registry.current, main.model_registry.swap_count = previous, swap_count
+    for cache in caches:
+        cache.clear()
+
+
+def test_reload_keeps_what_the_new_bundle_would_answer_the_same(registry):
+    encoder = object()
+    registry.current = bundle("v1", encoder)
+    registry.swap(bundle("v2", encoder))
+    assert main.embedding_cache.get("bakery") == [0.1, 0.2]
+    assert main.nic_cache.get("bakery").model_version == "v2"
+    # Without a catalogue delta, scheme results may have changed
+    assert main.schemes_cache.get("bakery") is None
+
+
+def test_reload_drops_results_of_changed_models(registry):
+    registry.current = bundle("v1", object())
+    registry.swap(bundle("v2", object(), nic_stamp="retrained"))
+    assert main.embedding_cache.get("bakery") is None
+    assert main.nic_cache.get("bakery") is None
+
+
+def test_results_computed_across_a_reload_are_not_cached(registry):
+    encoder = object()
+    registry.current = bundle("v1", encoder)
+    # A prediction starts on the old bundle, and the swap lands before it finishes
+    generation = main.nic_cache.generation
+    registry.swap(bundle("v2", encoder, nic_stamp="retrained"))
+    main.nic_cache.set("software", "old prediction", generation)
+    assert main.nic_cache.get("software") is None
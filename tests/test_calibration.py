@@ -0,0 +1,82 @@
+"""
+NIC calibration: the temperature is loaded only if the trainer wrote one,
+a stale file is removed when calibration is skipped, and confidences are
+probabilities either way.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.pipeline import Pipeline
+from sklearn.svm import LinearSVC
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT_DIR, "backend"))
+sys.path.insert(0, os.path.join(ROOT_DIR, "utils"))
+from nic_inference import (NIC_CALIBRATION_FILE, NICScorer, fit_temperature, load_calibration,
+                           remove_calibration, save_calibration, softmax)
+
+
+@pytest.fixture(scope="module")
+def pipeline():
+    texts = ["bakery bread cakes", "bread flour bakery", "software apps code",
+             "mobile software development", "truck freight transport", "road freight trucks"]
+    codes = ["10712", "10712", "62012", "62012", "49231", "49231"]
+    return Pipeline([("tfidf", TfidfVectorizer()), ("classifier", LinearSVC())]).fit(texts, codes)
+
+
+def test_calibration_round_trip(tmp_path):
+    assert load_calibration(tmp_path) is None
+    save_calibration(tmp_path, 1.7, held_out_rows=10)
+    assert load_calibration(tmp_path) == 1.7
+    assert remove_calibration(tmp_path)
+    assert load_calibration(tmp_path) is None
+    assert not remove_calibration(tmp_path)
+
+
+def test_uncalibrated_scores_are_probabilities(pipeline):
+    scorer = NICScorer(pipeline)
+    assert not scorer.calibrated
+    candidates = scorer.top_k(["fresh bakery bread", "freight software"], k=3)
+    for row in candidates:
+        probabilities = [p for _, p in row]
+        assert all(0.0 <= p <= 1.0 for p in probabilities)
+        assert probabilities == sorted(probabilities, reverse=True)
+    # All three classes are returned, so they make up the whole distribution
+    assert sum(p for _, p in candidates[0]) == pytest.approx(1.0)
+    assert candidates[0][0][0] == "10712"
+
+
+def test_calibrated_scorer_uses_the_temperature(pipeline):
+    description = ["fresh bakery bread"]
+    scores = NICScorer(pipeline).decision_scores(description)
+    scorer = NICScorer(pipeline, temperature=0.5)
+    assert scorer.calibrated
+    expected = softmax(scores, 0.5)[0]
+    for code, probability in scorer.top_k(description, k=3)[0]:
+        assert probability == pytest.approx(expected[scorer.classes.index(code)])
+    np.testing.assert_allclose(scorer.class_probabilities(description)[0], expected)
+
+
+def test_fit_temperature_recovers_the_scale():
+    rng = np.random.default_rng(0)
+    logits = rng.standard_normal((4000, 5)) * 2
+    labels = [rng.choice(5, p=p) for p in softmax(logits)]
+    # Scores twice as sharp as the labels' distribution
+    temperature, nll_before, nll_after = fit_temperature(logits * 2, labels)
+    assert temperature == pytest.approx(2.0, rel=0.1)
+    assert nll_after < nll_before
+
+
+def test_skipped_calibration_removes_a_stale_file(tmp_path, monkeypatch):
+    from train_nic_classifier import train_nic_classifier
+
+    # The sample nic_codes.csv has one row per code, so nothing is held out
+    save_calibration(tmp_path, 3.0)
+    monkeypatch.chdir(ROOT_DIR)
+    train_nic_classifier(model_path=str(tmp_path / "nic_classifier.pkl"))
+    assert os.path.exists(tmp_path / "nic_classifier.pkl")
+    assert not os.path.exists(tmp_path / NIC_CALIBRATION_FILE)
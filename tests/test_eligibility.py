@@ -0,0 +1,64 @@
+"""
+Eligibility masks must keep exactly the schemes open to a business: listed
+or unrestricted in every filtered column, any one category sufficing.
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from eligibility import EligibilityIndex, filters_key, normalize_attributes
+
+# One scheme per row; empty and "all" cells are unrestricted
+CATALOGUE = {
+    "states": ["Kerala", "all", "Tamil Nadu; Kerala", "Gujarat", ""],
+    "sectors": ["A", "10", "", "C; 62", "J"],
+    "enterprise_sizes": ["micro", "micro;small", "", "medium", "small"],
+    "categories": ["women", "", "sc_st; rural", "", "startup"],
+}
+
+
+def eligible(key):
+    index = EligibilityIndex.build(normalize_attributes(CATALOGUE), len(CATALOGUE["states"]))
+    mask = index.mask(key)
+    return None if mask is None else np.flatnonzero(mask).tolist()
+
+
+def test_no_filters_select_every_scheme():
+    assert filters_key() is None
+    assert eligible(None) is None
+
+
+def test_state_matches_listed_and_unrestricted_schemes():
+    assert eligible(filters_key(state="kerala")) == [0, 1, 2, 4]
+    # Matched case-insensitively, like the catalogue
+    assert eligible(filters_key(state=" KERALA ")) == [0, 1, 2, 4]
+    assert eligible(filters_key(state="Punjab")) == [1, 4]
+
+
+def test_nic_code_matches_its_division_and_section():
+    # 10712 is in division 10, section C
+    assert eligible(filters_key(nic_code="10712")) == [1, 2, 3]
+    # 62012 is in division 62, section J
+    assert eligible(filters_key(nic_code="62012")) == [2, 3, 4]
+
+
+def test_any_one_category_suffices():
+    assert eligible(filters_key(categories=["rural"])) == [1, 2, 3]
+    assert eligible(filters_key(categories=["women", "rural"])) == [0, 1, 2, 3]
+
+
+def test_filters_combine_with_and():
+    key = filters_key(state="Kerala", enterprise_size="micro", categories=["women"])
+    assert eligible(key) == [0, 1]
+    # Scheme 3 is for Gujarat, but not for small enterprises
+    assert eligible(filters_key(state="Gujarat", enterprise_size="small")) == [1, 4]
+
+
+def test_filter_every_scheme_passes_needs_no_mask():
+    index = EligibilityIndex.build(normalize_attributes({"states": ["all", ""]}), 2)
+    assert index.mask(filters_key(state="Kerala")) is None
+    # Columns the catalogue does not have accept everything
+    assert index.mask(filters_key(enterprise_size="micro")) is None
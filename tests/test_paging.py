@@ -0,0 +1,94 @@
+"""
+Pages of a ranking within one depth bucket, each from a search of depth
+offset + k as /get_schemes does, must concatenate to the ranking of a
+single search, and deeper searches must still fill every page.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from lexical_index import BM25Index, HybridIndex
+from vector_index import ExactIndex, IVFIndex, QuantizedIndex, normalize_rows
+
+SIZE = 300
+PAGE = 7
+# The configured candidates, like GOVBIZ_SCHEME_DEPTH_BUCKET in the backend
+CANDIDATES = 50
+# Deeper than CANDIDATES, so the retrievers have to return more
+DEPTH = 120
+
+
+@pytest.fixture(scope="module")
+def catalogue():
+    rng = np.random.default_rng(0)
+    vectors = normalize_rows(rng.standard_normal((SIZE, 32)).astype(np.float32))
+    words = [f"term{i}" for i in range(40)]
+    texts = [" ".join(rng.choice(words, size=8)) for _ in range(SIZE)]
+    queries = normalize_rows(rng.standard_normal((5, 32)).astype(np.float32))
+    query_texts = [" ".join(rng.choice(words, size=3)) for _ in range(len(queries))]
+    return vectors, BM25Index.build(texts), queries, query_texts
+
+
+def paged(search, depth, page):
+    """
+    The ids of every page up to depth, each from a search of depth
+    offset + page, the last one cut short at depth
+    """
+    ids = []
+    for offset in range(0, depth, page):
+        ids.extend(search(min(offset + page, depth))[offset:offset + page])
+    return ids
+
+
+def searcher(index, query, text):
+    def search(k):
+        if isinstance(index, HybridIndex):
+            _, ids = index.search(query[None, :], k, [text])
+        else:
+            _, ids = index.search(query[None, :], k)
+        return [int(idx) for idx in ids[0] if idx >= 0]
+    return search
+
+
+def indexes(vectors, bm25):
+    exact = ExactIndex(vectors, normalized=True)
+    ivf = IVFIndex.build(vectors, n_lists=8, n_probe=3)
+    return {
+        "hybrid": HybridIndex(exact, bm25, candidates=CANDIDATES),
+        "hybrid+ivf": HybridIndex(exact, bm25, candidates=CANDIDATES, ann=ivf),
+        "int8+rerank": QuantizedIndex.build(vectors, rerank=CANDIDATES),
+    }
+
+
+@pytest.mark.parametrize("name", ["hybrid", "hybrid+ivf", "int8+rerank"])
+def test_pages_concatenate_to_single_search(catalogue, name):
+    vectors, bm25, queries, query_texts = catalogue
+    index = indexes(vectors, bm25)[name]
+    for query, text in zip(queries, query_texts):
+        search = searcher(index, query, text)
+        assert paged(search, CANDIDATES, PAGE) == search(CANDIDATES)
+
+
+@pytest.mark.parametrize("name", ["hybrid", "hybrid+ivf", "int8+rerank"])
+def test_deep_search_fills_every_page(catalogue, name):
+    vectors, bm25, queries, query_texts = catalogue
+    index = indexes(vectors, bm25)[name]
+    for query, text in zip(queries, query_texts):
+        ids = searcher(index, query, text)(DEPTH)
+        assert len(ids) == DEPTH
+        assert len(set(ids)) == DEPTH
+
+
+def test_shallow_hybrid_search_keeps_the_top_ranks(catalogue):
+    vectors, bm25, queries, query_texts = catalogue
+    index = HybridIndex(ExactIndex(vectors, normalized=True), bm25, candidates=CANDIDATES)
+    shallow_scores, shallow = index.search(queries, 5, query_texts)
+    deep_scores, deep = index.search(queries, CANDIDATES, query_texts)
+    np.testing.assert_array_equal(deep[:, :5], shallow)
+    np.testing.assert_array_equal(deep_scores[:, :5], shallow_scores)
+    # Listed by descending fused score
+    assert np.all(np.diff(deep_scores, axis=1) <= 0)
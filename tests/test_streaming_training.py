@@ -0,0 +1,78 @@
+"""
+Streaming NIC training: every row falls in the same fold on every pass,
+each cross-validation fold trains on the other rows and scores its own,
+and the report covers every configuration and fold.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "utils"))
+from train_nic_classifier import (cross_validate_fold, read_classes, row_folds,
+                                  train_nic_streaming)
+
+ROWS = 240
+FOLDS = 3
+
+
+@pytest.fixture
+def args(tmp_path):
+    rng = np.random.default_rng(0)
+    words = {code: [f"{code}word{i}" for i in range(8)] for code in ("10712", "62012", "49231")}
+    path = tmp_path / "registrations.csv"
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["description", "nic_code"])
+        for i in range(ROWS):
+            code = list(words)[i % len(words)]
+            writer.writerow([" ".join(rng.choice(words[code], size=4)) + f" unit {i}", code])
+    return argparse.Namespace(
+        streaming=str(path), text_column="description", label_column="nic_code",
+        chunk_size=50, epochs=1, folds=FOLDS, jobs=1, loss=["hinge"], alpha=[1e-4, 1e-3],
+        n_features_log2=[12], max_ngram=[1], calibration_rows=100,
+        output=str(tmp_path / "models" / "nic_classifier.pkl"),
+        report=str(tmp_path / "report.json"),
+    )
+
+
+def test_row_folds_are_stable():
+    texts = [f"business {i}" for i in range(500)]
+    folds = row_folds(texts, FOLDS)
+    assert folds.tolist() == row_folds(list(reversed(texts)), FOLDS)[::-1].tolist()
+    assert set(folds.tolist()) == set(range(FOLDS))
+    # Roughly balanced
+    assert np.bincount(folds).min() > 500 / FOLDS * 0.8
+
+
+def test_each_fold_holds_out_its_own_rows(args):
+    classes = read_classes(args.streaming, args.label_column, args.chunk_size)
+    config = {"loss": "hinge", "alpha": 1e-4, "n_features_log2": 12, "max_ngram": 1}
+    results = [cross_validate_fold(config, fold, classes, args) for fold in range(FOLDS)]
+    assert sum(r["validation_rows"] for r in results) == ROWS
+    for r in results:
+        assert r["train_rows"] + r["validation_rows"] == ROWS
+        assert r["accuracy"] > 0.9
+
+
+def test_report_covers_every_configuration_and_fold(args):
+    train_nic_streaming(args)
+    with open(args.report) as f:
+        report = json.load(f)
+    assert report["classes"] == 3
+    assert report["jobs"] == 1
+    assert [r["config"]["alpha"] for r in report["results"]] == args.alpha
+    for result in report["results"]:
+        assert [f["fold"] for f in result["folds"]] == list(range(FOLDS))
+        assert sum(f["validation_rows"] for f in result["folds"]) == ROWS
+    assert report["best"] in [r["config"] for r in report["results"]]
+    # The final model leaves out only the calibration sample
+    calibration = report["final"]["calibration"]
+    assert report["final"]["train_rows"] + calibration["rows"] == ROWS
+    assert os.path.exists(args.output)
+    assert os.path.exists(os.path.join(os.path.dirname(args.output), "nic_calibration.json"))
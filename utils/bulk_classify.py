@@ -0,0 +1,248 @@
+"""
+Classify a whole registry of business descriptions offline.
+
+Streams a CSV or Parquet file in chunks, predicts the NIC code and the top
+schemes for every row with the same models and code as the API, and writes
+the results as each chunk finishes, so memory stays bounded however large
+the input is. Chunks are processed by a pool of worker processes; the
+models are loaded once in the parent and shared with the workers through
+fork() where available.
+
+Progress is checkpointed after every chunk written. Rerun the same command
+with --resume to continue after an interruption.
+
+Run from the project root:
+    python utils/bulk_classify.py registry.csv classified.csv
+    python utils/bulk_classify.py registry.parquet classified.parquet --workers 8
+    python utils/bulk_classify.py registry.csv classified.csv --resume
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+# Set in each worker process by init_worker
+backend = None
+
+
+def load_backend(threads):
+    """Import backend/main.py and load its models, as the API does"""
+    global backend
+    sys.path.insert(0, BACKEND_DIR)
+    from server import limit_threads
+    limit_threads(threads)
+
+    # Model paths in main.py are relative to the backend directory
+    os.chdir(BACKEND_DIR)
+    import main
+    if not main.models_loaded():
+        main.load_models()
+    backend = main
+
+
+def init_worker(threads):
+    load_backend(threads)
+
+
+def classify_chunk(descriptions, top_k, with_schemes):
+    """NIC code and top schemes for a list of descriptions, as output columns"""
+    bundle = backend.model_registry.current
+    keys = [backend.normalize_description(d) if isinstance(d, str) else "" for d in descriptions]
+    columns = {"nic_code": [], "nic_confidence": [], "error": []}
+
+    for prediction, error in backend.run_batch(bundle, keys, backend.predict_nic_codes):
+        columns["nic_code"].append(prediction[0][0] if prediction else None)
+        columns["nic_confidence"].append(prediction[0][1] if prediction else None)
+        columns["error"].append(error)
+
+    if with_schemes:
+        def recommend(bundle, texts):
+            return backend.recommend_schemes(bundle, texts, top_k)
+
+        for rank in range(1, top_k + 1):
+            columns[f"scheme_{rank}"] = []
+            columns[f"scheme_{rank}_similarity"] = []
+        for i, (schemes, error) in enumerate(backend.run_batch(bundle, keys, recommend)):
+            columns["error"][i] = columns["error"][i] or error
+            for rank in range(1, top_k + 1):
+                scheme = schemes[rank - 1] if schemes and len(schemes) >= rank else None
+                columns[f"scheme_{rank}"].append(scheme["name"] if scheme else None)
+                columns[f"scheme_{rank}_similarity"].append(scheme["similarity"] if scheme else None)
+
+    return columns
+
+
+def read_chunks(path, chunk_size, skip_rows):
+    """Yield DataFrames of up to chunk_size rows, after skipping skip_rows rows"""
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        frames = (batch.to_pandas()
+                  for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size))
+    else:
+        frames = pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=False)
+
+    # Skipped rows are parsed, not counted by line, so quoted newlines are safe
+    skipped = 0
+    for frame in frames:
+        if skipped + len(frame) <= skip_rows:
+            skipped += len(frame)
+            continue
+        yield frame.iloc[max(0, skip_rows - skipped):]
+        skipped = skip_rows
+
+
+class CsvOutput:
+    """Appends chunks to one CSV file; resumes by truncating to the checkpoint"""
+
+    def __init__(self, path, resuming, output_bytes=None):
+        self.path = path
+        if resuming:
+            # Drop anything written after the last checkpoint
+            with open(path, "r+b") as f:
+                f.truncate(output_bytes)
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def write(self, frame, index):
+        header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, "a", newline="") as f:
+            frame.to_csv(f, header=header, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+        return os.path.getsize(self.path)
+
+
+class ParquetOutput:
+    """Writes each chunk as a part file in a directory; read it with pd.read_parquet(dir)"""
+
+    def __init__(self, path, resuming, output_bytes=None):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        if not resuming:
+            for name in os.listdir(path):
+                if name.startswith("part-") and name.endswith(".parquet"):
+                    os.remove(os.path.join(path, name))
+
+    def write(self, frame, index):
+        part = os.path.join(self.path, f"part-{index:06d}.parquet")
+        frame.to_parquet(part + ".tmp", index=False)
+        os.replace(part + ".tmp", part)
+        return None
+
+
+def save_checkpoint(path, state):
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def bulk_classify(args):
+    input_path = os.path.abspath(args.input)
+    output_path = os.path.abspath(args.output)
+    checkpoint_path = args.checkpoint or output_path + ".checkpoint.json"
+
+    state = {
+        "input": input_path,
+        "output": output_path,
+        "chunk_size": args.chunk_size,
+        "top_k": args.top_k,
+        "schemes": not args.no_schemes,
+        "chunks_done": 0,
+        "rows_done": 0,
+        "output_bytes": None,
+    }
+    if args.resume and os.path.exists(checkpoint_path):
+        with open(checkpoint_path) as f:
+            saved = json.load(f)
+        for key in ("input", "output", "chunk_size", "top_k", "schemes"):
+            if saved[key] != state[key]:
+                sys.exit(f"Checkpoint was written with {key}={saved[key]!r}, not {state[key]!r}")
+        state = saved
+        print(f"Resuming after {state['rows_done']} rows ({state['chunks_done']} chunks)")
+
+    output_class = ParquetOutput if output_path.endswith(".parquet") else CsvOutput
+    output = output_class(output_path, state["chunks_done"] > 0, state["output_bytes"])
+
+    # Load once in the parent; forked workers inherit the loaded models
+    print("Loading models...")
+    load_backend(args.threads)
+    if state.get("model_version") not in (None, backend.model_registry.version):
+        print(f"Warning: rows before the checkpoint were classified with model version "
+              f"{state['model_version']}, now {backend.model_registry.version}")
+    state["model_version"] = backend.model_registry.version
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if sys.platform == "linux" and "fork" in methods else None)
+
+    chunks = read_chunks(input_path, args.chunk_size, state["rows_done"])
+    next_index = state["chunks_done"]
+    pending, finished = {}, {}
+    start = time.perf_counter()
+    rows_this_run = 0
+
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=context,
+                             initializer=init_worker, initargs=(args.threads,)) as pool:
+        submitted = next_index
+        exhausted = False
+        while True:
+            # Keep a bounded number of chunks in flight to bound memory
+            while not exhausted and len(pending) + len(finished) < args.workers * 2:
+                frame = next(chunks, None)
+                if frame is None:
+                    exhausted = True
+                    break
+                future = pool.submit(classify_chunk, frame[args.text_column].tolist(),
+                                     args.top_k, not args.no_schemes)
+                pending[future] = (submitted, frame)
+                submitted += 1
+            if not pending and not finished:
+                break
+
+            if pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, frame = pending.pop(future)
+                    finished[index] = (frame, future.result())
+
+            # Write chunks in input order
+            while next_index in finished:
+                frame, columns = finished.pop(next_index)
+                result = frame.reset_index(drop=True)
+                for name, values in columns.items():
+                    result[name] = values
+                state["output_bytes"] = output.write(result, next_index)
+                next_index += 1
+                rows_this_run += len(result)
+                state["chunks_done"] = next_index
+                state["rows_done"] += len(result)
+                save_checkpoint(checkpoint_path, state)
+
+                elapsed = time.perf_counter() - start
+                print(f"{state['rows_done']} rows done, {rows_this_run / elapsed:.0f} rows/sec")
+
+    elapsed = time.perf_counter() - start
+    print(f"Classified {rows_this_run} rows in {elapsed:.1f}s "
+          f"({rows_this_run / elapsed if elapsed else 0:.0f} rows/sec) with {args.workers} workers")
+    print(f"Results written to: {output_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk NIC and scheme classification")
+    parser.add_argument("input", help="CSV or .parquet file of business descriptions")
+    parser.add_argument("output", help=".csv file, or .parquet directory of part files")
+    parser.add_argument("--text-column", default="description")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="rows per chunk")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads", type=int, default=1, help="math threads per worker")
+    parser.add_argument("--top-k", type=int, default=5, help="schemes per row")
+    parser.add_argument("--no-schemes", action="store_true", help="predict NIC codes only")
+    parser.add_argument("--checkpoint", help="checkpoint file (default: <output>.checkpoint.json)")
+    parser.add_argument("--resume", action="store_true", help="continue from the checkpoint")
+    bulk_classify(parser.parse_args())
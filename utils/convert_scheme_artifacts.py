@@ -0,0 +1,49 @@
+import argparse
+import os
+import pickle
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from artifacts import VECTOR_DTYPES, save_scheme_artifacts, load_scheme_artifacts
+
+def convert_scheme_artifacts(models_dir="backend/models", dtype="float32", quantize=False):
+    """
+    Convert scheme_embeddings.pkl and scheme_metadata.pkl into the
+    memory-mappable scheme_vectors.npy and columnar scheme_metadata.json
+    """
+    embeddings_path = os.path.join(models_dir, "scheme_embeddings.pkl")
+    metadata_path = os.path.join(models_dir, "scheme_metadata.pkl")
+    
+    print(f"Loading legacy pickles from {models_dir}...")
+    start = time.perf_counter()
+    with open(embeddings_path, "rb") as f:
+        embeddings = pickle.load(f)
+    with open(metadata_path, "rb") as f:
+        metadata = pickle.load(f)
+    print(f"Unpickled {len(embeddings)} schemes in {time.perf_counter() - start:.3f}s")
+    
+    save_scheme_artifacts(
+        models_dir,
+        embeddings,
+        metadata['scheme_names'],
+        metadata['descriptions'],
+        dtype=dtype,
+        quantize=quantize
+    )
+    
+    start = time.perf_counter()
+    vectors, _ = load_scheme_artifacts(models_dir)
+    print(f"Wrote {vectors.shape[0]} x {vectors.shape[1]} {vectors.dtype} vectors; "
+          f"memory-mapped load takes {time.perf_counter() - start:.3f}s")
+    print("The backend now loads the new files; the pickles can be deleted.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert pickled scheme artifacts")
+    parser.add_argument("--models-dir", default="backend/models")
+    parser.add_argument("--dtype", choices=VECTOR_DTYPES, default="float32",
+                        help="storage precision of the embeddings matrix")
+    parser.add_argument("--quantize", action="store_true",
+                        help="also write int8 scalar-quantized vectors")
+    args = parser.parse_args()
+    convert_scheme_artifacts(args.models_dir, args.dtype, args.quantize)
@@ -0,0 +1,108 @@
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import torch
+from sentence_transformers import SentenceTransformer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from encoders import (ONNX_CONFIG_FILE, ONNX_MODEL_DIR, ONNX_MODEL_FILE,
+                      SENTENCE_MODEL_NAME, OnnxEncoder)
+
+FLOAT_MODEL_FILE = "model.onnx"
+SAMPLE_TEXTS = [
+    "Software development and mobile app creation",
+    "Small food processing unit seeking a micro enterprise loan",
+    "Organic farming and dairy cooperative in a rural district",
+    "Women-led handloom and textile weaving business",
+]
+
+
+class TokenEmbeddings(torch.nn.Module):
+    """Transformer forward pass with keyword inputs and a single tensor output"""
+
+    def __init__(self, transformer, input_names):
+        super().__init__()
+        self.transformer = transformer
+        self.input_names = input_names
+
+    def forward(self, *inputs):
+        outputs = self.transformer(**dict(zip(self.input_names, inputs)))
+        return outputs.last_hidden_state
+
+
+def export_onnx_encoder(output_dir, quantize=True, opset=17):
+    """
+    Export the sentence transformer to ONNX and quantize its weights to int8
+    """
+    print("Loading sentence transformer model...")
+    model = SentenceTransformer(SENTENCE_MODEL_NAME)
+    transformer = model[0].auto_model.eval()
+    tokenizer = model.tokenizer
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Export the transformer only; pooling and normalization run in numpy
+    dummy = tokenizer(SAMPLE_TEXTS[:2], padding=True, return_tensors="pt")
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    input_names = [name for name in input_names if name in dummy]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["token_embeddings"] = {0: "batch", 1: "sequence"}
+
+    float_path = os.path.join(output_dir, FLOAT_MODEL_FILE)
+    print(f"Exporting to {float_path}...")
+    with torch.no_grad():
+        torch.onnx.export(
+            TokenEmbeddings(transformer, input_names),
+            tuple(dummy[name] for name in input_names),
+            float_path,
+            input_names=input_names,
+            output_names=["token_embeddings"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            dynamo=False,
+        )
+
+    model_file = FLOAT_MODEL_FILE
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        model_file = ONNX_MODEL_FILE
+        print(f"Quantizing weights to int8: {model_file}")
+        quantize_dynamic(float_path, os.path.join(output_dir, model_file),
+                         weight_type=QuantType.QInt8)
+
+    tokenizer.save_pretrained(output_dir)
+    config = {
+        "model_name": SENTENCE_MODEL_NAME,
+        "model_file": model_file,
+        "max_seq_length": model.max_seq_length,
+        "dimension": model.get_sentence_embedding_dimension(),
+        "normalize": any(type(module).__name__ == "Normalize" for module in model),
+        "pad_token": tokenizer.pad_token,
+        "pad_token_id": tokenizer.pad_token_id,
+    }
+    with open(os.path.join(output_dir, ONNX_CONFIG_FILE), "w") as f:
+        json.dump(config, f, indent=2)
+
+    # Quick parity check against the PyTorch model
+    reference = model.encode(SAMPLE_TEXTS)
+    exported = OnnxEncoder(output_dir, model_file).encode(SAMPLE_TEXTS)
+    cosines = np.sum(reference * exported, axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(exported, axis=1)
+    )
+    print(f"Cosine similarity to PyTorch embeddings: min {cosines.min():.4f}, "
+          f"mean {cosines.mean():.4f}")
+    print(f"ONNX encoder saved to: {output_dir}")
+    print("Run `python benchmarks/encoder_benchmark.py` for the full parity and latency report")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the sentence encoder to ONNX")
+    parser.add_argument("--output-dir", default=os.path.join("backend", ONNX_MODEL_DIR))
+    parser.add_argument("--no-quantize", action="store_true",
+                        help="keep float32 weights instead of int8")
+    parser.add_argument("--opset", type=int, default=17)
+    args = parser.parse_args()
+    export_onnx_encoder(args.output_dir, quantize=not args.no_quantize, opset=args.opset)
@@ -0,0 +1,134 @@
+import pandas as pd
+import numpy as np
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from artifacts import has_scheme_artifacts, load_scheme_artifacts
+from eligibility import EligibilityIndex
+from encoders import SENTENCE_MODEL_NAME
+from nic_scheme_map import (NIC_SCHEME_MAP_FILE, NICSchemeMap, nic_content_hash,
+                            rank_schemes_for_codes, scheme_catalogue_version)
+from vector_index import normalize_rows
+
+def load_previous_map(path):
+    """The map from the last run, or None if there is none usable"""
+    if not os.path.exists(path):
+        return None
+    try:
+        return NICSchemeMap.load(path)
+    except (OSError, KeyError, ValueError) as e:
+        print(f"Ignoring existing map: {e}")
+        return None
+
+def generate_nic_scheme_map(top_k=5, full=False, batch_size=64):
+    """
+    Rank the top schemes for every NIC code in nic_codes.csv.
+
+    Each code is embedded as the mean of its description embeddings and
+    compared with the scheme embeddings written by
+    generate_scheme_embeddings.py, among the schemes open to the code's
+    sector. The result is saved as models/nic_scheme_map.npz, which the
+    backend serves from /schemes_by_nic/{code}.
+
+    Incremental by default: codes whose descriptions are unchanged reuse
+    their stored vector, so only new or edited codes are encoded. Rankings
+    are recomputed for every code when the scheme catalogue changed, and
+    only for the re-encoded codes otherwise.
+    """
+    print("Loading NIC codes dataset...")
+    # Codes are read as text so leading zeros are kept
+    df = pd.read_csv("backend/data/nic_codes.csv", dtype={"nic_code": str})
+    descriptions_by_code = df.groupby("nic_code", sort=True)["description"].apply(list)
+    codes = descriptions_by_code.index.tolist()
+    code_hashes = [nic_content_hash(d, SENTENCE_MODEL_NAME) for d in descriptions_by_code]
+
+    print(f"Dataset loaded with {len(df)} descriptions of {len(codes)} NIC codes")
+
+    models_dir = "backend/models"
+    map_path = os.path.join(models_dir, NIC_SCHEME_MAP_FILE)
+    if not has_scheme_artifacts(models_dir):
+        raise SystemExit("Scheme artifacts not found; run utils/generate_scheme_embeddings.py first")
+    scheme_vectors, scheme_metadata = load_scheme_artifacts(models_dir)
+    scheme_digest = scheme_catalogue_version(scheme_metadata)
+    # Artifacts converted from the legacy pickles do not record their encoder
+    if scheme_metadata["encoder"] not in (None, SENTENCE_MODEL_NAME):
+        raise SystemExit(f"Scheme embeddings were made with {scheme_metadata['encoder']}; "
+                         "run utils/generate_scheme_embeddings.py first")
+
+    previous = None if full else load_previous_map(map_path)
+    if previous is not None and (previous.encoder != SENTENCE_MODEL_NAME or previous.k != top_k):
+        previous = None
+    if (previous is not None and previous.scheme_digest == scheme_digest
+            and previous.codes == codes and previous.code_hashes == code_hashes):
+        print(f"NIC codes and scheme catalogue {scheme_digest} unchanged; nothing to do")
+        return
+
+    previous_rows = {}
+    if previous is not None:
+        previous_rows = {h: row for row, h in enumerate(previous.code_hashes)}
+    to_encode = [i for i, h in enumerate(code_hashes) if h not in previous_rows]
+
+    print(f"Encoding {len(to_encode)} of {len(codes)} NIC codes")
+
+    code_vectors = np.empty((len(codes), scheme_vectors.shape[1]), dtype=np.float32)
+    for i, h in enumerate(code_hashes):
+        if h in previous_rows:
+            code_vectors[i] = previous.code_vectors[previous_rows[h]]
+    if to_encode:
+        # Initialize the sentence transformer model only when something needs encoding
+        print("Loading sentence transformer model...")
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(SENTENCE_MODEL_NAME)
+
+        texts = [text for i in to_encode for text in descriptions_by_code.iloc[i]]
+        embeddings = normalize_rows(model.encode(texts, batch_size=batch_size))
+        start = 0
+        for i in to_encode:
+            count = len(descriptions_by_code.iloc[i])
+            code_vectors[i] = embeddings[start:start + count].mean(axis=0)
+            start += count
+        code_vectors[to_encode] = normalize_rows(code_vectors[to_encode])
+
+    # Rank every code against a changed catalogue, otherwise only the new vectors
+    eligibility = EligibilityIndex.build(scheme_metadata["attributes"], len(scheme_vectors))
+    if previous is not None and previous.scheme_digest == scheme_digest:
+        scheme_rows = np.empty((len(codes), top_k), dtype=np.int32)
+        similarities = np.empty((len(codes), top_k), dtype=np.float32)
+        for i, h in enumerate(code_hashes):
+            if h in previous_rows:
+                scheme_rows[i] = previous.scheme_rows[previous_rows[h]]
+                similarities[i] = previous.similarities[previous_rows[h]]
+        to_rank = to_encode
+    else:
+        scheme_rows = np.full((len(codes), top_k), -1, dtype=np.int32)
+        similarities = np.zeros((len(codes), top_k), dtype=np.float32)
+        to_rank = list(range(len(codes)))
+    if to_rank:
+        scheme_rows[to_rank], similarities[to_rank] = rank_schemes_for_codes(
+            [codes[i] for i in to_rank], code_vectors[to_rank], scheme_vectors, eligibility, top_k
+        )
+
+    nic_scheme_map = NICSchemeMap(codes, code_hashes, code_vectors, scheme_rows, similarities,
+                                  scheme_digest, SENTENCE_MODEL_NAME)
+    nic_scheme_map.save(map_path)
+
+    print(f"Ranked {len(to_rank)} of {len(codes)} codes against catalogue {scheme_digest}; "
+          f"map saved to: {map_path}")
+
+    code = codes[0]
+    print(f"\nTop {top_k} schemes for NIC code {code} "
+          f"({descriptions_by_code.iloc[0][0]}):")
+    for rank, (row, similarity) in enumerate(nic_scheme_map.rankings()[code], start=1):
+        print(f"{rank}. {scheme_metadata['scheme_names'][row]} (similarity: {similarity:.4f})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute the top schemes for every NIC code")
+    parser.add_argument("--top-k", type=int, default=5, help="schemes stored per NIC code")
+    parser.add_argument("--full", action="store_true",
+                        help="re-encode every NIC code instead of reusing stored vectors")
+    parser.add_argument("--batch-size", type=int, default=64,
+                        help="descriptions per encoder batch")
+    args = parser.parse_args()
+    generate_nic_scheme_map(args.top_k, args.full, args.batch_size)
@@ -1,67 +1,224 @@
 import pandas as pd
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
-import pickle
+import argparse
 import os
+import sys
 
-def generate_scheme_embeddings():
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from artifacts import (VECTOR_DTYPES, catalogue_digest, has_scheme_artifacts,
+                       load_scheme_artifacts, save_scheme_artifacts, save_scheme_delta,
+                       scheme_content_hash)
+from eligibility import ELIGIBILITY_COLUMNS, normalize_attributes
+from encoders import SENTENCE_MODEL_NAME
+from lexical_index import SCHEME_BM25_FILE, BM25Index
+from vector_index import IVFIndex, normalize_rows
+
+def load_previous_artifacts(models_dir):
+    """The artifacts from the last run, or (None, None) if there are none usable"""
+    if not has_scheme_artifacts(models_dir):
+        return None, None
+    try:
+        return load_scheme_artifacts(models_dir)
+    except ValueError as e:
+        print(f"Ignoring existing artifacts: {e}")
+        return None, None
+
+def attribute_rows(attributes, count):
+    """Each scheme's eligibility values, as a tuple over ELIGIBILITY_COLUMNS"""
+    return list(zip(*(attributes.get(c, [""] * count) for c in ELIGIBILITY_COLUMNS)))
+
+def adopt_legacy_artifacts(metadata):
     """
-    Generate sentence embeddings for government schemes using sentence-transformers
+    Hash the stored descriptions of artifacts written without content hashes,
+    as if the configured encoder had embedded them, so their vectors are reused
+    """
+    print(f"Adopting stored vectors as {SENTENCE_MODEL_NAME} embeddings of their descriptions")
+    return {
+        **metadata,
+        "content_hashes": [scheme_content_hash(d, SENTENCE_MODEL_NAME)
+                           for d in metadata["descriptions"]],
+        "encoder": SENTENCE_MODEL_NAME,
+    }
+
+def generate_scheme_embeddings(dtype="float32", full=False, batch_size=64, rebuild_fraction=0.2,
+                               quantize=False, adopt=False):
+    """
+    Generate sentence embeddings for government schemes using sentence-transformers.
+
+    Incremental by default: every scheme's description is hashed together with
+    the encoder name, rows whose hash is already in the stored artifacts reuse
+    their vector, and only new or edited descriptions are encoded. Removed
+    schemes are dropped. The IVF index keeps its centroids and only places the
+    changed rows, unless more than rebuild_fraction of the catalogue changed.
+    The BM25 keyword index over scheme names and descriptions is rebuilt
+    whenever the catalogue changes. Eligibility columns are copied into the
+    metadata; editing them re-encodes nothing. The changes are recorded in
+    models/scheme_delta.json for the backend. With quantize, int8 codes of
+    the normalized vectors are written as well, for GOVBIZ_VECTOR_INDEX=int8.
+
+    Artifacts written before content hashes existed are re-encoded in full,
+    unless adopt is set: their vectors are then taken to be embeddings of
+    their stored descriptions by the configured encoder.
     """
     print("Loading government schemes dataset...")
-    
+
     # Load the dataset
     data_path = "backend/data/govt_schemes.csv"
-    df = pd.read_csv(data_path)
-    
+    # Eligibility cells are read as text so divisions like "01" keep their zero
+    df = pd.read_csv(data_path, dtype={c: str for c in ELIGIBILITY_COLUMNS})
+
     print(f"Dataset loaded with {len(df)} schemes")
-    
-    # Initialize the sentence transformer model
-    print("Loading sentence transformer model...")
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-    
-    # Generate embeddings for scheme descriptions
-    print("Generating embeddings...")
+
+    scheme_names = df['scheme_name'].tolist()
     scheme_descriptions = df['description'].tolist()
-    embeddings = model.encode(scheme_descriptions, show_progress_bar=True)
-    
-    print(f"Generated embeddings shape: {embeddings.shape}")
-    
-    # Create metadata dictionary
-    scheme_metadata = {
-        'scheme_names': df['scheme_name'].tolist(),
-        'descriptions': df['description'].tolist(),
-        'embeddings': embeddings
-    }
-    
-    # Save embeddings and metadata
-    embeddings_path = "backend/models/scheme_embeddings.pkl"
-    metadata_path = "backend/models/scheme_metadata.pkl"
-    
-    os.makedirs(os.path.dirname(embeddings_path), exist_ok=True)
-    
-    # Save embeddings
-    with open(embeddings_path, 'wb') as f:
-        pickle.dump(embeddings, f)
-    
-    # Save metadata
-    with open(metadata_path, 'wb') as f:
-        pickle.dump(scheme_metadata, f)
-    
-    print(f"Embeddings saved to: {embeddings_path}")
-    print(f"Metadata saved to: {metadata_path}")
-    
+    content_hashes = [scheme_content_hash(d, SENTENCE_MODEL_NAME) for d in scheme_descriptions]
+    attributes = normalize_attributes({c: df[c].tolist() for c in ELIGIBILITY_COLUMNS if c in df})
+
+    models_dir = "backend/models"
+    index_path = "backend/models/scheme_index_ivf.npz"
+    bm25_path = os.path.join(models_dir, SCHEME_BM25_FILE)
+    previous_vectors, previous_metadata = load_previous_artifacts(models_dir)
+    if adopt and previous_metadata is not None and previous_metadata["content_hashes"] is None:
+        previous_metadata = adopt_legacy_artifacts(previous_metadata)
+    base_digest = previous_metadata["digest"] if previous_metadata else None
+    digest = catalogue_digest(scheme_names, content_hashes, attributes)
+
+    # Stored vectors can be reused if they came from the same encoder and precision
+    reusable = (
+        not full
+        and previous_metadata is not None
+        and previous_metadata["content_hashes"] is not None
+        and previous_metadata["encoder"] == SENTENCE_MODEL_NAME
+        and previous_vectors.dtype == np.dtype(dtype)
+    )
+    if (reusable and digest == base_digest
+            and (previous_metadata["quantization"] is not None) == quantize
+            and os.path.exists(index_path) and os.path.exists(bm25_path)):
+        print(f"Catalogue unchanged (digest {digest}); nothing to do")
+        return
+
+    previous_rows = np.full(len(df), -1, dtype=np.int64)
+    previous_hashes = {}
+    if reusable:
+        row_of_hash = {}
+        for row, content_hash in enumerate(previous_metadata["content_hashes"]):
+            row_of_hash.setdefault(content_hash, row)
+        previous_rows = np.array([row_of_hash.get(h, -1) for h in content_hashes], dtype=np.int64)
+        previous_hashes = dict(zip(previous_metadata["scheme_names"],
+                                   previous_metadata["content_hashes"]))
+    elif previous_metadata is not None:
+        previous_hashes = {name: None for name in previous_metadata["scheme_names"]}
+
+    current_names = set(scheme_names)
+    added = [name for name in scheme_names if name not in previous_hashes]
+    updated = [name for name, h in zip(scheme_names, content_hashes)
+               if name in previous_hashes and previous_hashes[name] != h]
+    removed = [name for name in previous_hashes if name not in current_names]
+    # Schemes whose eligibility changed, for the backend's filtered-result caches
+    previous_attributes = {}
+    if previous_metadata is not None:
+        previous_names = previous_metadata["scheme_names"]
+        previous_attributes = dict(zip(previous_names, attribute_rows(
+            previous_metadata.get("attributes", {}), len(previous_names))))
+    reattributed = [
+        name for name, values in zip(scheme_names, attribute_rows(attributes, len(df)))
+        if name in previous_attributes and name not in updated
+        and previous_attributes[name] != values
+    ]
+    to_encode = np.flatnonzero(previous_rows < 0)
+
+    print(f"{len(added)} added, {len(updated)} changed, {len(removed)} removed, "
+          f"{len(reattributed)} with new eligibility; "
+          f"encoding {len(to_encode)} of {len(df)} descriptions")
+
+    model = None
+    encoded = None
+    if len(to_encode):
+        # Initialize the sentence transformer model only when something needs encoding
+        print("Loading sentence transformer model...")
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(SENTENCE_MODEL_NAME)
+
+        print("Generating embeddings...")
+        embeddings = model.encode([scheme_descriptions[i] for i in to_encode],
+                                  batch_size=batch_size, show_progress_bar=True)
+        encoded = normalize_rows(embeddings)
+
+    dim = encoded.shape[1] if encoded is not None else previous_vectors.shape[1]
+    vectors = np.empty((len(df), dim), dtype=np.float32)
+    kept = previous_rows >= 0
+    if kept.any():
+        vectors[kept] = previous_vectors[previous_rows[kept]]
+    if encoded is not None:
+        vectors[to_encode] = encoded
+
+    print(f"Embeddings matrix shape: {vectors.shape}")
+
+    # Save normalized embeddings (memory-mappable .npy) and columnar metadata
+    vectors = save_scheme_artifacts(
+        models_dir,
+        vectors,
+        scheme_names,
+        scheme_descriptions,
+        dtype=dtype,
+        content_hashes=content_hashes,
+        encoder=SENTENCE_MODEL_NAME,
+        normalized=True,
+        attributes=attributes,
+        quantize=quantize
+    )
+
+    print(f"Embeddings ({dtype}{' and int8' if quantize else ''}) and metadata saved to: {models_dir}")
+
+    # Update or rebuild the approximate nearest-neighbour index
+    dropped_rows = len(previous_vectors) - len(np.unique(previous_rows[kept])) if reusable else 0
+    changed_rows = len(to_encode) + dropped_rows
+    if (reusable and os.path.exists(index_path)
+            and changed_rows <= rebuild_fraction * max(len(df), 1)):
+        ivf_index = IVFIndex.load(index_path, previous_vectors).updated(vectors, previous_rows)
+        ivf_action = "updated"
+    else:
+        ivf_index = IVFIndex.build(vectors)
+        ivf_action = "rebuilt"
+    ivf_index.save(index_path)
+
+    print(f"IVF index with {ivf_index.n_lists} lists {ivf_action}: {index_path}")
+
+    # Keyword index for hybrid retrieval; BM25 weights depend on the whole
+    # catalogue, so it is rebuilt rather than updated
+    bm25_index = BM25Index.build([f"{name} {description}" for name, description
+                                  in zip(scheme_names, scheme_descriptions)])
+    bm25_index.save(bm25_path, digest)
+
+    print(f"BM25 index with {len(bm25_index.terms)} terms saved to: {bm25_path}")
+
+    # Written last, so the backend only applies it once every artifact is in place
+    save_scheme_delta(
+        models_dir, base_digest, digest, added, updated, removed,
+        reattributed=reattributed,
+        encoder=SENTENCE_MODEL_NAME,
+        count=len(df),
+        encoded=int(len(to_encode)),
+        reused=int(kept.sum()),
+        ivf=ivf_action
+    )
+
+    print(f"Catalogue digest {base_digest} -> {digest}; delta manifest written")
+
+    if model is None:
+        return
+
     # Test similarity search
     test_query = "small business loan micro enterprise"
     test_embedding = model.encode([test_query])
-    
+
     # Calculate similarities
-    similarities = cosine_similarity(test_embedding, embeddings)[0]
-    
+    similarities = cosine_similarity(test_embedding, np.asarray(vectors, dtype=np.float32))[0]
+
     # Get top 5 similar schemes
     top_indices = np.argsort(similarities)[::-1][:5]
-    
+
     print(f"\nTest query: '{test_query}'")
     print("Top 5 similar schemes:")
     for i, idx in enumerate(top_indices):
@@ -70,4 +227,20 @@ def generate_scheme_embeddings():
         print()
 
 if __name__ == "__main__":
-    generate_scheme_embeddings() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate scheme embeddings")
+    parser.add_argument("--dtype", choices=VECTOR_DTYPES, default="float32",
+                        help="storage precision of the embeddings matrix")
+    parser.add_argument("--full", action="store_true",
+                        help="re-encode every scheme instead of reusing stored vectors")
+    parser.add_argument("--batch-size", type=int, default=64,
+                        help="descriptions per encoder batch")
+    parser.add_argument("--rebuild-fraction", type=float, default=0.2,
+                        help="rebuild the IVF index when more than this share of rows changed")
+    parser.add_argument("--quantize", action="store_true",
+                        help="also write int8 scalar-quantized vectors for GOVBIZ_VECTOR_INDEX=int8")
+    parser.add_argument("--adopt", action="store_true",
+                        help="reuse stored vectors written without content hashes instead of "
+                             "re-encoding them, taking them as embeddings of their descriptions")
+    args = parser.parse_args()
+    generate_scheme_embeddings(args.dtype, args.full, args.batch_size, args.rebuild_fraction,
+                               args.quantize, args.adopt)
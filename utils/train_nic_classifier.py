@@ -1,14 +1,25 @@
 import pandas as pd
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.linear_model import SGDClassifier
 from sklearn.svm import LinearSVC
 from sklearn.pipeline import Pipeline
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, accuracy_score
+import argparse
+import itertools
+import json
+import multiprocessing
 import pickle
 import os
+import sys
+import time
+import zlib
 
-def train_nic_classifier():
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from nic_inference import NICScorer, fit_temperature, remove_calibration, save_calibration
+
+def train_nic_classifier(model_path="backend/models/nic_classifier.pkl"):
     """
     Train a TF-IDF + SVM classifier for NIC code prediction
     """
@@ -61,7 +72,6 @@ def train_nic_classifier():
     print(classification_report(y_test, y_pred))
     
     # Save the model
-    model_path = "backend/models/nic_classifier.pkl"
     os.makedirs(os.path.dirname(model_path), exist_ok=True)
     
     with open(model_path, 'wb') as f:
@@ -69,15 +79,324 @@ def train_nic_classifier():
     
     print(f"\nModel saved to: {model_path}")
     
+    # Calibrate probabilities on the held-out rows whose code was seen in training
+    known = y_test.isin(pipeline.classes_).to_numpy()
+    if known.any():
+        scores = NICScorer(pipeline).decision_scores(X_test[known].tolist())
+        labels = np.searchsorted(pipeline.classes_, y_test[known].to_numpy())
+        temperature, nll_before, nll_after = fit_temperature(scores, labels)
+        save_calibration(
+            os.path.dirname(model_path) or ".", temperature,
+            held_out_rows=int(known.sum()), nll_before=nll_before, nll_after=nll_after
+        )
+        print(f"Calibrated softmax temperature: {temperature:.4f} "
+              f"(held-out NLL {nll_before:.4f} -> {nll_after:.4f})")
+    else:
+        print("No held-out rows with a code seen in training; probabilities are not calibrated")
+        if remove_calibration(os.path.dirname(model_path) or "."):
+            print("Removed the calibration of the previous model")
+    
     # Test with a sample
     test_description = "Software development and mobile app creation"
-    prediction = pipeline.predict([test_description])[0]
-    confidence = np.max(pipeline.decision_function([test_description]))
+    candidates = NICScorer(pipeline, temperature if known.any() else None).top_k([test_description], 3)[0]
     
     print(f"\nSample prediction:")
     print(f"Description: {test_description}")
-    print(f"Predicted NIC Code: {prediction}")
-    print(f"Confidence: {confidence:.4f}")
+    print(f"Predicted NIC Code: {candidates[0][0]}")
+    print(f"Confidence: {candidates[0][1]:.4f}")
+    print(f"Other candidates: {', '.join(f'{code} ({p:.4f})' for code, p in candidates[1:])}")
+
+# Out-of-core training for registries too large to fit in memory
+
+# The final streaming model holds out 1 row in CALIBRATION_FOLDS for calibration
+CALIBRATION_FOLDS = 50
+
+def row_folds(texts, folds):
+    """Fold number of each row, from a hash of its text so every pass agrees"""
+    return np.array([zlib.crc32(t.encode("utf-8")) % folds for t in texts], dtype=np.int64)
+
+def stream_chunks(path, chunk_size, text_column, label_column):
+    """Yield (texts, labels) lists of up to chunk_size labelled rows"""
+    for frame in pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=False,
+                             usecols=[text_column, label_column]):
+        frame = frame[(frame[text_column] != "") & (frame[label_column] != "")]
+        yield frame[text_column].tolist(), frame[label_column].tolist()
+
+def read_classes(path, label_column, chunk_size):
+    """Every NIC code in the file; partial_fit needs the full list up front"""
+    classes = set()
+    for frame in pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=False,
+                             usecols=[label_column]):
+        classes.update(frame[label_column])
+    classes.discard("")
+    return np.array(sorted(classes))
+
+def make_streaming_pipeline(config):
+    """A stateless hashing vectorizer and a linear classifier trained with SGD"""
+    return Pipeline([
+        ('hashing', HashingVectorizer(
+            n_features=2 ** config["n_features_log2"],
+            ngram_range=(1, config["max_ngram"]),
+            stop_words='english',
+            alternate_sign=False,
+            norm='l2'
+        )),
+        ('classifier', SGDClassifier(
+            loss=config["loss"],
+            alpha=config["alpha"],
+            random_state=42
+        ))
+    ])
+
+def fit_streaming(config, classes, args, holdout=None, folds=None):
+    """
+    Train on every row whose fold (out of folds, default args.folds) is
+    not holdout, one chunk at a time, for
+    args.epochs passes over the file. Memory is bounded by the chunk size
+    and the model's weights, not by the size of the file.
+    """
+    pipeline = make_streaming_pipeline(config)
+    vectorizer, classifier = pipeline.named_steps['hashing'], pipeline.named_steps['classifier']
+    rng = np.random.default_rng(42)
+    rows = 0
+    for epoch in range(args.epochs):
+        for texts, labels in stream_chunks(args.streaming, args.chunk_size,
+                                           args.text_column, args.label_column):
+            if holdout is not None:
+                keep = row_folds(texts, folds or args.folds) != holdout
+                texts = [t for t, k in zip(texts, keep) if k]
+                labels = [l for l, k in zip(labels, keep) if k]
+            if not texts:
+                continue
+            # SGD converges better when rows within a chunk are shuffled
+            order = rng.permutation(len(texts))
+            features = vectorizer.transform([texts[i] for i in order])
+            classifier.partial_fit(features, np.asarray(labels)[order], classes=classes)
+            if epoch == 0:
+                rows += len(texts)
+    return pipeline, rows
+
+def evaluate_streaming(pipeline, args, fold):
+    """Accuracy on the rows of one fold, streamed like the training data"""
+    correct = total = 0
+    for texts, labels in stream_chunks(args.streaming, args.chunk_size,
+                                       args.text_column, args.label_column):
+        keep = row_folds(texts, args.folds) == fold
+        texts = [t for t, k in zip(texts, keep) if k]
+        if not texts:
+            continue
+        labels = np.asarray([l for l, k in zip(labels, keep) if k])
+        correct += int((pipeline.predict(texts) == labels).sum())
+        total += len(texts)
+    return correct / total if total else 0.0, total
+
+def peak_memory_mb():
+    """Peak resident memory of this process, if the platform reports it"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 1)
+
+def model_memory_mb(n_classes, n_features_log2):
+    """Size of the dense float64 weights, one row per class"""
+    return n_classes * 2 ** n_features_log2 * 8 / 2 ** 20
+
+def task_memory_mb(n_classes, configs, chunk_size):
+    """
+    Estimated peak memory of one (configuration, fold) task: the largest
+    model's weights and the float64 class scores of one chunk in predict()
+    """
+    largest = max(model_memory_mb(n_classes, c["n_features_log2"]) for c in configs)
+    return largest + chunk_size * n_classes * 8 / 2 ** 20
+
+def available_memory_mb():
+    """Memory available to new processes, or None if the platform does not say"""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (AttributeError, ValueError, OSError):
+        return None
+
+def search_jobs(requested, task_mb, available_mb):
+    """
+    Processes for the search: the requested number, or as many as the cores
+    and the available memory allow, keeping a quarter of it free
+    """
+    if requested is not None:
+        return requested
+    jobs = os.cpu_count() or 1
+    if available_mb is not None:
+        jobs = min(jobs, int(available_mb * 0.75 // task_mb))
+    return max(jobs, 1)
+
+def cross_validate_fold(config, fold, classes, args):
+    """Train without one fold and score it; runs in its own process"""
+    start = time.perf_counter()
+    pipeline, rows = fit_streaming(config, classes, args, holdout=fold)
+    train_seconds = time.perf_counter() - start
+    accuracy, validation_rows = evaluate_streaming(pipeline, args, fold)
+    return {
+        "fold": fold,
+        "train_rows": rows,
+        "validation_rows": validation_rows,
+        "train_seconds": round(train_seconds, 2),
+        "accuracy": accuracy,
+        "peak_memory_mb": peak_memory_mb(),
+    }
+
+def search_configs(args):
+    keys = ("loss", "alpha", "n_features_log2", "max_ngram")
+    grid = itertools.product(args.loss, args.alpha, args.n_features_log2, args.max_ngram)
+    return [dict(zip(keys, values)) for values in grid]
+
+def train_nic_streaming(args):
+    """
+    Out-of-core training with a cross-validated hyperparameter search.
+
+    Every (configuration, fold) pair is trained in a separate process, so
+    the peak memory reported for each is its own. Unless --jobs is given,
+    as many run at a time as the cores and the available memory allow. The
+    best configuration by mean accuracy is then retrained on all rows
+    except a small calibration sample and saved to args.output.
+    """
+    print(f"Reading NIC codes from {args.streaming}...")
+    classes = read_classes(args.streaming, args.label_column, args.chunk_size)
+    configs = search_configs(args)
+    task_mb = task_memory_mb(len(classes), configs, args.chunk_size)
+    available_mb = available_memory_mb()
+    jobs = search_jobs(args.jobs, task_mb, available_mb)
+    available = f"{available_mb:.0f} MB" if available_mb is not None else "unknown"
+    print(f"{len(classes)} NIC codes; searching {len(configs)} configurations "
+          f"x {args.folds} folds on {jobs} processes")
+    print(f"Estimated memory: {task_mb:.0f} MB per process, {task_mb * jobs:.0f} MB in total "
+          f"(available: {available})")
+    if available_mb is not None and task_mb * jobs > available_mb:
+        print("Warning: the search may run out of memory; lower --jobs, --chunk-size "
+              "or --n-features-log2")
+
+    # A fresh process per task, so ru_maxrss is that task's peak
+    context = multiprocessing.get_context("spawn")
+    search_start = time.perf_counter()
+    with context.Pool(processes=jobs, maxtasksperchild=1) as pool:
+        tasks = {
+            (i, fold): pool.apply_async(cross_validate_fold, (config, fold, classes, args))
+            for i, config in enumerate(configs)
+            for fold in range(args.folds)
+        }
+        results = []
+        for i, config in enumerate(configs):
+            folds = [tasks[(i, fold)].get() for fold in range(args.folds)]
+            accuracies = [f["accuracy"] for f in folds]
+            peaks = [f["peak_memory_mb"] for f in folds if f["peak_memory_mb"] is not None]
+            result = {
+                "config": config,
+                "accuracy_mean": round(float(np.mean(accuracies)), 4),
+                "accuracy_std": round(float(np.std(accuracies)), 4),
+                "train_seconds_mean": round(float(np.mean([f["train_seconds"] for f in folds])), 2),
+                "peak_memory_mb": max(peaks) if peaks else None,
+                "model_mb": round(model_memory_mb(len(classes), config["n_features_log2"]), 1),
+                "folds": folds,
+            }
+            results.append(result)
+            print(json.dumps({k: v for k, v in result.items() if k != "folds"}))
+    search_seconds = time.perf_counter() - search_start
+
+    best = max(results, key=lambda r: r["accuracy_mean"])
+    print(f"Best configuration: {best['config']} (accuracy {best['accuracy_mean']:.4f})")
+
+    # A small sample is held out of the final model to fit the softmax temperature
+    print("Training the final model...")
+    start = time.perf_counter()
+    pipeline, rows = fit_streaming(best["config"], classes, args, holdout=0, folds=CALIBRATION_FOLDS)
+    final_seconds = time.perf_counter() - start
+
+    model_path = args.output
+    os.makedirs(os.path.dirname(model_path) or ".", exist_ok=True)
+    with open(model_path, 'wb') as f:
+        pickle.dump(pipeline, f)
+    print(f"Model trained on {rows} rows in {final_seconds:.1f}s, saved to: {model_path}")
+
+    scores, labels = [], []
+    scorer = NICScorer(pipeline)
+    class_index = {c: i for i, c in enumerate(scorer.classes)}
+    for texts, chunk_labels in stream_chunks(args.streaming, args.chunk_size,
+                                             args.text_column, args.label_column):
+        keep = row_folds(texts, CALIBRATION_FOLDS) == 0
+        room = args.calibration_rows - len(labels)
+        texts = [t for t, k in zip(texts, keep) if k][:room]
+        chunk_labels = [l for l, k in zip(chunk_labels, keep) if k][:room]
+        if texts:
+            scores.append(scorer.decision_scores(texts))
+            labels.extend(class_index[l] for l in chunk_labels)
+        if len(labels) >= args.calibration_rows:
+            break
+    calibration = None
+    if labels:
+        temperature, nll_before, nll_after = fit_temperature(np.vstack(scores), labels)
+        save_calibration(os.path.dirname(model_path) or ".", temperature, held_out_rows=len(labels),
+                         nll_before=nll_before, nll_after=nll_after)
+        calibration = {"temperature": temperature, "rows": len(labels),
+                       "nll_before": nll_before, "nll_after": nll_after}
+        print(f"Calibrated softmax temperature: {temperature:.4f} "
+              f"(held-out NLL {nll_before:.4f} -> {nll_after:.4f})")
+    else:
+        print("No calibration rows; probabilities are not calibrated")
+        if remove_calibration(os.path.dirname(model_path) or "."):
+            print("Removed the calibration of the previous model")
+
+    report = {
+        "input": os.path.abspath(args.streaming),
+        "classes": len(classes),
+        "folds": args.folds,
+        "epochs": args.epochs,
+        "chunk_size": args.chunk_size,
+        "jobs": jobs,
+        "estimated_task_mb": round(task_mb, 1),
+        "search_seconds": round(search_seconds, 1),
+        "results": results,
+        "best": best["config"],
+        "final": {"train_rows": rows, "train_seconds": round(final_seconds, 2),
+                  "calibration": calibration},
+    }
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Training report saved to: {args.report}")
 
 if __name__ == "__main__":
-    train_nic_classifier() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train the NIC code classifier")
+    parser.add_argument("--streaming", metavar="CSV",
+                        help="train out of core on this labelled CSV instead of backend/data/nic_codes.csv")
+    parser.add_argument("--text-column", default="description")
+    parser.add_argument("--label-column", default="nic_code")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="rows per partial_fit call")
+    parser.add_argument("--epochs", type=int, default=3, help="passes over the file")
+    parser.add_argument("--folds", type=int, default=3, help="cross-validation folds")
+    parser.add_argument("--jobs", type=int,
+                        help="training processes for the search (default: as many as "
+                             "the cores and the available memory allow)")
+    parser.add_argument("--loss", nargs="+", default=["hinge", "modified_huber"])
+    parser.add_argument("--alpha", type=float, nargs="+", default=[1e-6, 1e-5, 1e-4])
+    parser.add_argument("--n-features-log2", type=int, nargs="+", default=[18],
+                        help="hashing space sizes, as powers of two")
+    parser.add_argument("--max-ngram", type=int, nargs="+", default=[2])
+    parser.add_argument("--calibration-rows", type=int, default=20000,
+                        help="held-out rows used to fit the softmax temperature")
+    parser.add_argument("--output", default="backend/models/nic_classifier.pkl",
+                        help="where to save the trained model; its calibration is "
+                             "written to the same directory")
+    parser.add_argument("--report", default="nic_training_report.json")
+    args = parser.parse_args()
+
+    if args.streaming:
+        train_nic_streaming(args)
+    else:
+        train_nic_classifier(args.output) 
\ No newline at end of file
@@ -0,0 +1,101 @@
+import pandas as pd
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.svm import LinearSVC
+from sklearn.model_selection import train_test_split
+import argparse
+import pickle
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from nic_hierarchy import NIC_HIERARCHY_FILE, HierarchicalNICClassifier, code_path
+from nic_inference import fit_temperature
+
+def train_nic_hierarchy(data_path="backend/data/nic_codes.csv", beam_width=3):
+    """
+    Train a hierarchical NIC classifier: one TF-IDF + linear SVM per code
+    prefix, from the 2-digit division down to the 5-digit sub-class
+    """
+    print("Loading NIC codes dataset...")
+
+    # Codes are read as text so leading zeros (e.g. 01111) are kept
+    df = pd.read_csv(data_path, dtype={'nic_code': str})
+    df['nic_code'] = df['nic_code'].str.strip()
+
+    print(f"Dataset loaded with {len(df)} samples")
+    print(f"Number of unique NIC codes: {df['nic_code'].nunique()}")
+    print(f"Number of divisions: {df['nic_code'].str[:2].nunique()}")
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        df['description'], df['nic_code'], test_size=0.2, random_state=42
+    )
+
+    print("Training the hierarchical classifier...")
+    model = HierarchicalNICClassifier.fit(
+        X_train.tolist(),
+        y_train.tolist(),
+        TfidfVectorizer(
+            max_features=5000,
+            ngram_range=(1, 2),
+            stop_words='english',
+            min_df=2,
+            max_df=0.95
+        ),
+        lambda: LinearSVC(random_state=42, max_iter=1000, C=1.0),
+        beam_width=beam_width
+    )
+    classifiers = sum(node.weights is not None for node in model.nodes.values())
+    print(f"{len(model.nodes)} prefixes, {classifiers} with a classifier")
+
+    # Evaluate the model
+    leaves = model.beam_search(X_test.tolist(), k=5)
+    predictions = np.array([candidates[0][0] for candidates in leaves])
+    print(f"\nModel Performance:")
+    print(f"Accuracy: {np.mean(predictions == y_test.to_numpy()):.4f}")
+    print(f"Division accuracy: {np.mean([p[:2] == y[:2] for p, y in zip(predictions, y_test)]):.4f}")
+    top5 = np.mean([y in [c for c, _, _ in candidates] for candidates, y in zip(leaves, y_test)])
+    print(f"Top-5 accuracy: {top5:.4f}")
+
+    # Calibrate the softmax temperature on held-out divisions the root has seen
+    root = model.nodes[""]
+    known = y_test.str[:2].isin(root.children).to_numpy()
+    if root.weights is not None and known.any():
+        features = model.vectorizer.transform(X_test[known].tolist())
+        scores = np.asarray(features @ root.weights) + root.intercept
+        labels = [root.children.index(code[:2]) for code in y_test[known]]
+        temperature, nll_before, nll_after = fit_temperature(scores, labels)
+        model.temperature = temperature
+        model.calibrated = True
+        print(f"Calibrated softmax temperature: {temperature:.4f} "
+              f"(held-out division NLL {nll_before:.4f} -> {nll_after:.4f})")
+    else:
+        print("No held-out rows with a division seen in training; probabilities are not calibrated")
+
+    # Save the model
+    model_path = os.path.join("backend/models", NIC_HIERARCHY_FILE)
+    os.makedirs(os.path.dirname(model_path), exist_ok=True)
+
+    with open(model_path, 'wb') as f:
+        pickle.dump(model, f)
+
+    print(f"\nModel saved to: {model_path}")
+
+    # Test with a sample
+    test_description = "Software development and mobile app creation"
+    code, probability, prefixes = model.beam_search([test_description], k=1)[0][0]
+
+    print(f"\nSample prediction:")
+    print(f"Description: {test_description}")
+    print(f"Predicted NIC Code: {code} ({probability:.4f})")
+    for level in code_path(code, prefixes):
+        print(f"  {level['level']:<9} {level['code']:<6} {level['confidence']:.4f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the hierarchical NIC classifier")
+    parser.add_argument("--data", default="backend/data/nic_codes.csv",
+                        help="CSV with description and nic_code columns")
+    parser.add_argument("--beam-width", type=int, default=3,
+                        help="prefixes kept at each level during prediction")
+    args = parser.parse_args()
+    train_nic_hierarchy(args.data, args.beam_width)